@@ -0,0 +1,99 @@
+import threading
+from collections import deque
+
+
+class ListSnapshot:
+    # Unveränderlicher Stand der Liste zu einer Version
+    # Gebaut erst beim ersten Lesen nach einem Batch (ApplyLoop.snapshot),
+    # danach von allen Lesern geteilt - keine defensive Kopie pro Leser
+
+    __slots__ = ("version", "items")
+
+    def __init__(self, version, items):
+        self.version = version
+        self.items = tuple(items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class ApplyLoop:
+    # Einziger Schreiber der ShoppingList
+    #
+    # Coordinator-Thread, User-Thread (send_to_leader) und Election-Thread
+    # ändern die Liste nicht mehr selbst, sondern reihen Befehle ein. Ein
+    # Thread arbeitet die Queue ab - was sich inzwischen angesammelt hat,
+    # läuft als ein Batch (höchstens max_batch Befehle), danach ist der
+    # Snapshot veraltet. Kopiert wird die Liste erst, wenn jemand diesen
+    # Stand liest - ein Update kostet so O(1) statt O(n), auch wenn jeder
+    # Batch nur einen Befehl enthält. Gestartet wird wie beim Scheduler
+    # erst beim ersten Befehl. Unter AsyncRuntime läuft die Queue per
+    # call_soon im Event-Loop statt in einem eigenen Thread.
+
+    def __init__(self, shopping_list, max_batch=256):
+        self.shopping_list = shopping_list
+        self.max_batch = max_batch
+        # deque.append / popleft sind thread-sicher
+        self.queue = deque()
+        self.wakeup = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.call_soon = None
+        self._scheduled = False
+        self.batches = 0
+        # Während eines Batches gehalten - Leser bauen den Snapshot nur
+        # zwischen zwei Batches (RLock: auch aus einem Befehl heraus lesbar)
+        self.state_lock = threading.RLock()
+        self._snapshot = None
+
+    def submit(self, command, *args):
+        self.queue.append((command, args))
+
+        if self.call_soon:
+            if not self._scheduled:
+                self._scheduled = True
+                self.call_soon(self.run_pending)
+            return
+
+        with self.lock:
+            if not self.thread:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+        self.wakeup.set()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            self.run_pending()
+
+    def run_pending(self):
+        self._scheduled = False
+        while self.queue:
+            with self.state_lock:
+                for _ in range(min(len(self.queue), self.max_batch)):
+                    command, args = self.queue.popleft()
+                    try:
+                        command(*args)
+                    except Exception as e:
+                        print(f"[APPLY] Fehler: {e}")
+                self.publish()
+
+    def publish(self):
+        # Nur als veraltet markieren - gebaut wird in snapshot
+        self.batches += 1
+        self._snapshot = None
+
+    @property
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self.state_lock:
+                snapshot = self._snapshot
+                if snapshot is None:
+                    snapshot = ListSnapshot(self.shopping_list.version, self.shopping_list.get_items())
+                    self._snapshot = snapshot
+        return snapshot
@@ -0,0 +1,285 @@
+from sim_helpers import quiet, agreed, cluster, nodes_of, join, elect, callback_errors
+from codec import encode, decode
+import csv
+import json
+import platform
+import sys
+import time
+import uuid
+
+# Benchmarks auf dem simulierten Netz (simulation.py)
+#
+#   python benchmark.py [throughput] [election] [sync] [failover] [codec]
+#                       [--csv] [--out <datei>] [--seed <n>] [--quick]
+#                       [--nodes <n>] [--sizes 10,100,1000] [--lists 10,1000]
+#                       [--writes <n>] [--rate <ops/s>] [--group] [--broadcast]
+#
+# Ohne Namen laufen alle. Zeiten in "virtuellen" Sekunden kommen aus
+# dem Netzmodell (Latenz, Timer, Timeouts) und sind bei gleichem seed exakt
+# reproduzierbar - Regressionen im Protokoll (mehr Roundtrips, längere
+# Failover) fallen dort auf. "wall_*" ist echte Rechenzeit des ganzen
+# Clusters in einem Prozess und zeigt Regressionen in der Verarbeitung.
+# "codec" misst nur encode/decode der häufigen Nachrichten, binär und JSON.
+# Ausgabe: JSON (Standard) oder CSV auf stdout bzw. in --out.
+
+
+def option(name, default):
+    if name in sys.argv:
+        return sys.argv[sys.argv.index(name) + 1]
+    return default
+
+
+def sizes_option(name, default):
+    return [int(size) for size in option(name, default).split(",")]
+
+
+def percentile(values, p):
+    # Nearest-Rank, values sortiert
+    if not values:
+        return None
+    index = max(0, min(len(values) - 1, int(round(p / 100 * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def bench_throughput(seed, size, writes, rate, gossip, group_commit):
+    # Open Loop: die Follower schicken abwechselnd `rate` Writes pro
+    # (virtueller) Sekunde per send_to_leader. Commit-Latenz = bis der
+    # Write im Replikat des Senders angekommen ist (Leader + Rückweg)
+    net, parts = cluster(size, seed, gossip, group_commit=group_commit)
+    nodes = nodes_of(parts)
+    leader = elect(net, parts)
+    if not leader:
+        return {"benchmark": "throughput", "nodes": size, "error": "kein Leader"}
+    net.run(1)
+
+    writers = [n for n in nodes if n is not leader]
+    pending = {}
+    latencies = []
+
+    def write(writer, item):
+        pending[item] = (writer, net.now)
+        writer.send_to_leader("add", item)
+
+    for i in range(writes):
+        writer = writers[i % len(writers)]
+        writer.transport.call_later(i / rate, write, writer, f"item-{i}")
+
+    start = net.now
+    before = dict(net.stats)
+    wall = time.time()
+    end = start + writes / rate + 10
+    while (pending or len(latencies) < writes) and net.events and net.events[0][0] <= end:
+        net.step()
+        for item, (writer, sent) in list(pending.items()):
+            if item in writer.shopping_list:
+                latencies.append(net.now - sent)
+                del pending[item]
+    net.run_until(lambda: all(len(n.shopping_list) >= writes for n in nodes), 10)
+    duration = net.now - start
+    wall = time.time() - wall
+
+    latencies.sort()
+    return {
+        "benchmark": "throughput",
+        "nodes": size,
+        "group_commit": group_commit,
+        "writes": writes,
+        "offered_rate": rate,
+        "committed": len(latencies),
+        "virtual_ops_per_sec": round(len(latencies) / duration, 1) if duration else None,
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(latencies[-1] if latencies else None),
+        "datagrams_per_write": round((net.stats["datagrams"] - before["datagrams"]) / writes, 2),
+        "wall_ops_per_sec": round(writes / wall, 1) if wall else None,
+    }
+
+
+def bench_election(seed, size, strategy, gossip):
+    # Eine Election auf einem ruhenden Cluster - Zeit bis sich alle einig
+    # sind, Election-Nachrichten (Streams) bis dahin
+    net, parts = cluster(size, seed, gossip, strategy)
+    net.run(0.5)
+
+    start = net.now
+    streams = net.stats["streams"]
+    wall = time.time()
+    leader = elect(net, parts)
+    wall = time.time() - wall
+    return {
+        "benchmark": "election",
+        "nodes": size,
+        "strategy": parts[0][3].strategy.name,
+        "converged": leader is not None,
+        "convergence_ms": ms(net.now - start) if leader else None,
+        "messages": net.stats["streams"] - streams,
+        "wall_sec": round(wall, 3),
+    }
+
+
+def bench_sync(seed, list_size, gossip, batch=100):
+    # Neuer Node holt eine Liste mit list_size Items per sync_req vom Leader
+    net, parts = cluster(3, seed, gossip)
+    nodes = nodes_of(parts)
+    leader = elect(net, parts)
+    if not leader:
+        return {"benchmark": "sync", "items": list_size, "error": "kein Leader"}
+
+    items = [f"item-{i:06d}" for i in range(list_size)]
+    for i in range(0, list_size, batch):
+        leader.send_batch([("add", item) for item in items[i:i + batch]])
+    net.run_until(lambda: all(len(n.shopping_list) == list_size for n in nodes), 30)
+    net.run(1)
+
+    joiner = join(net, parts)
+
+    before = dict(net.stats)
+    start = net.now
+    wall = time.time()
+    joiner.request_sync()
+    synced = net.run_until(lambda: len(joiner.shopping_list) == list_size, 5, poll=0.0005)
+    wall = time.time() - wall
+    return {
+        "benchmark": "sync",
+        "items": list_size,
+        "leader_version": leader.shopping_list.version,
+        "synced": synced,
+        "sync_ms": ms(net.now - start) if synced else None,
+        "bytes": net.stats["bytes"] - before["bytes"],
+        "datagrams": net.stats["datagrams"] - before["datagrams"],
+        "wall_sec": round(wall, 4),
+    }
+
+
+def bench_failover(seed, size, failover, gossip):
+    # Leader crasht - Zeit bis alle Überlebenden denselben neuen Leader
+    # kennen (Election über den Ring bzw. Nachfolger mit Lease)
+    net, parts = cluster(size, seed, gossip, failover=failover)
+    nodes = nodes_of(parts)
+    leader = elect(net, parts)
+    if not leader:
+        return {"benchmark": "failover", "nodes": size, "error": "kein Leader"}
+    net.run(3)
+
+    net.crash(leader)
+    start = net.now
+    streams = net.stats["streams"]
+    recovered = net.run_until(
+        lambda: agreed(nodes) and all(n.current_leader_id != leader.id for n in nodes if n.transport.alive), 120)
+    return {
+        "benchmark": "failover",
+        "nodes": size,
+        "mode": "successor" if failover else "election",
+        "recovered": recovered,
+        "failover_ms": ms(net.now - start) if recovered else None,
+        "election_messages": net.stats["streams"] - streams,
+    }
+
+
+def bench_codec(rounds):
+    # µs pro encode/decode je Nachrichtentyp - bestes von drei Durchläufen
+    node_id, candidate_id = str(uuid.uuid4()), str(uuid.uuid4())
+    messages = [
+        {"type": "announcement", "node_id": node_id, "port": 50123},
+        {"type": "upd", "action": "add", "item": "Äpfel", "seq": 4711, "epoch": 2, "min_version": 10},
+        {"type": "ack", "node_id": node_id, "seq": 4711},
+        {"type": "lease", "leader_id": node_id, "candidate_id": candidate_id,
+         "epoch": 2, "min_version": 10, "seq": 99, "version": 4711},
+        {"type": "bupd", "ops": [["add", f"item-{i}"] for i in range(50)], "seq": 4711},
+        {"type": "sync_state", "version": 5000, "items": [f"item-{i:06d}" for i in range(2000)],
+         "count": 2000, "from": 0},
+    ]
+    results = []
+    for msg in messages:
+        count = max(1, rounds // 100) if msg["type"] == "sync_state" else rounds
+        for mode in ("binary", "json"):
+            data = encode(msg, mode)
+            timings = {}
+            for name, call in (("encode", lambda: encode(msg, mode)), ("decode", lambda: decode(data))):
+                best = None
+                for _ in range(3):
+                    start = time.perf_counter()
+                    for _ in range(count):
+                        call()
+                    cost = (time.perf_counter() - start) / count
+                    best = cost if best is None else min(best, cost)
+                timings[name] = round(best * 1e6, 2)
+            results.append({
+                "benchmark": "codec",
+                "message": msg["type"],
+                "mode": mode,
+                "bytes": len(data),
+                "encode_us": timings["encode"],
+                "decode_us": timings["decode"],
+            })
+    return results
+
+
+def run(benchmarks, seed, gossip):
+    quick = "--quick" in sys.argv
+    size = int(option("--nodes", 5))
+    results = []
+
+    if "throughput" in benchmarks:
+        writes = int(option("--writes", 200 if quick else 2000))
+        rate = float(option("--rate", 1000))
+        for group_commit in ([True] if "--group" in sys.argv else [False, True]):
+            results.append(bench_throughput(seed, size, writes, rate, gossip, group_commit))
+
+    if "election" in benchmarks:
+        for cluster_size in sizes_option("--sizes", "10,50" if quick else "10,100,1000"):
+            for strategy in ("chang-roberts", "hirschberg-sinclair"):
+                results.append(bench_election(seed, cluster_size, strategy, gossip))
+
+    if "sync" in benchmarks:
+        for list_size in sizes_option("--lists", "10,1000" if quick else "10,100,1000,10000,50000"):
+            results.append(bench_sync(seed, list_size, gossip))
+
+    if "failover" in benchmarks:
+        for failover in (False, True):
+            results.append(bench_failover(seed, max(size, 3), failover, gossip))
+
+    if "codec" in benchmarks:
+        results += bench_codec(2000 if quick else 20000)
+
+    return results
+
+
+benchmarks = [name for name in ("throughput", "election", "sync", "failover", "codec") if name in sys.argv[1:]]
+benchmarks = benchmarks or ["throughput", "election", "sync", "failover", "codec"]
+seed = int(option("--seed", 1))
+
+print(f"[BENCH] {', '.join(benchmarks)} (seed {seed})", file=sys.stderr)
+started = time.time()
+with quiet():
+    results = run(benchmarks, seed, gossip="--broadcast" not in sys.argv)
+print(f"[BENCH] Fertig nach {time.time() - started:.1f}s", file=sys.stderr)
+
+errors = callback_errors()
+if errors:
+    print(f"[BENCH] {len(errors)} Fehler in Callbacks, z.B. {errors[0]}", file=sys.stderr)
+
+out = open(option("--out", None), "w", newline="") if "--out" in sys.argv else sys.stdout
+if "--csv" in sys.argv:
+    # Eine Zeile pro Messung, Spalten aus allen Benchmarks (leer wo nicht zutreffend)
+    fields = []
+    for result in results:
+        fields += [key for key in result if key not in fields]
+    writer = csv.DictWriter(out, fieldnames=["seed"] + fields)
+    writer.writeheader()
+    for result in results:
+        writer.writerow({"seed": seed, **result})
+else:
+    json.dump({
+        "seed": seed,
+        "python": platform.python_version(),
+        "discovery": "broadcast" if "--broadcast" in sys.argv else "gossip",
+        "results": results,
+    }, out, indent=2)
+    out.write("\n")
+if out is not sys.stdout:
+    out.close()
@@ -0,0 +1,336 @@
+import itertools
+import json
+import os
+import struct
+import uuid
+import zlib
+
+# Kompaktes Binärformat für alle Nachrichten (Discovery, Election, Coordinator)
+#
+# Frame:  MAGIC | VERSION | FLAGS | LÄNGE (4 Byte) | BODY
+# Body:   LAYOUT (1 Byte) | ...
+#         Layout 0:   kompaktes JSON - alle selten verschickten Nachrichten
+#         Layout 1..: feste struct-Layouts für die häufigen Nachrichten
+#                     (announcement, upd, ack, lease, ...) - UUIDs als
+#                     16 Byte, Strings als UTF-8 mit Längenpräfix
+#
+# Version 1 (getaggte Werte) wird weiter gelesen, aber nicht mehr
+# geschrieben - sie war in Python langsamer als json.
+#
+# JSON bleibt als Debug-Modus erhalten (SHOPPING_CODEC=json). decode()
+# erkennt alle Formate, damit alte und neue Nodes gemischt laufen können.
+
+MAGIC = 0xD5
+VERSION = 2
+FLAG_COMPRESSED = 0x01
+HEADER = struct.Struct("!BBBI")
+
+# Größte UDP-Nutzlast (IPv4) - mehr nimmt sendto nicht an
+MAX_DATAGRAM = 65507
+# zlib nur, wenn die Nachricht sonst nicht in ein Datagramm passt (große
+# Snapshots) - darunter kostet es mehr CPU, als es an Bytes spart
+COMPRESS_THRESHOLD = MAX_DATAGRAM
+COMPRESS_LEVEL = 1
+
+MODE = os.environ.get("SHOPPING_CODEC", "binary")
+
+# Nur am Ende erweitern - der Index ist Teil des Wire-Formats
+KEYS = [
+    "type", "node_id", "port", "candidate_id", "leader_id", "originator",
+    "action", "item", "items", "seq", "ops", "version", "since", "state",
+    "adds", "removed", "digest", "count", "holder", "dirty", "min_version",
+    "max_version", "buckets", "list", "request", "ack",
+    "from", "to", "incarnation", "gossip", "target", "ip", "target_port",
+    "failed", "phase", "hop", "direction", "messages",
+    "epoch", "multicast",
+]
+TOKENS = [
+    "announcement", "election", "leader", "list_check", "req", "upd",
+    "breq", "bupd", "sync_req", "sync_state", "crdt", "recon_offer",
+    "recon_req", "recon_items", "lreq", "lupd", "lsync", "add", "remove",
+    "batch", "sync", "ack", "gap_req", "ping", "ping_req", "members",
+    "alive", "suspect", "dead", "ring_repair",
+    "hs_probe", "hs_reply", "right", "left",
+    "lease", "lease_ack", "read_index", "read_index_reply",
+    "recon_sub", "recon_fetch",
+]
+_KEY_INDEX = {key: i for i, key in enumerate(KEYS)}
+_TOKEN_INDEX = {token: i for i, token in enumerate(TOKENS)}
+
+T_NONE, T_TRUE, T_FALSE, T_INT, T_STR, T_UUID, T_LIST, T_DICT, T_FLOAT, T_TOKEN = range(10)
+
+# Feste Layouts: Typ -> Felder (Name, Art). Die Felder nach "|" sind
+# optional, ein Bit im Präsenz-Byte sagt, ob sie in der Nachricht stehen.
+# Arten: uuid (16 Byte), token (1 Byte aus TOKENS), q (int64), ? (bool),
+# str (UTF-8), ops (Liste von [token, str]). Passt eine Nachricht nicht
+# genau (fremde Keys, None, float, ...), geht sie als JSON (Layout 0).
+# Nur am Ende erweitern - der Index ist Teil des Wire-Formats
+LAYOUTS = [
+    ("announcement", "node_id:uuid port:q | multicast:? incarnation:q"),
+    ("upd", "action:token seq:q item:str | epoch:q min_version:q ack:?"),
+    ("bupd", "seq:q ops:ops | epoch:q min_version:q"),
+    ("ack", "seq:q | node_id:uuid"),
+    ("ping", "seq:q"),
+    ("lease", "leader_id:uuid candidate_id:uuid epoch:q min_version:q seq:q version:q"),
+    ("lease_ack", "node_id:uuid epoch:q seq:q"),
+]
+_FORMATS = {"uuid": "16s", "token": "B", "q": "q", "?": "?", "str": "I", "ops": "I"}
+
+
+class CodecError(Exception):
+    pass
+
+
+def set_mode(mode):
+    # "binary" oder "json" (Debug / Rollout mit alten Nodes)
+    global MODE
+    if mode not in ("binary", "json"):
+        raise CodecError(f"Unbekannter Codec-Modus: {mode}")
+    MODE = mode
+
+
+def _uuid_bytes(value):
+    # Nur kanonische UUIDs (klein, mit Bindestrichen) - sonst käme beim
+    # Dekodieren ein anderer String heraus
+    if type(value) is not str or len(value) != 36:
+        raise ValueError(value)
+    raw = bytes.fromhex(value.replace("-", ""))
+    if _uuid_str(raw) != value:
+        raise ValueError(value)
+    return raw
+
+
+def _uuid_str(raw):
+    text = raw.hex()
+    return f"{text[:8]}-{text[8:12]}-{text[12:16]}-{text[16:20]}-{text[20:]}"
+
+
+def _pack_ops(ops):
+    # [[aktion, item], ...] -> Anzahl, Aktionen als Bytes, Längen, dann
+    # alle Items als ein UTF-8-Blob
+    actions = bytes(_TOKEN_INDEX[action] for action, _ in ops)
+    items = [item.encode("utf-8") for _, item in ops]
+    lengths = struct.pack(f"!I{len(items)}I", len(items), *map(len, items))
+    return lengths[:4] + actions + lengths[4:] + b"".join(items)
+
+
+def _unpack_ops(blob):
+    count = struct.unpack_from("!I", blob)[0]
+    lengths = struct.unpack_from(f"!{count}I", blob, 4 + count)
+    offsets = list(itertools.accumulate(lengths, initial=0))
+    data = blob[4 + count * 5:]
+    text = data.decode("utf-8")
+    if len(text) == len(data):
+        # Nur ASCII - Zeichen- und Byte-Positionen sind gleich
+        items = [text[start:end] for start, end in zip(offsets, offsets[1:])]
+    else:
+        items = [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+    return [[TOKENS[action], item] for action, item in zip(blob[4:4 + count], items)]
+
+
+class _Layout:
+    def __init__(self, number, msg_type, spec):
+        self.number = number
+        self.type = msg_type
+        required, _, optional = spec.partition("|")
+        required = [tuple(field.split(":")) for field in required.split()]
+        optional = [tuple(field.split(":")) for field in optional.split()]
+        self.required = [name for name, _ in required]
+        self.keys = {"type"} | {name for name, _ in required + optional}
+        # (Name, Art, Präsenz-Bit) - Pflichtfelder ohne Bit
+        self.fields = [(name, kind, 0) for name, kind in required]
+        self.fields += [(name, kind, 1 << i) for i, (name, kind) in enumerate(optional)]
+        # Layout-Nummer, Präsenz-Byte, dann alle Felder in fester Reihenfolge
+        # (fehlende optionale als 0), str/ops als Länge in Bytes - die Bytes
+        # selbst folgen hinter dem struct
+        self.struct = struct.Struct("!BB" + "".join(_FORMATS[kind] for _, kind, _ in self.fields))
+
+    def fits(self, msg):
+        return msg.keys() <= self.keys and all(name in msg for name in self.required)
+
+    def encode(self, msg):
+        present = 0
+        values = []
+        tails = []
+        for name, kind, bit in self.fields:
+            if name not in msg:
+                values.append(b"\0" * 16 if kind == "uuid" else 0)
+                continue
+            present |= bit
+            value = msg[name]
+            if kind == "q" or kind == "?":
+                # Keine stillen Umwandlungen (True -> 1, 1.5 -> Fehler erst in pack)
+                if type(value) is not (int if kind == "q" else bool):
+                    raise ValueError(value)
+            elif kind == "uuid":
+                value = _uuid_bytes(value)
+            elif kind == "token":
+                value = _TOKEN_INDEX[value]
+            else:
+                tail = value.encode("utf-8") if kind == "str" else _pack_ops(value)
+                tails.append(tail)
+                value = len(tail)
+            values.append(value)
+        return self.struct.pack(self.number, present, *values) + b"".join(tails)
+
+    def decode(self, body):
+        values = self.struct.unpack_from(body)
+        present = values[1]
+        msg = {"type": self.type}
+        pos = self.struct.size
+        for (name, kind, bit), value in zip(self.fields, values[2:]):
+            if bit and not present & bit:
+                continue
+            if kind == "uuid":
+                value = _uuid_str(value)
+            elif kind == "token":
+                value = TOKENS[value]
+            elif kind == "str":
+                value, pos = body[pos:pos + value].decode("utf-8"), pos + value
+            elif kind == "ops":
+                value, pos = _unpack_ops(body[pos:pos + value]), pos + value
+            msg[name] = value
+        return msg
+
+
+_LAYOUTS = [_Layout(number, msg_type, spec) for number, (msg_type, spec) in enumerate(LAYOUTS, 1)]
+_LAYOUT_BY_TYPE = {layout.type: layout for layout in _LAYOUTS}
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise CodecError("Varint abgeschnitten")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_value(data, pos):
+    # Body von Version 1
+    if pos >= len(data):
+        raise CodecError("Nachricht abgeschnitten")
+    tag = data[pos]
+    pos += 1
+
+    if tag == T_NONE:
+        return None, pos
+    if tag == T_TRUE:
+        return True, pos
+    if tag == T_FALSE:
+        return False, pos
+    if tag == T_INT:
+        raw, pos = _read_varint(data, pos)
+        return (raw >> 1) if not raw & 1 else -((raw + 1) >> 1), pos
+    if tag == T_FLOAT:
+        return struct.unpack_from("!d", data, pos)[0], pos + 8
+    if tag == T_TOKEN:
+        index, pos = _read_varint(data, pos)
+        return TOKENS[index], pos
+    if tag == T_UUID:
+        return str(uuid.UUID(bytes=bytes(data[pos:pos + 16]))), pos + 16
+    if tag == T_STR:
+        length, pos = _read_varint(data, pos)
+        return bytes(data[pos:pos + length]).decode("utf-8"), pos + length
+    if tag == T_LIST:
+        count, pos = _read_varint(data, pos)
+        result = []
+        for _ in range(count):
+            value, pos = _read_value(data, pos)
+            result.append(value)
+        return result, pos
+    if tag == T_DICT:
+        count, pos = _read_varint(data, pos)
+        result = {}
+        for _ in range(count):
+            raw, pos = _read_varint(data, pos)
+            if raw & 1:
+                length = raw >> 1
+                key = bytes(data[pos:pos + length]).decode("utf-8")
+                pos += length
+            else:
+                key = KEYS[raw >> 1]
+            result[key], pos = _read_value(data, pos)
+        return result, pos
+    raise CodecError(f"Unbekannter Tag: {tag}")
+
+
+def encode(msg, mode=None):
+    # dict -> bytes im aktuellen Modus
+    if (mode or MODE) == "json":
+        return json.dumps(msg).encode("utf-8")
+
+    body = None
+    layout = _LAYOUT_BY_TYPE.get(msg.get("type"))
+    if layout and layout.fits(msg):
+        try:
+            body = layout.encode(msg)
+        except (ValueError, KeyError, AttributeError, struct.error):
+            # Passt nicht ins feste Layout (None, float, zu groß, ...)
+            body = None
+    if body is None:
+        try:
+            body = b"\0" + json.dumps(msg, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            raise CodecError(f"Nicht kodierbar: {e}")
+
+    flags = 0
+    if len(body) > COMPRESS_THRESHOLD:
+        compressed = zlib.compress(body, COMPRESS_LEVEL)
+        if len(compressed) < len(body):
+            body = compressed
+            flags |= FLAG_COMPRESSED
+
+    return HEADER.pack(MAGIC, VERSION, flags, len(body)) + body
+
+
+def encode_split(build, entries, limit=MAX_DATAGRAM, offset=0):
+    # Nachricht mit einer langen Liste auf mehrere Datagramme verteilen:
+    # build(offset, teil) baut die Nachricht für entries[offset:...], passt
+    # sie kodiert nicht in `limit` Bytes, wird die Liste halbiert. Ein
+    # einzelner zu großer Eintrag bleibt übrig - der Aufrufer prüft das
+    data = encode(build(offset, entries))
+    if len(data) <= limit or len(entries) <= 1:
+        return [data]
+    middle = len(entries) // 2
+    return (encode_split(build, entries[:middle], limit, offset) +
+            encode_split(build, entries[middle:], limit, offset + middle))
+
+
+def decode(data):
+    # bytes -> dict, erkennt Binär- und JSON-Format automatisch
+    if not data:
+        raise CodecError("Leere Nachricht")
+    if data[0] != MAGIC:
+        return json.loads(bytes(data).decode("utf-8"))
+
+    if len(data) < HEADER.size:
+        raise CodecError("Header abgeschnitten")
+    _, version, flags, length = HEADER.unpack_from(data)
+    if version > VERSION:
+        raise CodecError(f"Codec-Version {version} nicht unterstützt")
+
+    body = bytes(data[HEADER.size:HEADER.size + length])
+    if len(body) != length:
+        raise CodecError("Body abgeschnitten")
+    if flags & FLAG_COMPRESSED:
+        body = zlib.decompress(body)
+
+    if version == 1:
+        msg, _ = _read_value(body, 0)
+        return msg
+    if not body:
+        raise CodecError("Body leer")
+    if body[0] == 0:
+        return json.loads(body[1:])
+    if body[0] > len(_LAYOUTS):
+        raise CodecError(f"Unbekanntes Layout: {body[0]}")
+    try:
+        return _LAYOUTS[body[0] - 1].decode(body)
+    except (struct.error, IndexError) as e:
+        raise CodecError(f"Nachricht abgeschnitten: {e}")
@@ -0,0 +1,102 @@
+import socket
+import threading
+from framing import send_message
+
+
+class NeighborConnection:
+    # Langlebige TCP-Verbindung zu einem Ring-Nachbarn
+    # Wird beim ersten Senden aufgebaut und bei Fehlern neu verbunden -
+    # kein Handshake und kein TIME_WAIT mehr pro Nachricht
+
+    def __init__(self, neighbor, transport, connect_timeout=2):
+        self.transport = transport
+        self.neighbor_id = neighbor["id"]
+        self.addr = (neighbor.get("ip", "127.0.0.1"), neighbor["port"] + 1000)
+        self.connect_timeout = connect_timeout
+        self.sock = None
+        self.lock = threading.Lock()
+
+    def matches(self, neighbor):
+        return (neighbor is not None and neighbor["id"] == self.neighbor_id
+                and (neighbor.get("ip", "127.0.0.1"), neighbor["port"] + 1000) == self.addr)
+
+    def _connect(self):
+        self.sock = self.transport.connect(self.addr, self.connect_timeout)
+
+    def _closed_by_peer(self):
+        # Nachbar neu gestartet: das alte Socket ist auf seiner Seite zu, ein
+        # sendall darauf klappt trotzdem und die Nachricht geht verloren.
+        # Die Gegenseite sendet auf dieser Verbindung nie - ein lesbares
+        # Socket heißt also EOF (b"") oder Fehler
+        try:
+            self.sock.setblocking(False)
+            return self.sock.recv(1, socket.MSG_PEEK) == b""
+        except BlockingIOError:
+            return False
+        except OSError:
+            return True
+        finally:
+            self.sock.settimeout(self.connect_timeout)
+
+    def send(self, data):
+        # Gerahmte Nachricht senden, bei kaputter Verbindung einmal neu verbinden
+        with self.lock:
+            for attempt in range(2):
+                try:
+                    if self.sock is not None and self._closed_by_peer():
+                        self._close()
+                    if self.sock is None:
+                        self._connect()
+                    send_message(self.sock, data)
+                    return
+                except OSError:
+                    self._close()
+                    if attempt == 1:
+                        raise
+
+    def _close(self):
+        if self.sock:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+            self.sock = None
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+
+class ConnectionPool:
+    # Hält je eine Verbindung zum rechten und linken Nachbarn
+    # Ring.update_ring ruft update() auf - wechselt ein Nachbar, wird die
+    # alte Verbindung geschlossen und zur neuen lazy verbunden
+
+    def __init__(self, transport):
+        self.transport = transport
+        self.left = None
+        self.right = None
+        self.lock = threading.Lock()
+
+    def update(self, left_neighbor, right_neighbor):
+        with self.lock:
+            self.left = self._swap(self.left, left_neighbor)
+            self.right = self._swap(self.right, right_neighbor)
+
+    def _swap(self, connection, neighbor):
+        if connection and connection.matches(neighbor):
+            return connection
+        if connection:
+            connection.close()
+        return NeighborConnection(neighbor, self.transport) if neighbor else None
+
+    def get(self, neighbor):
+        # Passende Verbindung für diesen Nachbarn oder None
+        with self.lock:
+            for connection in (self.right, self.left):
+                if connection and connection.matches(neighbor):
+                    return connection
+        return None
+
+    def close_all(self):
+        self.update(None, None)
@@ -1,7 +1,10 @@
 from node import Node
 from discovery import Discovery
+from gossip import GossipDiscovery
 from ring import Ring
 from election import Election
+from runtime import AsyncRuntime
+import codec
 import time
 import sys
 
@@ -9,13 +12,44 @@ print("=" * 60)
 print("INTERACTIVE DEMO - Distributed Shopping List")
 print("=" * 60)
 
-# Node erstellen
-node = Node()
+# --json: Nachrichten als JSON statt Binärformat (Debug / gemischter Rollout)
+if "--json" in sys.argv:
+    codec.set_mode("json")
+
+# Node erstellen (--crdt: leaderlose Writes über OR-Set,
+# --data <dir>: Liste auf Platte sichern und beim Neustart laden,
+# --failover: Nachfolger mit Lease übernimmt ohne Election,
+# --group: Leader fasst Requests zu Batch-Updates zusammen,
+# --multicast <interface>: Updates/Announcements über eine Multicast-Gruppe)
+data_dir = sys.argv[sys.argv.index("--data") + 1] if "--data" in sys.argv else None
+if data_dir and "--crdt" in sys.argv:
+    print("[ERROR] --data geht nicht zusammen mit --crdt (OR-Set wird nicht gespeichert)")
+    sys.exit(1)
+multicast = sys.argv[sys.argv.index("--multicast") + 1] if "--multicast" in sys.argv else None
+node = Node(crdt="--crdt" in sys.argv, data_dir=data_dir, failover="--failover" in sys.argv,
+            group_commit="--group" in sys.argv, multicast=multicast)
 print(f"\n[INFO] Meine Node-ID: {node.id[:8]}")
 
-# Discovery starten
-disc = Discovery(node)
-disc.start()
+# --async: alle Sockets über einen Event-Loop statt eigener Threads
+runtime = None
+if "--async" in sys.argv:
+    runtime = AsyncRuntime()
+    runtime.start()
+
+# Discovery starten (--gossip: SWIM-Membership statt Announcements an alle,
+# --seed ip:port: Einstiegs-Node außerhalb des eigenen Subnetzes)
+if "--gossip" in sys.argv or "--seed" in sys.argv:
+    seeds = []
+    if "--seed" in sys.argv:
+        seed_ip, seed_port = sys.argv[sys.argv.index("--seed") + 1].split(":")
+        seeds.append((seed_ip, int(seed_port)))
+    disc = GossipDiscovery(node, seeds=seeds)
+else:
+    disc = Discovery(node)
+if runtime:
+    runtime.add_discovery(disc)
+else:
+    disc.start()
 
 print("[INFO] Warte 3 Sekunden auf Peer Discovery...")
 time.sleep(3)
@@ -24,9 +58,12 @@ time.sleep(3)
 ring = Ring(node, disc)
 ring.update_ring()
 
-# Election
-elec = Election(node, ring)
-elec.start()
+# Election (--hs: Hirschberg-Sinclair statt Chang-Roberts)
+elec = Election(node, ring, strategy="hirschberg-sinclair" if "--hs" in sys.argv else "chang-roberts")
+if runtime:
+    runtime.add_election(elec)
+else:
+    elec.start()
 
 print("\n[INFO] Warte auf Election...")
 time.sleep(2)
@@ -39,7 +76,10 @@ if not node.current_leader_id:
 
 # Coordinator starten
 node.set_coordinator(elec)
-node.start_coordinator()
+if runtime:
+    runtime.add_coordinator(node)
+else:
+    node.start_coordinator()
 
 # Status anzeigen
 def show_status():
@@ -52,14 +92,21 @@ def show_status():
     print(f"Peers: {len(peers)}")
     for peer_id, peer_info in peers.items():
         print(f"  - {peer_id[:8]} auf {peer_info['ip']}:{peer_info['port']}")
+    if elec.history:
+        last = elec.history[-1]
+        print(f"Letzte Election: {last['strategy']}, {last['messages']} eigene Nachrichten, "
+              f"{last['duration'] * 1000:.0f} ms")
     print("--------------\n")
 
 # Interaktive Schleife
 print("\n" + "=" * 60)
 print("BEFEHLE:")
-print("  add <item>     - Item zur Liste hinzufuegen")
-print("  remove <item>  - Item aus Liste entfernen")
-print("  list           - Liste anzeigen")
+print("  add <item>     - Item zur Liste hinzufuegen (mehrere: add a, b, c)")
+print("  remove <item>  - Item aus Liste entfernen (mehrere: remove a, b)")
+print("  list [sek]     - Liste anzeigen (höchstens sek alt, Standard 1)")
+print("  ladd <liste> <item>    - Item zu benannter Liste hinzufuegen")
+print("  lremove <liste> <item> - Item aus benannter Liste entfernen")
+print("  lshow <liste>          - Benannte Liste anzeigen (lokales Replikat)")
 print("  status         - Node-Status anzeigen")
 print("  election       - Neue Election starten")
 print("  quit           - Beenden")
@@ -79,16 +126,25 @@ while True:
             disc.stop()
             elec.stop()
             node.stop_coordinator()
+            if runtime:
+                runtime.stop()
             break
         
-        elif cmd == "list":
-            items = node.shopping_list.get_items()
-            if items:
+        elif cmd == "list" or cmd.startswith("list "):
+            # list <sekunden>: höchstens so alter Stand, sonst beim Leader bestätigen
+            max_staleness = float(cmd[5:]) if cmd.startswith("list ") else 1.0
+            result = node.read(max_staleness=max_staleness)
+            if result is None:
+                print("[ERROR] Stand konnte nicht bestätigt werden - Leader nicht erreichbar")
+                continue
+            if result.items:
                 print("\nShopping-Liste:")
-                for i, item in enumerate(items, 1):
+                for i, item in enumerate(result.items, 1):
                     print(f"  {i}. {item}")
             else:
                 print("\nShopping-Liste ist leer")
+            if result.lag is not None:
+                print(f"  (v{result.version}, {result.lag} Versionen Rückstand, Quelle: {result.source})")
         
         elif cmd == "status":
             show_status()
@@ -100,20 +156,46 @@ while True:
             show_status()
         
         elif cmd.startswith("add "):
-            item = cmd[4:].strip()
-            if item:
-                node.send_to_leader("add", item)
+            items = [i.strip() for i in cmd[4:].split(",") if i.strip()]
+            if len(items) > 1:
+                node.send_batch([("add", item) for item in items])
                 time.sleep(0.5)
-                print(f"[OK] '{item}' hinzugefuegt")
+                print(f"[OK] {len(items)} Items hinzugefuegt")
+            elif items:
+                node.send_to_leader("add", items[0])
+                time.sleep(0.5)
+                print(f"[OK] '{items[0]}' hinzugefuegt")
             else:
                 print("[ERROR] Bitte Item angeben: add <item>")
         
+        elif cmd.startswith("ladd ") or cmd.startswith("lremove "):
+            parts = cmd.split(" ", 2)
+            if len(parts) == 3 and parts[2].strip():
+                action = "add" if parts[0] == "ladd" else "remove"
+                node.send_to_list(parts[1], action, parts[2].strip())
+                owners = node.list_owners(parts[1])
+                print(f"[OK] an Coordinator {owners[0][:8]} gesendet" if owners else "[ERROR] Keine Nodes")
+            else:
+                print("[ERROR] Bitte Liste und Item angeben: ladd <liste> <item>")
+        
+        elif cmd.startswith("lshow "):
+            name = cmd[6:].strip()
+            if name in node.lists:
+                print(f"\n[{name}] {node.lists[name]}")
+            else:
+                owners = node.list_owners(name)
+                print(f"[INFO] Liste '{name}' liegt nicht auf diesem Node (Owner: {', '.join(o[:8] for o in owners)})")
+        
         elif cmd.startswith("remove "):
-            item = cmd[7:].strip()
-            if item:
-                node.send_to_leader("remove", item)
+            items = [i.strip() for i in cmd[7:].split(",") if i.strip()]
+            if len(items) > 1:
+                node.send_batch([("remove", item) for item in items])
+                time.sleep(0.5)
+                print(f"[OK] {len(items)} Items entfernt")
+            elif items:
+                node.send_to_leader("remove", items[0])
                 time.sleep(0.5)
-                print(f"[OK] '{item}' entfernt")
+                print(f"[OK] '{items[0]}' entfernt")
             else:
                 print("[ERROR] Bitte Item angeben: remove <item>")
         
@@ -125,6 +207,8 @@ while True:
         disc.stop()
         elec.stop()
         node.stop_coordinator()
+        if runtime:
+            runtime.stop()
         break
     except Exception as e:
         print(f"[ERROR] {e}")
@@ -0,0 +1,36 @@
+import hashlib
+
+# Digests für den List-Check: statt der ganzen Liste wandert nur ein Hash
+# durch den Ring. Die Items sind per Hash auf feste Buckets verteilt, jeder
+# Bucket-Digest ist das XOR der Item-Hashes (reihenfolgeunabhängig und
+# inkrementell pflegbar). Jeder Bucket ist noch einmal in SUB_BUCKETS
+# Blätter geteilt: bei Abweichung werden erst die Blatt-Digests der
+# unterschiedlichen Buckets verglichen, ausgetauscht werden nur die Items
+# der unterschiedlichen Blätter (1/4096 der Liste pro abweichendem Item).
+
+BUCKETS = 64
+SUB_BUCKETS = 64
+
+
+def item_hash(item):
+    return int.from_bytes(hashlib.sha1(item.encode("utf-8")).digest()[:8], "big")
+
+
+def bucket_of(item_h, buckets=BUCKETS):
+    return item_h % buckets
+
+
+def leaf_of(item_h):
+    # Blatt-Index: Bucket * SUB_BUCKETS + Unter-Bucket
+    return bucket_of(item_h) * SUB_BUCKETS + (item_h // BUCKETS) % SUB_BUCKETS
+
+
+def root_digest(bucket_digests):
+    # Ein kurzer Hash über alle Buckets - gleich heißt "Listen identisch"
+    data = b"".join(d.to_bytes(8, "big") for d in bucket_digests)
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def diff_buckets(mine, theirs):
+    # Indizes der Buckets (bzw. Blätter) die sich unterscheiden
+    return [i for i, (a, b) in enumerate(zip(mine, theirs)) if a != b]
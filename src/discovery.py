@@ -1,20 +1,35 @@
-import socket
-import json
 import threading
 import time
+from codec import encode, decode
+from failure_detector import PhiAccrualDetector
 
 class Discovery:
     # UDP Discovery - Nodes finden sich im Netzwerk
     
-    def __init__(self, node, listen_port=None):
+    def __init__(self, node, listen_port=None, announce_interval=1.0, detector=None):
+        self.node = node
         self.node_id = node.id
         self.broadcast_port = 5000
         self.broadcast_ip = "255.255.255.255"
-        
+        self.announce_interval = announce_interval
+        self.tick_interval = announce_interval
+        
+        # Adaptiver Timeout statt fester 30 Sekunden - Schwellwerte über
+        # einen eigenen PhiAccrualDetector einstellbar
+        if detector is None:
+            detector = PhiAccrualDetector(expected_interval=announce_interval)
+        self.detector = detector
+        # Pro Peer ein Ablauf-Timer im Scheduler des Nodes - wird bei jedem
+        # Announcement neu gestellt, es läuft also nur ab wer schweigt
+        self.expiry_timers = {}
+        self.tick_timer = None
+        
+        # Sockets über den Transport des Nodes (transport.py / simulation.py)
+        self.transport = node.transport
         if listen_port:
             self.listen_port = listen_port
         else:
-            self.listen_port = self._find_free_port()
+            self.listen_port = self.transport.free_port()
         
         node.port = self.listen_port
         self.peers = {}
@@ -22,55 +37,53 @@ class Discovery:
         self.on_peer_removed = None
         self.on_peer_added = None
         
-        self.broadcast_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-        
-        self.recv_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.recv_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.recv_socket.bind(("", self.listen_port))
+        self.broadcast_socket = self.transport.datagram(broadcast=True)
+        self.recv_socket = self.transport.datagram(self.listen_port)
+        self.broadcast_recv_socket = self.transport.datagram(self.broadcast_port, shared=True)
         
-        self.broadcast_recv_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.broadcast_recv_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        
-        try:
-            self.broadcast_recv_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
-        except AttributeError:
-            pass
-        
-        self.broadcast_recv_socket.bind(("", self.broadcast_port))
+        # Node mit Multicast: Announcements über die Gruppe statt Broadcast
+        self.multicast = None
+        if node.multicast and node.multicast.joined and node.multicast.join(self.broadcast_recv_socket):
+            self.multicast = node.multicast
+            self.multicast.enable(self.broadcast_socket)
         self.running = False
         
         print(f"[DISCOVERY] Node {self.node_id[:8]} auf Port {self.listen_port}")
     
-    def _find_free_port(self, start_port=5001, max_attempts=100):
-        for port in range(start_port, start_port + max_attempts):
-            try:
-                test_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                test_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                test_socket.bind(('', port))
-                test_socket.close()
-                time.sleep(0.1)
-                return port
-            except OSError:
-                continue
-        raise Exception("Kein freier Port gefunden!")
+    def _schedule_expiry(self, peer_id, minimum=0.0):
+        timer = self.expiry_timers.pop(peer_id, None)
+        if timer:
+            timer.cancel()
+        delay = max(self.detector.expiry_delay(peer_id, self.node.scheduler.time()), minimum)
+        self.expiry_timers[peer_id] = self.node.scheduler.call_later(delay, self._expire, peer_id)
     
-    def cleanup_peers(self):
-        current_time = time.time()
-        inactive_peers = []
-        
-        for peer_id, peer_info in self.peers.items():
-            if current_time - peer_info["timestamp"] > 30:
-                inactive_peers.append(peer_id)
-        
-        for peer_id in inactive_peers:
-            print(f"[DISCOVERY] Peer {peer_id[:8]} timeout - entfernt")
-            del self.peers[peer_id]
-        
-        if inactive_peers and self.on_peer_removed:
-            self.on_peer_removed(inactive_peers)
-        
-        return len(inactive_peers) > 0
+    def drop_peer(self, peer_id):
+        # Ring hat den Peer als tot erkannt (Ring.repair) - ohne Callback
+        # entfernen. Lebt er doch, meldet ihn sein nächstes Announcement neu.
+        self.peers.pop(peer_id, None)
+        self.detector.remove(peer_id)
+        timer = self.expiry_timers.pop(peer_id, None)
+        if timer:
+            timer.cancel()
+    
+    def _expire(self, peer_id):
+        # Kosten nur für tatsächlich abgelaufene Peers, kein Scan über alle
+        self.expiry_timers.pop(peer_id, None)
+        if peer_id not in self.peers:
+            return
+        now = self.node.scheduler.time()
+        if self.detector.is_available(peer_id, now):
+            # Announcement kam knapp vor dem Timer - Mindestabstand, damit
+            # Rundungsreste den Timer nicht im Kreis laufen lassen
+            self._schedule_expiry(peer_id, minimum=0.01)
+            return
+        
+        print(f"[DISCOVERY] Peer {peer_id[:8]} timeout (phi {self.detector.phi(peer_id, now):.1f}) - entfernt")
+        del self.peers[peer_id]
+        self.detector.remove(peer_id)
+        
+        if self.on_peer_removed:
+            self.on_peer_removed([peer_id])
     
     def send_announcement(self):
         message = {
@@ -78,68 +91,96 @@ class Discovery:
             "node_id": self.node_id,
             "port": self.listen_port
         }
+        if self.multicast:
+            message["multicast"] = True
         
-        data = json.dumps(message).encode('utf-8')
-        self.broadcast_socket.sendto(data, (self.broadcast_ip, self.broadcast_port))
+        data = encode(message)
+        if self.multicast:
+            self.multicast.send(self.broadcast_socket, data, self.broadcast_port)
+        else:
+            self.broadcast_socket.sendto(data, (self.broadcast_ip, self.broadcast_port))
         
         for peer_id, peer_info in list(self.peers.items()):
+            if self.multicast and peer_info.get("multicast"):
+                # Hat das Gruppen-Datagramm schon bekommen
+                continue
             try:
                 self.broadcast_socket.sendto(data, (peer_info["ip"], peer_info["port"]))
             except:
                 pass
     
-    def listen_for_announcements(self):
+    def receivers(self):
+        # Sockets mit ihren Handlern - gelesen von start() oder vom AsyncRuntime
+        # Auf recv_socket kommen die Unicast-Kopien der Announcements an
+        # (send_announcement) - bei Multicast der einzige Weg zu Peers, die
+        # nicht Mitglied der Gruppe sind
+        return [(self.broadcast_recv_socket, self.handle_announcement),
+                (self.recv_socket, self.handle_announcement)]
+    
+    def tick(self):
+        # Periodische Arbeit, alle tick_interval Sekunden
+        self.send_announcement()
+    
+    def start_timers(self):
+        self.node.scheduler.call_later(0, self.tick)
+        self.tick_timer = self.node.scheduler.call_every(self.tick_interval, self.tick)
+    
+    def _receive(self, sock, handler):
         while self.running:
             try:
-                data, addr = self.broadcast_recv_socket.recvfrom(1024)
-                message = json.loads(data.decode('utf-8'))
-                
-                if message["node_id"] == self.node_id:
-                    continue
-                
-                peer_id = message["node_id"]
-                peer_port = message.get("port", self.broadcast_port)
-                peer_ip = addr[0]
-                
-                is_new_peer = peer_id not in self.peers
-                
-                if is_new_peer:
-                    print(f"[DISCOVERY] Neuer Peer: {peer_id[:8]} auf {peer_ip}:{peer_port}")
-                
-                self.peers[peer_id] = {
-                    "port": peer_port,
-                    "ip": peer_ip,
-                    "timestamp": time.time()
-                }
-                
-                if is_new_peer and self.on_peer_added:
-                    self.on_peer_added()
-                
+                data, addr = sock.recvfrom(65535)
+                handler(data, addr)
             except Exception as e:
                 if self.running:
                     print(f"[DISCOVERY] Fehler: {e}")
     
+    def handle_announcement(self, data, addr):
+        # Auch vom AsyncRuntime aufgerufen (runtime.py)
+        message = decode(data)
+        
+        if message["node_id"] == self.node_id:
+            return
+        
+        peer_id = message["node_id"]
+        peer_port = message.get("port", self.broadcast_port)
+        peer_ip = addr[0]
+        
+        is_new_peer = peer_id not in self.peers
+        
+        if is_new_peer:
+            print(f"[DISCOVERY] Neuer Peer: {peer_id[:8]} auf {peer_ip}:{peer_port}")
+        
+        self.peers[peer_id] = {
+            "port": peer_port,
+            "ip": peer_ip,
+            "timestamp": time.time(),
+            "multicast": bool(message.get("multicast"))
+        }
+        self.detector.heartbeat(peer_id, self.node.scheduler.time())
+        self._schedule_expiry(peer_id)
+        
+        if is_new_peer and self.on_peer_added:
+            self.on_peer_added([peer_id])
+    
     def start(self):
         self.running = True
         
-        listen_thread = threading.Thread(target=self.listen_for_announcements)
-        listen_thread.daemon = True
-        listen_thread.start()
-        
-        def announce_loop():
-            while self.running:
-                self.send_announcement()
-                self.cleanup_peers()
-                time.sleep(1)
+        for sock, handler in self.receivers():
+            listen_thread = threading.Thread(target=self._receive, args=(sock, handler))
+            listen_thread.daemon = True
+            listen_thread.start()
         
-        announce_thread = threading.Thread(target=announce_loop)
-        announce_thread.daemon = True
-        announce_thread.start()
+        self.start_timers()
         
         print(f"[DISCOVERY] Service gestartet")
     
     def stop(self):
         self.running = False
+        if self.tick_timer:
+            self.tick_timer.cancel()
+        for timer in self.expiry_timers.values():
+            timer.cancel()
+        self.expiry_timers.clear()
         try:
             self.broadcast_socket.close()
             self.recv_socket.close()
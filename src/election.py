@@ -1,24 +1,44 @@
-import socket
-import json
 import threading
-import time
+from codec import encode, decode
+from framing import FrameReader, MessageTooLarge, check_size, send_message
+from connection import ConnectionPool
+from election_strategies import STRATEGIES
 
 class Election:
-    # Chang-Roberts Election Algorithm über TCP
+    # Ring-Election über TCP - Algorithmus austauschbar (election_strategies.py),
+    # Standard ist Chang-Roberts
     
-    def __init__(self, node, ring):
+    def __init__(self, node, ring, strategy="chang-roberts"):
         self.node = node
         self.ring = ring
         self.election_socket = None
         self.election_in_progress = False
         self.running = False
+        self.strategy = STRATEGIES[strategy]()
+        
+        # Statistik pro Election: gesendete Nachrichten und Dauer, damit
+        # sich die Algorithmen vergleichen lassen
+        self.messages_sent = 0
+        self.started_at = None
+        self.history = []
+        # Bleibt eine Election hängen (Nachricht verloren), neu starten
+        self.election_timeout = 5
+        self._timeout_timer = None
+        # CRDT-List-Check: weitere Runden, solange Replikate abweichen
+        self.crdt_check_rounds = 3
+        self._crdt_round = 0
+        
+        # Election-Zustand (auch der Strategie) ändert immer nur ein Thread:
+        # Leser der Nachbar-Verbindungen, Timer und Failover nehmen den Lock
+        self.lock = threading.RLock()
+        
+        # Persistente Verbindungen zu den Nachbarn, gepflegt von Ring.update_ring
+        self.connections = ConnectionPool(node.transport)
+        self.connections.update(ring.left_neighbor, ring.right_neighbor)
         
         self.ring.set_election(self)
         
-        self.election_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.election_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.election_socket.bind(("", self.node.port + 1000))
-        self.election_socket.listen(5)
+        self.election_socket = self.node.transport.listener(self.node.port + 1000)
         
         print(f"[ELECTION] TCP auf Port {self.node.port + 1000}")
     
@@ -28,6 +48,7 @@ class Election:
     
     def stop(self):
         self.running = False
+        self.connections.close_all()
         if self.election_socket:
             try:
                 self.election_socket.close()
@@ -35,180 +56,343 @@ class Election:
                 pass
     
     def start_election(self):
+        with self.lock:
+            if self.election_in_progress:
+                return
+            
+            self.participate()
+            self.node.is_leader = False
+            self.node.current_leader_id = None
+            
+            print(f"[ELECTION] Node {self.node.id[:8]} startet Election ({self.strategy.name})")
+            self.strategy.start(self)
+    
+    def participate(self):
+        """Ab jetzt Teil einer Election - schwächere Kandidaten werden verschluckt"""
         if self.election_in_progress:
             return
         
         self.election_in_progress = True
-        self.node.is_leader = False
-        self.node.current_leader_id = None
-        
-        print(f"[ELECTION] Node {self.node.id[:8]} startet Election")
-        self._send_election(self.node.id)
+        self.messages_sent = 0
+        self.started_at = self.node.scheduler.time()
+        self._timeout_timer = self.node.scheduler.call_later(self.election_timeout, self._check_timeout)
     
-    def _send_election(self, candidate_id):
-        neighbor = self.ring.get_right_neighbor()
+    def _check_timeout(self):
+        with self.lock:
+            self._timeout_timer = None
+            if self.election_in_progress and not self.node.current_leader_id:
+                print(f"[ELECTION] Keine Entscheidung nach {self.election_timeout}s - neuer Versuch")
+                self.election_in_progress = False
+                self.start_election()
+    
+    def send(self, direction, msg):
+        """Election-Nachricht an den rechten oder linken Nachbarn"""
+        if direction == "right":
+            neighbor = self.ring.get_right_neighbor()
+        else:
+            neighbor = self.ring.left_neighbor
+        
         if not neighbor:
             self.node.is_leader = True
             self.node.current_leader_id = self.node.id
-            self.election_in_progress = False
+            self._finish()
             print(f"[ELECTION] Node {self.node.id[:8]} ist alleine - wird Leader")
-            return
-        
-        msg = json.dumps({"type": "election", "candidate_id": candidate_id})
+            return False
         
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            target_ip = neighbor.get("ip", "127.0.0.1")
-            sock.connect((target_ip, neighbor["port"] + 1000))
-            sock.sendall(msg.encode())
-            sock.close()
-        except Exception as e:
-            print(f"[ELECTION] Fehler: {e}")
+        self.messages_sent += 1
+        if not self._send_to_neighbor(neighbor, msg, direction=direction):
             self.election_in_progress = False
+            return False
+        return True
     
-    def _send_leader(self, leader_id):
+    def declare_leader(self):
+        """Eigene Kandidatur hat den Ring umrundet"""
+        if self.node.failover:
+            self.node.failover.elected()
+        self.node.is_leader = True
+        self.node.current_leader_id = self.node.id
+        self.election_in_progress = False
+        print(f"[ELECTION] Node {self.node.id[:8]} ist LEADER")
+        
+        # Starte List-Check
+        self._schedule_list_check()
+        self._send_leader(self.node.id, self.messages_sent + 1)
+    
+    def _finish(self, total=None):
+        """Election beendet - Statistik festhalten"""
+        self.election_in_progress = False
+        if self._timeout_timer:
+            self._timeout_timer.cancel()
+            self._timeout_timer = None
+        if self.started_at is None:
+            return
+        
+        stats = {
+            "strategy": self.strategy.name,
+            "messages": self.messages_sent,
+            "duration": self.node.scheduler.time() - self.started_at,
+            "leader": self.node.current_leader_id
+        }
+        if total is not None:
+            stats["total_messages"] = total
+            print(f"[ELECTION] Abgeschlossen ({self.strategy.name}): {total} Nachrichten im Ring, "
+                  f"{stats['duration'] * 1000:.0f} ms")
+        self.history.append(stats)
+        self.started_at = None
+    
+    def _send_leader(self, leader_id, messages=0):
         neighbor = self.ring.get_right_neighbor()
         if not neighbor:
             return
         
-        msg = json.dumps({"type": "leader", "leader_id": leader_id})
+        # "messages" sammelt auf dem Weg die Election-Nachrichten aller Nodes
+        msg = {"type": "leader", "leader_id": leader_id, "messages": messages}
+        if self.node.failover:
+            # Höchste Epoche im Ring mitnehmen (failover.py)
+            msg["epoch"] = self.node.failover.epoch
+            msg["min_version"] = self.node.failover.base_version
+        self._send_to_neighbor(neighbor, msg)
+    
+    def _send_to_neighbor(self, neighbor, msg, tag="ELECTION", direction="right"):
+        # Eine Nachricht gerahmt (framing.py) an einen Ring-Nachbarn. Ist er
+        # nicht erreichbar, flickt Ring.repair den Ring um ihn herum und die
+        # Nachricht geht direkt an den nächsten Node in derselben Richtung
+        data = encode(msg)
+        try:
+            check_size(data)
+        except MessageTooLarge as e:
+            # Liegt an der Nachricht, nicht am Nachbarn - kein Ring.repair
+            print(f"[{tag}] Nicht gesendet: {e}")
+            return False
+        while neighbor:
+            if self.node.runtime:
+                # Im Event-Loop nicht blockieren - Fehler meldet der Runtime
+                def failed(neighbor=neighbor):
+                    self._send_to_neighbor(self.ring.repair(neighbor["id"], direction), msg, tag, direction)
+                
+                target_ip = neighbor.get("ip", "127.0.0.1")
+                self.node.runtime.send_stream((target_ip, neighbor["port"] + 1000), data, on_error=failed)
+                return True
+            
+            if self._deliver(neighbor, data, tag):
+                return True
+            neighbor = self.ring.repair(neighbor["id"], direction)
+        return False
+    
+    def _deliver(self, neighbor, data, tag):
+        connection = self.connections.get(neighbor)
+        if connection:
+            try:
+                connection.send(data)
+                return True
+            except Exception as e:
+                print(f"[{tag}] Fehler: {e}")
+                return False
         
+        # Kein Nachbar aus dem Pool (z.B. Ring noch nicht aktualisiert)
         try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            target_ip = neighbor.get("ip", "127.0.0.1")
-            sock.connect((target_ip, neighbor["port"] + 1000))
-            sock.sendall(msg.encode())
+            sock = self.node.transport.connect((neighbor.get("ip", "127.0.0.1"), neighbor["port"] + 1000), 2)
+            send_message(sock, data)
             sock.close()
+            return True
         except Exception as e:
-            print(f"[ELECTION] Fehler: {e}")
+            print(f"[{tag}] Fehler: {e}")
+            return False
+    
+    def notify_repair(self, neighbor, failed_id, direction="right"):
+        """Neuem Nachbarn in `direction` melden, dass der Node zwischen uns ausgefallen ist"""
+        msg = {"type": "ring_repair", "failed": failed_id, "originator": self.node.id}
+        self._send_to_neighbor(neighbor, msg, "RING", direction)
+    
+    def _schedule_list_check(self, delay=2, crdt_round=0):
+        self.node.scheduler.call_later(delay, self.node.apply, self._start_list_check, crdt_round)
     
-    def _start_list_check(self):
+    def _start_list_check(self, crdt_round=0):
         """Startet List-Check im Ring - längste Liste gewinnt"""
-        time.sleep(2)
-        
-        my_items = self.node.shopping_list.get_items()
+        if self.node.crdt:
+            # CRDT: kein "längste Liste gewinnt" - nur der Digest geht durch
+            # den Ring. Wer abweicht, tauscht seinen Zustand direkt mit dem
+            # Originator (Node._send_crdt_digest), identische Replikate
+            # schicken nichts
+            self._crdt_round = crdt_round
+            msg = {
+                "type": "list_check",
+                "digest": self.node.shopping_list.digest(),
+                "dirty": False,
+                "originator": self.node.id
+            }
+            print(f"[LIST-CHECK] Leader startet CRDT-Abgleich im Ring (Runde {crdt_round + 1})")
+            self._send_list_check(msg)
+            return
         
+        # Nur Digest + Anzahl statt der ganzen Liste - "holder" ist der Node
+        # mit der bisher längsten Liste, "dirty" ob irgendein Hop abweicht
         msg = {
             "type": "list_check",
-            "items": my_items,
-            "count": len(my_items),
+            "digest": self.node.shopping_list.digest(),
+            "count": len(self.node.shopping_list),
+            "holder": self.node.id,
+            "dirty": False,
+            "min_version": self.node.shopping_list.version,
+            "max_version": self.node.shopping_list.version,
             "originator": self.node.id
         }
         
-        print(f"[LIST-CHECK] Leader startet List-Check (eigene Liste: {len(my_items)} Items)")
+        print(f"[LIST-CHECK] Leader startet List-Check (eigene Liste: {msg['count']} Items)")
         self._send_list_check(msg)
     
     def _send_list_check(self, msg):
         """Sendet List-Check Message an rechten Nachbarn"""
         neighbor = self.ring.get_right_neighbor()
         if not neighbor:
-            # Kein Nachbar - übernehme eigene Liste und sende Update
-            self._broadcast_list_update(msg["items"])
+            # Kein Nachbar - niemand zum Abgleichen
             return
         
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            sock.settimeout(2)
-            target_ip = neighbor.get("ip", "127.0.0.1")
-            sock.connect((target_ip, neighbor["port"] + 1000))
-            sock.sendall(json.dumps(msg).encode())
-            sock.close()
-        except Exception as e:
-            print(f"[LIST-CHECK] Fehler: {e}")
+        self._send_to_neighbor(neighbor, msg, "LIST-CHECK")
     
-    def _broadcast_list_update(self, items):
-        """Sendet finale Liste an alle Nodes (Phase 2)"""
-        time.sleep(1)
-        print(f"[LIST-CHECK] Längste Liste gefunden: {len(items)} Items")
+    def _finish_list_check(self, msg):
+        """Check ist zurück beim Originator - nur bei Abweichung abgleichen"""
+        # Versionen im Ring angleichen, damit Follower die nächsten
+        # Update-Nummern des (neuen) Leaders akzeptieren
+        if msg["max_version"] > self.node.shopping_list.version:
+            self.node.shopping_list.adopt_version(msg["max_version"])
+            self.node.sequence_number = msg["max_version"]
         
-        # Eigene Liste übernehmen
-        self.node.shopping_list.items = items.copy()
+        if not msg["dirty"]:
+            print(f"[LIST-CHECK] Alle Listen identisch ({msg['count']} Items)")
+            if msg["min_version"] != msg["max_version"]:
+                self.node.offer_digests()
+            return
         
-        # An alle senden
-        if hasattr(self.node, 'coord_socket') and self.node.coord_socket:
-            for item in items:
-                try:
-                    self.node._broadcast_update("sync", item)
-                except Exception as e:
-                    print(f"[LIST-CHECK] Sync-Fehler: {e}")
+        print(f"[LIST-CHECK] Check abgeschlossen - längste Liste: {msg['count']} Items")
+        if msg["holder"] == self.node.id:
+            self.node.offer_digests()
+        else:
+            # Erst die abweichenden Buckets vom Holder holen, danach verteilt
+            # der Leader seine Digests (Node._handle_recon)
+            self.node.reconcile_with(msg["holder"])
+    
+    def _handle_crdt_list_check(self, msg):
+        if msg["originator"] == self.node.id:
+            if not msg["dirty"]:
+                print(f"[LIST-CHECK] Alle CRDT-Replikate identisch ({len(self.node.shopping_list)} Items)")
+            elif self._crdt_round + 1 < self.crdt_check_rounds:
+                # Früh abgeglichene Hops kennen die Zustände der späteren noch
+                # nicht - nach den Austauschen noch eine Runde
+                print(f"[LIST-CHECK] CRDT-Replikate weichen ab - weitere Runde")
+                self._schedule_list_check(0.5, self._crdt_round + 1)
+            return
+        
+        if msg["digest"] != self.node.shopping_list.digest():
+            msg["dirty"] = True
+            originator = self.ring.discovery.get_peers().get(msg["originator"])
+            if originator:
+                self.node._send_crdt_digest(
+                    (originator.get("ip", "127.0.0.1"), originator["port"] + 2000), request=True)
+        self._send_list_check(msg)
     
     def _listen(self):
         while self.running:
             try:
                 conn, _ = self.election_socket.accept()
-                data = conn.recv(1024)
-                msg = json.loads(data.decode())
-                conn.close()
-                
-                if msg["type"] == "election":
-                    candidate_id = msg["candidate_id"]
+                # Verbindungen bleiben offen - eigener Leser pro Verbindung
+                threading.Thread(target=self._read_connection, args=(conn,), daemon=True).start()
+            except Exception as e:
+                if self.running:
+                    pass
+    
+    def _read_connection(self, conn):
+        # Liest gerahmte Nachrichten bis die Gegenseite schließt
+        reader = FrameReader(conn)
+        try:
+            while self.running:
+                try:
+                    data = reader.read_message()
+                except MessageTooLarge as e:
+                    # Nachricht verworfen, die Verbindung ist weiter synchron
+                    print(f"[ELECTION] Empfangsfehler: {e}")
+                    continue
+                if data is None:
+                    break
+                # Linker und rechter Nachbar haben je einen Leser - die
+                # Nachrichten werden trotzdem nacheinander verarbeitet
+                with self.lock:
+                    self._handle_message(decode(data))
+        except Exception as e:
+            if self.running:
+                print(f"[ELECTION] Empfangsfehler: {e}")
+        finally:
+            conn.close()
+    
+    def _handle_message(self, msg):
+        if msg["type"] in self.strategy.message_types:
+            self.strategy.handle(self, msg)
+        
+        elif msg["type"] == "leader":
+            leader_id = msg["leader_id"]
+            self.node.current_leader_id = leader_id
+            if self.node.failover and msg.get("epoch", 0) > self.node.failover.epoch:
+                if leader_id == self.node.id:
+                    # Jemand kannte eine höhere Epoche - darüber springen
+                    self.node.failover.elected(msg["epoch"])
+                else:
+                    self.node.failover.observe_epoch(msg["epoch"], msg.get("min_version"))
+            
+            if leader_id == self.node.id:
+                if not self.node.is_leader:
+                    self.node.is_leader = True
+                    print(f"[ELECTION] Node {self.node.id[:8]} ist LEADER")
                     
-                    if candidate_id > self.node.id:
-                        self._send_election(candidate_id)
-                    elif candidate_id < self.node.id:
-                        if not self.election_in_progress:
-                            self.start_election()
-                    else:
-                        self.node.is_leader = True
-                        self.node.current_leader_id = self.node.id
-                        self.election_in_progress = False
-                        print(f"[ELECTION] Node {self.node.id[:8]} ist LEADER")
-                        
-                        # Starte List-Check
-                        threading.Thread(target=self._start_list_check, daemon=True).start()
-                        self._send_leader(self.node.id)
+                    # Starte List-Check
+                    self._schedule_list_check()
+                # Leader-Nachricht ist einmal herum - Gesamtzahl steht fest
+                self._finish(msg.get("messages"))
+            else:
+                self.node.is_leader = False
+                messages = msg.get("messages", 0) + self.messages_sent + 1
+                self._finish()
+                print(f"[ELECTION] Node {leader_id[:8]} ist Leader")
                 
-                elif msg["type"] == "leader":
-                    leader_id = msg["leader_id"]
-                    self.node.current_leader_id = leader_id
-                    
-                    if leader_id == self.node.id:
-                        if not self.node.is_leader:
-                            self.node.is_leader = True
-                            print(f"[ELECTION] Node {self.node.id[:8]} ist LEADER")
-                            
-                            # Starte List-Check
-                            threading.Thread(target=self._start_list_check, daemon=True).start()
-                    else:
-                        self.node.is_leader = False
-                        self.election_in_progress = False
-                        print(f"[ELECTION] Node {leader_id[:8]} ist Leader")
-                        
-                        if leader_id != self.node.id:
-                            self._send_leader(leader_id)
+                if self.node.coord_running:
+                    self.node.request_sync()
                 
-                elif msg["type"] == "list_check":
-                    originator = msg["originator"]
-                    
-                    # Kommt zu mir (Originator) zurück?
-                    if originator == self.node.id:
-                        # List-Check abgeschlossen - längste Liste gefunden
-                        winning_items = msg["items"]
-                        print(f"[LIST-CHECK] Check abgeschlossen - längste Liste: {len(winning_items)} Items")
-                        self._broadcast_list_update(winning_items)
-                    else:
-                        # Vergleichen
-                        my_items = self.node.shopping_list.get_items()
-                        my_count = len(my_items)
-                        incoming_count = msg["count"]
-                        
-                        if incoming_count >= my_count:
-                            # Eingehende Liste ist länger/gleich - weiterleiten
-                            print(f"[LIST-CHECK] Eingehende Liste länger ({incoming_count} >= {my_count}) - weiterleiten")
-                            self._send_list_check(msg)
-                        else:
-                            # Meine Liste ist länger - ersetzen und weiterleiten
-                            print(f"[LIST-CHECK] Meine Liste länger ({my_count} > {incoming_count}) - eigene senden")
-                            new_msg = {
-                                "type": "list_check",
-                                "items": my_items,
-                                "count": my_count,
-                                "originator": originator
-                            }
-                            self._send_list_check(new_msg)
-            
-            except Exception as e:
-                if self.running:
-                    pass
\ No newline at end of file
+                if leader_id != self.node.id:
+                    self._send_leader(leader_id, messages)
+        
+        elif msg["type"] == "ring_repair":
+            # Nachbar auf der anderen Seite des ausgefallenen Nodes hat uns
+            # als neuen Nachbarn eingesetzt
+            failed_id = msg["failed"]
+            if failed_id in self.ring.members and failed_id != self.node.id:
+                print(f"[RING] {msg['originator'][:8]} meldet Ausfall von {failed_id[:8]}")
+                self.ring.discovery.drop_peer(failed_id)
+                self.ring.handle_peer_removal([failed_id])
+        
+        elif msg["type"] == "list_check":
+            # Liest/ändert die Liste - im Apply-Loop des Nodes
+            self.node.apply(self._handle_list_check, msg)
+    
+    def _handle_list_check(self, msg):
+        if self.node.crdt:
+            self._handle_crdt_list_check(msg)
+        
+        else:
+            if msg["originator"] == self.node.id:
+                self._finish_list_check(msg)
+            else:
+                my_digest = self.node.shopping_list.digest()
+                my_count = len(self.node.shopping_list)
+                my_version = self.node.shopping_list.version
+                msg["min_version"] = min(msg["min_version"], my_version)
+                msg["max_version"] = max(msg["max_version"], my_version)
+                
+                if my_digest != msg["digest"]:
+                    msg["dirty"] = True
+                    if my_count > msg["count"]:
+                        # Meine Liste ist länger - ich werde Holder
+                        print(f"[LIST-CHECK] Meine Liste länger ({my_count} > {msg['count']}) - Holder")
+                        msg["digest"] = my_digest
+                        msg["count"] = my_count
+                        msg["holder"] = self.node.id
+                
+                self._send_list_check(msg)
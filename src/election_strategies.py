@@ -0,0 +1,99 @@
+class ChangRoberts:
+    """Kandidat läuft nach rechts, größte ID gewinnt - O(N²) im Worst Case"""
+
+    name = "chang-roberts"
+    message_types = ("election",)
+
+    def start(self, election):
+        election.send("right", {"type": "election", "candidate_id": election.node.id})
+
+    def handle(self, election, msg):
+        candidate_id = msg["candidate_id"]
+
+        if candidate_id > election.node.id:
+            election.participate()
+            election.send("right", {"type": "election", "candidate_id": candidate_id})
+        elif candidate_id < election.node.id:
+            # Schwächerer Kandidat: nur übernehmen wenn wir noch nicht
+            # teilnehmen - sonst verschlucken (unterdrückt Parallel-Elections)
+            if not election.election_in_progress:
+                election.start_election()
+        else:
+            election.declare_leader()
+
+
+class HirschbergSinclair:
+    """Kandidat prüft in Phase k beide Richtungen 2^k Hops weit - O(N log N)"""
+
+    # Nur wer in beiden Richtungen die größte ID hat bekommt beide
+    # Antworten und geht in Phase k+1. Läuft eine Probe einmal ganz
+    # herum zum Kandidaten zurück, hat er gewonnen.
+
+    name = "hirschberg-sinclair"
+    message_types = ("hs_probe", "hs_reply")
+
+    def __init__(self):
+        self.phase = 0
+        self.replies = 0
+
+    def start(self, election):
+        self.phase = 0
+        self.replies = 0
+        self._probe(election)
+
+    def _probe(self, election):
+        for direction in ("right", "left"):
+            election.send(direction, {
+                "type": "hs_probe",
+                "candidate_id": election.node.id,
+                "phase": self.phase,
+                "hop": 1,
+                "direction": direction
+            })
+
+    def handle(self, election, msg):
+        candidate_id = msg["candidate_id"]
+        direction = msg["direction"]
+
+        if msg["type"] == "hs_reply":
+            if candidate_id != election.node.id:
+                election.send(direction, msg)
+                return
+
+            if msg["phase"] != self.phase or not election.election_in_progress:
+                return
+            self.replies += 1
+            if self.replies == 2:
+                self.phase += 1
+                self.replies = 0
+                self._probe(election)
+            return
+
+        if candidate_id == election.node.id:
+            # Einmal rund um den Ring - aus beiden Richtungen möglich
+            if election.election_in_progress:
+                election.declare_leader()
+            return
+
+        if candidate_id < election.node.id:
+            if not election.election_in_progress:
+                election.start_election()
+            return
+
+        election.participate()
+        if msg["hop"] < 2 ** msg["phase"]:
+            election.send(direction, dict(msg, hop=msg["hop"] + 1))
+        else:
+            back = "left" if direction == "right" else "right"
+            election.send(back, {
+                "type": "hs_reply",
+                "candidate_id": candidate_id,
+                "phase": msg["phase"],
+                "direction": back
+            })
+
+
+STRATEGIES = {
+    ChangRoberts.name: ChangRoberts,
+    HirschbergSinclair.name: HirschbergSinclair,
+}
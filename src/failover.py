@@ -0,0 +1,215 @@
+from codec import encode
+
+
+class SuccessorFailover:
+    # Vorbestimmter Nachfolger statt Ring-Election beim Leader-Ausfall
+    #
+    # Der Leader wählt den Node mit der nächstgrößeren ID als Nachfolger und
+    # schickt allen alle heartbeat_interval Sekunden eine "lease"-Nachricht
+    # (Epoche, Nachfolger, Version). Der Nachfolger bestätigt mit
+    # "lease_ack" - nur solange diese Bestätigung frisch ist, nimmt der
+    # Leader Schreibzugriffe an. Bleiben die Heartbeats länger als
+    # lease_duration aus, übernimmt der Nachfolger sofort mit Epoche + 1.
+    #
+    # Sicherheit: die Lease des Leaders zählt ab dem Senden des Heartbeats
+    # (und nur safety * lease_duration), die des Nachfolgers ab dem
+    # Empfang - der alte Leader hört also auf zu schreiben, bevor der
+    # Nachfolger übernimmt. Updates tragen die Epoche, Follower verwerfen
+    # Updates eines abgesetzten Leaders.
+    #
+    # Writes, die der alte Leader noch angenommen, aber nicht mehr verteilt
+    # hat, kennt der Nachfolger nicht - mit derselben Versionsnummer schreibt
+    # er etwas anderes. Jede Epoche trägt daher ihre Startversion
+    # ("min_version"): wer aus einer älteren Epoche schon weiter ist, verwirft
+    # seinen Stand und holt ihn komplett neu (Node.resync).
+
+    def __init__(self, node, lease_duration=1.0, heartbeat_interval=0.25, safety=0.8,
+                 pending_limit=1024):
+        self.node = node
+        self.lease_duration = lease_duration
+        self.heartbeat_interval = heartbeat_interval
+        self.safety = safety
+        self.pending_limit = pending_limit
+
+        self.epoch = 0
+        # Version, mit der die aktuelle Epoche begonnen hat
+        self.base_version = 0
+        self.successor_id = None
+        # Follower: bis wann die Lease des Leaders gilt
+        self.lease_expires = None
+        # Leader: bis wann Schreiben erlaubt ist, Sendezeiten der Heartbeats
+        self.lease_until = 0
+        self.heartbeats = {}
+        self.heartbeat_seq = 0
+        # Leader: Writes, die auf die erste Bestätigung warten
+        self.pending = []
+        self.timer = None
+
+    def start(self):
+        self.timer = self.node.scheduler.call_every(self.heartbeat_interval, self.tick)
+
+    def stop(self):
+        if self.timer:
+            self.timer.cancel()
+
+    # --- Leader ---
+
+    def _choose_successor(self):
+        members = self.node.election.ring.members if self.node.election else []
+        candidates = [peer_id for peer_id in members if peer_id != self.node.id]
+        if not candidates:
+            return None
+        lower = [peer_id for peer_id in candidates if peer_id < self.node.id]
+        # Nächstgrößere ID unter dem Leader - gewänne auch die nächste Election
+        return max(lower) if lower else max(candidates)
+
+    def tick(self):
+        now = self.node.scheduler.time()
+        if self.node.is_leader:
+            self._send_heartbeat(now)
+        elif self._is_successor() and self.lease_expires is not None and now >= self.lease_expires:
+            print(f"[FAILOVER] Lease von {self.node.current_leader_id[:8]} abgelaufen - übernehme")
+            self.promote()
+
+    def _send_heartbeat(self, now):
+        successor_id = self._choose_successor()
+        if successor_id != self.successor_id:
+            self.successor_id = successor_id
+            if successor_id:
+                print(f"[FAILOVER] Nachfolger: {successor_id[:8]} (Epoche {self.epoch})")
+
+        self.heartbeat_seq += 1
+        self.heartbeats[self.heartbeat_seq] = now
+        for seq in [seq for seq, sent in self.heartbeats.items() if sent < now - self.lease_duration]:
+            del self.heartbeats[seq]
+
+        msg = encode({
+            "type": "lease",
+            "leader_id": self.node.id,
+            "candidate_id": successor_id,
+            "epoch": self.epoch,
+            "min_version": self.base_version,
+            "seq": self.heartbeat_seq,
+            "version": self.node.shopping_list.version
+        })
+        for peer_id, peer_info in self.node.election.ring.discovery.get_peers().items():
+            try:
+                self.node.coord_socket.sendto(msg, (peer_info.get("ip", "127.0.0.1"), peer_info["port"] + 2000))
+            except OSError:
+                pass
+
+    def can_write(self):
+        if not self.node.is_leader:
+            return False
+        if self.successor_id is None:
+            # Alleine - niemand, der übernehmen könnte
+            return True
+        return self.node.scheduler.time() < self.lease_until
+
+    def defer(self, write):
+        # Write bis zur nächsten Bestätigung zurückhalten statt verwerfen
+        if len(self.pending) < self.pending_limit:
+            self.pending.append(write)
+
+    def handle_lease_ack(self, msg):
+        if msg["epoch"] != self.epoch or msg["node_id"] != self.successor_id:
+            return
+        sent = self.heartbeats.get(msg["seq"])
+        if sent is None:
+            return
+        self.lease_until = max(self.lease_until, sent + self.lease_duration * self.safety)
+
+        pending, self.pending = self.pending, []
+        for write in pending:
+            write()
+
+    # --- Follower ---
+
+    def _is_successor(self):
+        return self.successor_id == self.node.id
+
+    def accepts(self, msg):
+        # Updates eines abgesetzten Leaders (ältere Epoche) verwerfen
+        return msg.get("epoch", self.epoch) >= self.epoch
+
+    def handle_lease(self, msg, addr):
+        if msg["epoch"] < self.epoch and msg["leader_id"] != self.node.current_leader_id:
+            return
+
+        if msg["leader_id"] != self.node.id and (self.node.is_leader or msg["epoch"] > self.epoch):
+            if self.node.is_leader:
+                print(f"[FAILOVER] Neuer Leader {msg['leader_id'][:8]} (Epoche {msg['epoch']}) - trete ab")
+            self.node.is_leader = False
+
+        self.observe_epoch(msg["epoch"], msg.get("min_version"))
+        self.epoch = msg["epoch"]
+        self.node.current_leader_id = msg["leader_id"]
+        self.successor_id = msg["candidate_id"]
+        self.lease_expires = self.node.scheduler.time() + self.lease_duration
+        self.node.reads.observe(msg["version"])
+
+        if self._is_successor():
+            ack = encode({"type": "lease_ack", "node_id": self.node.id,
+                          "epoch": self.epoch, "seq": msg["seq"]})
+            try:
+                self.node.coord_socket.sendto(ack, addr)
+            except OSError:
+                pass
+
+    def elected(self, epoch=None):
+        # Leader per Ring-Election (oder Übernahme) - neue Epoche, Lease neu holen
+        self.epoch = max(self.epoch, epoch or 0) + 1
+        self.base_version = self.node.shopping_list.version
+        self.successor_id = None
+        self.lease_expires = None
+        self.lease_until = 0
+
+    def observe_epoch(self, epoch, base_version=None):
+        # Leader-Nachricht, Lease oder Update aus einer neueren Epoche
+        if epoch is None or epoch <= self.epoch:
+            return
+        self.epoch = epoch
+        if base_version is not None:
+            self.base_version = base_version
+            # Im Apply-Loop prüfen - die Election ruft aus ihrem eigenen Thread
+            self.node.apply(self._check_base, epoch, base_version)
+
+    def _check_base(self, epoch, base_version):
+        version = self.node.shopping_list.version
+        if epoch != self.epoch or self.node.is_leader or version <= base_version:
+            return
+        # Versionen über base_version stammen aus der alten Epoche und
+        # fehlen dem neuen Leader - sie sind nicht Teil der Historie
+        print(f"[FAILOVER] v{version} enthält Writes aus alter Epoche (Epoche {epoch} ab v{base_version}) "
+              f"- hole kompletten Stand")
+        self.node.resync()
+
+    def promote(self):
+        # Sofort Leader mit neuer Epoche - kein Ring-Durchlauf nötig
+        self.elected()
+        self.node.is_leader = True
+        self.node.current_leader_id = self.node.id
+        self.node.sequence_number = self.node.shopping_list.version
+        print(f"[FAILOVER] Node {self.node.id[:8]} ist LEADER (Epoche {self.epoch})")
+
+        self._send_heartbeat(self.node.scheduler.time())
+        election = self.node.election
+        if election:
+            with election.lock:
+                election.election_in_progress = False
+                election._schedule_list_check()
+                election._send_leader(self.node.id)
+
+    def take_over(self, removed_peers):
+        # Von Ring.handle_peer_removal: True wenn keine Election nötig ist
+        if self.node.current_leader_id not in removed_peers:
+            return False
+        if self._is_successor():
+            # Discovery bestätigt den Ausfall - nicht erst auf die Lease warten
+            # wenn sie ohnehin schon abgelaufen ist
+            if self.lease_expires is None or self.node.scheduler.time() >= self.lease_expires:
+                self.promote()
+            return True
+        # Ein anderer übernimmt per Lease, solange er selbst noch lebt
+        return self.successor_id is not None and self.successor_id not in removed_peers \
+            and self.successor_id in self.node.election.ring.members
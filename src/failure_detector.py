@@ -0,0 +1,93 @@
+import math
+import time
+from collections import deque
+from statistics import NormalDist
+
+
+class PhiAccrualDetector:
+    # Adaptiver Ausfall-Detektor (phi accrual, Hayashibara et al.)
+    #
+    # Statt eines festen Timeouts wird pro Peer die Verteilung der
+    # Abstände zwischen Announcements gemessen. phi ist -log10 der
+    # Wahrscheinlichkeit, dass das nächste Announcement noch kommt:
+    # phi = 1 heißt ~10% Irrtum, phi = 8 heißt ~1e-8. Bei stabilem Netz
+    # schlägt der Detektor nach wenigen Intervallen an, bei Jitter wächst
+    # die Streuung und er wartet automatisch länger.
+    #
+    # threshold           - ab diesem phi gilt der Peer als ausgefallen
+    # window              - Anzahl gemerkter Abstände pro Peer
+    # min_std             - Untergrenze der Streuung (Sekunden), sonst
+    #                       führt schon kleiner Jitter zu Fehlalarmen
+    # acceptable_pause    - wird auf den Mittelwert addiert, z.B. damit ein
+    #                       einzelnes verlorenes Announcement toleriert wird
+    # expected_interval   - Startwert, solange noch keine Abstände bekannt sind
+
+    def __init__(self, threshold=8.0, window=100, min_std=0.2,
+                 acceptable_pause=1.0, expected_interval=1.0):
+        self.threshold = threshold
+        self.window = window
+        self.min_std = min_std
+        self.acceptable_pause = acceptable_pause
+        self.expected_interval = expected_interval
+        self.history = {}
+
+    def heartbeat(self, peer_id, now=None):
+        now = time.monotonic() if now is None else now
+        entry = self.history.get(peer_id)
+        if entry is None:
+            # Erster Kontakt: mit dem erwarteten Intervall vorbelegen
+            intervals = deque([self.expected_interval], maxlen=self.window)
+            self.history[peer_id] = [now, intervals]
+            return
+
+        interval = now - entry[0]
+        if interval < self.expected_interval / 4:
+            # Doppelt empfangenes Announcement (Broadcast + Unicast) -
+            # würde den Mittelwert verfälschen
+            return
+        entry[0] = now
+        entry[1].append(interval)
+
+    def _stats(self, intervals):
+        mean = sum(intervals) / len(intervals)
+        variance = sum((x - mean) ** 2 for x in intervals) / len(intervals)
+        return mean, max(math.sqrt(variance), self.min_std)
+
+    def phi(self, peer_id, now=None):
+        entry = self.history.get(peer_id)
+        if entry is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        last, intervals = entry
+        mean, std = self._stats(intervals)
+
+        # P(nächstes Announcement kommt noch später) unter Normalverteilung
+        elapsed = now - last
+        p_later = 0.5 * math.erfc((elapsed - mean - self.acceptable_pause) / (std * math.sqrt(2)))
+        if p_later <= 0:
+            return float("inf")
+        return -math.log10(p_later)
+
+    def expiry_delay(self, peer_id, now=None):
+        # Sekunden bis phi die Schwelle erreicht (ohne weiteres Announcement)
+        # - damit kann die Discovery einen Timer stellen statt zu pollen
+        entry = self.history.get(peer_id)
+        if entry is None:
+            return 0.0
+        now = time.monotonic() if now is None else now
+        last, intervals = entry
+        mean, std = self._stats(intervals)
+
+        z = -NormalDist().inv_cdf(10 ** -self.threshold)
+        return max(last + mean + self.acceptable_pause + std * z - now, 0.0)
+
+    def is_available(self, peer_id, now=None):
+        # Dieselbe Grenze wie expiry_delay - phi() über erfc kann am
+        # Zeitpunkt selbst knapp darunter liegen, dann würde ein Timer bei
+        # Verzögerung 0 endlos neu gestellt
+        if peer_id not in self.history:
+            return True
+        return self.expiry_delay(peer_id, now) > 0
+
+    def remove(self, peer_id):
+        self.history.pop(peer_id, None)
@@ -0,0 +1,164 @@
+import asyncio
+import struct
+
+# Längenpräfix-Framing für die TCP-Verbindungen im Ring
+#
+# Eine Nachricht wird in Chunks von höchstens CHUNK_SIZE Bytes zerlegt,
+# jeder Chunk bekommt einen Header: LÄNGE (4 Byte) | FLAGS (1 Byte).
+# FLAG_MORE heißt "es folgen weitere Chunks derselben Nachricht".
+#
+# Nachrichten über MAX_MESSAGE lehnt schon der Sender ab (MessageTooLarge,
+# bevor ein Byte rausgeht). Schickt eine Gegenseite trotzdem eine, liest
+# der Empfänger ihre Chunks einzeln und verwirft sie, statt sie zu puffern,
+# und meldet MessageTooLarge - die Verbindung bleibt danach benutzbar. Der
+# Speicher bleibt so begrenzt, egal was die Gegenseite schickt.
+
+FRAME_HEADER = struct.Struct("!IB")
+FLAG_MORE = 0x01
+
+CHUNK_SIZE = 64 * 1024
+MAX_MESSAGE = 16 * 1024 * 1024
+
+
+class FramingError(Exception):
+    pass
+
+
+class MessageTooLarge(FramingError):
+    # Nachricht über MAX_MESSAGE - der Stream selbst ist in Ordnung
+    pass
+
+
+def check_size(data, max_message=MAX_MESSAGE):
+    if len(data) > max_message:
+        raise MessageTooLarge(f"Nachricht mit {len(data)} Bytes, erlaubt sind {max_message}")
+
+
+def send_message(sock, data):
+    # Schickt `data` als Folge von Chunks - ohne Kopie der Gesamtnachricht
+    check_size(data)
+    view = memoryview(data)
+    total = len(view)
+    offset = 0
+
+    while True:
+        chunk = view[offset:offset + CHUNK_SIZE]
+        offset += len(chunk)
+        flags = FLAG_MORE if offset < total else 0
+        sock.sendall(FRAME_HEADER.pack(len(chunk), flags))
+        if len(chunk):
+            sock.sendall(chunk)
+        if not flags:
+            return
+
+
+def _check_chunk(length):
+    # Ein einzelner Chunk über CHUNK_SIZE hält sich nicht ans Protokoll -
+    # ihn einzulesen hieße beliebig viel Speicher auf Zuruf
+    if length > CHUNK_SIZE:
+        raise FramingError(f"Chunk mit {length} Bytes, erlaubt sind {CHUNK_SIZE}")
+
+
+class FrameReader:
+    # Liest Nachrichten von einem Stream-Socket - mehrere pro Verbindung
+
+    def __init__(self, sock, max_message=MAX_MESSAGE):
+        self.sock = sock
+        self.max_message = max_message
+
+    def _read_exact(self, size, allow_eof=False):
+        buf = bytearray(size)
+        view = memoryview(buf)
+        received = 0
+        while received < size:
+            n = self.sock.recv_into(view[received:], size - received)
+            if n == 0:
+                if allow_eof and received == 0:
+                    return None
+                raise FramingError("Verbindung mitten im Frame geschlossen")
+            received += n
+        return buf
+
+    def iter_chunks(self):
+        # Liefert die Chunks einer Nachricht einzeln (nichts bei EOF vor
+        # dem ersten Header)
+        first = True
+        while True:
+            header = self._read_exact(FRAME_HEADER.size, allow_eof=first)
+            if header is None:
+                return
+            first = False
+
+            length, flags = FRAME_HEADER.unpack(header)
+            _check_chunk(length)
+            yield self._read_exact(length) if length else b""
+            if not flags & FLAG_MORE:
+                return
+
+    def read_message(self):
+        # Ganze Nachricht als bytes oder None wenn die Gegenseite schließt.
+        # Bei mehr als max_message werden die restlichen Chunks gelesen und
+        # verworfen, danach kommt MessageTooLarge
+        chunks = []
+        total = 0
+        received = False
+        for chunk in self.iter_chunks():
+            received = True
+            total += len(chunk)
+            if total <= self.max_message:
+                chunks.append(chunk)
+            else:
+                chunks.clear()
+        if not received:
+            return None
+        if total > self.max_message:
+            raise MessageTooLarge(f"Nachricht mit {total} Bytes verworfen, erlaubt sind {self.max_message}")
+        return b"".join(chunks)
+
+
+async def read_message_async(reader, max_message=MAX_MESSAGE):
+    # asyncio-Variante von FrameReader.read_message (für runtime.py)
+    chunks = []
+    total = 0
+    first = True
+    while True:
+        try:
+            header = await reader.readexactly(FRAME_HEADER.size)
+        except asyncio.IncompleteReadError as e:
+            if not e.partial and first:
+                return None
+            raise FramingError("Verbindung mitten im Frame geschlossen")
+        first = False
+
+        length, flags = FRAME_HEADER.unpack(header)
+        _check_chunk(length)
+        chunk = await reader.readexactly(length) if length else b""
+        total += length
+        if total <= max_message:
+            chunks.append(chunk)
+        else:
+            chunks.clear()
+        if not flags & FLAG_MORE:
+            break
+
+    if total > max_message:
+        raise MessageTooLarge(f"Nachricht mit {total} Bytes verworfen, erlaubt sind {max_message}")
+    return b"".join(chunks)
+
+
+async def send_message_async(writer, data):
+    check_size(data)
+    view = memoryview(data)
+    total = len(view)
+    offset = 0
+
+    while True:
+        chunk = view[offset:offset + CHUNK_SIZE]
+        offset += len(chunk)
+        flags = FLAG_MORE if offset < total else 0
+        writer.write(FRAME_HEADER.pack(len(chunk), flags))
+        if len(chunk):
+            writer.write(chunk)
+        await writer.drain()
+        if not flags:
+            return
@@ -0,0 +1,350 @@
+import math
+import threading
+import time
+from codec import encode, decode
+from discovery import Discovery
+
+ALIVE = "alive"
+SUSPECT = "suspect"
+DEAD = "dead"
+
+
+class GossipDiscovery(Discovery):
+    # SWIM-Membership (Das et al.) statt Announcements an alle Peers
+    #
+    # Jede Protokollperiode pingt ein Node genau einen Peer (reihum in
+    # zufälliger Reihenfolge). Kommt kein ack, bitten indirect_probes andere
+    # Peers per ping_req, es für uns zu versuchen. Erst wenn auch das
+    # scheitert, gilt der Peer als "suspect" und ohne Widerspruch nach
+    # suspect_periods * log10(N) Perioden als "dead". Zustandsänderungen
+    # (alive/suspect/dead mit Inkarnationsnummer) hängen huckepack an
+    # pings und acks - pro Node bleibt der Verkehr konstant, egal wie groß
+    # der Cluster ist. Broadcast (oder seeds) nur noch zum Beitreten und
+    # selten zum Zusammenführen getrennter Teilnetze.
+    #
+    # get_peers(), on_peer_added und on_peer_removed wie bei Discovery.
+    # Ping-Timeouts, Verdachtsfristen und Grabsteine sind Timer im
+    # Scheduler des Nodes - kein Scan über alle Mitglieder pro Periode.
+
+    def __init__(self, node, listen_port=None, seeds=None, protocol_period=1.0,
+                 ping_timeout=0.3, indirect_probes=3, suspect_periods=3,
+                 retransmit_mult=3, max_gossip=8, rejoin_interval=30, rng=None):
+        super().__init__(node, listen_port, announce_interval=protocol_period)
+        # Probe-Reihenfolge und Helfer für ping_req - Standard: der des Nodes
+        self.rng = rng or node.rng
+        self.seeds = list(seeds or [])
+        self.protocol_period = protocol_period
+        self.ping_timeout = ping_timeout
+        self.indirect_probes = indirect_probes
+        self.suspect_periods = suspect_periods
+        self.retransmit_mult = retransmit_mult
+        self.max_gossip = max_gossip
+        self.rejoin_interval = rejoin_interval
+        self.tick_interval = protocol_period
+
+        self.incarnation = 0
+        # peer_id -> {"ip", "port", "status", "incarnation"}
+        # Tote Peers bleiben eine Weile als Grabstein, damit alte
+        # alive-Gerüchte sie nicht wiederbeleben
+        self.members = {}
+        # peer_id -> noch ausstehende Weitergaben dieser Änderung
+        self.updates = {}
+        self.probe = None
+        self.probe_order = []
+        # eigene seq -> (Adresse des Anfragenden, dessen seq)
+        self.relays = {}
+        self.seq = 0
+        self.last_join = None
+        self.messages_sent = 0
+        self.lock = threading.RLock()
+
+    def receivers(self):
+        # Pings und acks laufen über den Unicast-Port - Announcements kommen
+        # hier nur per Broadcast, Unicast-Kopien verschickt GossipDiscovery nicht
+        return [(self.broadcast_recv_socket, self.handle_announcement),
+                (self.recv_socket, self.handle_gossip)]
+
+    # --- Senden ---
+
+    def _send(self, msg, addr, gossip=None):
+        msg["node_id"] = self.node_id
+        msg["port"] = self.listen_port
+        msg["incarnation"] = self.incarnation
+        msg["gossip"] = self._take_gossip() if gossip is None else gossip
+        try:
+            self.recv_socket.sendto(encode(msg), addr)
+            self.messages_sent += 1
+        except OSError:
+            pass
+
+    def _entry(self, peer_id):
+        if peer_id == self.node_id:
+            # Eigene IP kennt nur die Gegenseite (addr des Pakets)
+            return [self.node_id, None, self.listen_port, ALIVE, self.incarnation]
+        member = self.members[peer_id]
+        return [peer_id, member["ip"], member["port"], member["status"], member["incarnation"]]
+
+    def _queue(self, peer_id):
+        # Jede Änderung wird ~retransmit_mult * log(N) mal weitergegeben
+        self.updates[peer_id] = self.retransmit_mult * math.ceil(math.log2(len(self.members) + 2))
+
+    def _take_gossip(self):
+        # Die am seltensten verschickten Änderungen zuerst
+        chosen = sorted(self.updates, key=self.updates.get, reverse=True)[:self.max_gossip]
+        entries = []
+        for peer_id in chosen:
+            if peer_id != self.node_id and peer_id not in self.members:
+                del self.updates[peer_id]
+                continue
+            entries.append(self._entry(peer_id))
+            self.updates[peer_id] -= 1
+            if self.updates[peer_id] <= 0:
+                del self.updates[peer_id]
+        return entries
+
+    def _full_state(self):
+        return [self._entry(peer_id) for peer_id in self.members] + [self._entry(self.node_id)]
+
+    # --- Zustand ---
+
+    def _merge(self, peer_id, ip, port, status, incarnation, events):
+        if peer_id == self.node_id:
+            if status != ALIVE and incarnation >= self.incarnation:
+                # Gerücht über uns selbst widerlegen
+                self.incarnation = incarnation + 1
+                self._queue(self.node_id)
+            return
+
+        member = self.members.get(peer_id)
+        if member is None:
+            if ip is None:
+                return
+            self.members[peer_id] = {"ip": ip, "port": port, "status": status,
+                                     "incarnation": incarnation}
+            self._queue(peer_id)
+            if status == SUSPECT:
+                self._schedule_confirm(peer_id, incarnation)
+            if status == DEAD:
+                self._schedule_forget(peer_id, incarnation)
+            else:
+                self._add_peer(peer_id, events)
+            return
+
+        current = member["status"]
+        if status == ALIVE:
+            accept = incarnation > member["incarnation"]
+        elif status == SUSPECT:
+            accept = (incarnation > member["incarnation"]
+                      or (incarnation == member["incarnation"] and current == ALIVE))
+        else:
+            accept = current != DEAD and incarnation >= member["incarnation"]
+
+        if not accept:
+            return
+
+        member.update(status=status, incarnation=incarnation)
+        if ip is not None:
+            member["ip"] = ip
+            member["port"] = port
+        self._queue(peer_id)
+
+        if status == SUSPECT:
+            if current != SUSPECT:
+                print(f"[GOSSIP] Peer {peer_id[:8]} verdächtig")
+            self._schedule_confirm(peer_id, incarnation)
+        if status == DEAD:
+            self._remove_peer(peer_id, events)
+        elif current == DEAD or (status == ALIVE and peer_id not in self.peers):
+            self._add_peer(peer_id, events)
+
+    def _add_peer(self, peer_id, events):
+        member = self.members[peer_id]
+        print(f"[GOSSIP] Neuer Peer: {peer_id[:8]} auf {member['ip']}:{member['port']}")
+        self.peers[peer_id] = {"port": member["port"], "ip": member["ip"], "timestamp": time.time()}
+        events.append(("added", peer_id))
+
+    def _remove_peer(self, peer_id, events):
+        print(f"[GOSSIP] Peer {peer_id[:8]} ausgefallen - entfernt")
+        self.peers.pop(peer_id, None)
+        events.append(("removed", peer_id))
+        self._schedule_forget(peer_id, self.members[peer_id]["incarnation"])
+
+    def _fire(self, events):
+        # Callbacks außerhalb des Locks - Ring liest dabei get_peers()
+        removed = [peer_id for kind, peer_id in events if kind == "removed"]
+        if removed and self.on_peer_removed:
+            self.on_peer_removed(removed)
+        added = [peer_id for kind, peer_id in events if kind == "added"]
+        if added and self.on_peer_added:
+            self.on_peer_added(added)
+
+    def drop_peer(self, peer_id):
+        # Ring hat den Peer als tot erkannt (Ring.repair): sofort verdächtigen,
+        # widerlegt er, kommt er über on_peer_added zurück
+        with self.lock:
+            self.peers.pop(peer_id, None)
+            member = self.members.get(peer_id)
+            if member and member["status"] == ALIVE:
+                self._merge(peer_id, None, None, SUSPECT, member["incarnation"], [])
+
+    # --- Empfangen ---
+
+    def handle_announcement(self, data, addr):
+        # Broadcast eines (neuen) Nodes: aufnehmen und ihm alle Mitglieder schicken
+        message = decode(data)
+        peer_id = message["node_id"]
+        if peer_id == self.node_id:
+            return
+
+        events = []
+        with self.lock:
+            member = self.members.get(peer_id)
+            if member and member["status"] != DEAD:
+                return
+            self._merge(peer_id, addr[0], message["port"], ALIVE, message.get("incarnation", 0), events)
+            self._send({"type": "members"}, (addr[0], message["port"]), self._full_state())
+        self._fire(events)
+
+    def handle_gossip(self, data, addr):
+        msg = decode(data)
+        sender = msg["node_id"]
+        if sender == self.node_id:
+            return
+        reply_addr = (addr[0], msg["port"])
+
+        events = []
+        with self.lock:
+            known = sender in self.members
+            self._merge(sender, addr[0], msg["port"], ALIVE, msg["incarnation"], events)
+            for peer_id, ip, port, status, incarnation in msg["gossip"]:
+                self._merge(peer_id, ip, port, status, incarnation, events)
+
+            member = self.members.get(sender)
+            if member and member["status"] != ALIVE:
+                # Sender hält sich für lebendig, wir nicht - Gerücht mitgeben,
+                # damit er mit höherer Inkarnation widerspricht
+                self._queue(sender)
+
+            if not known and msg["type"] != "members":
+                # Beitritt über seeds: Mitgliederliste zurückschicken
+                self._send({"type": "members"}, reply_addr, self._full_state())
+
+            if msg["type"] == "ping":
+                self._send({"type": "ack", "seq": msg["seq"]}, reply_addr)
+
+            elif msg["type"] == "ping_req":
+                self.seq += 1
+                self.relays[self.seq] = (reply_addr, msg["seq"])
+                self.node.scheduler.call_later(self.protocol_period, self._drop_relay, self.seq)
+                self._send({"type": "ping", "seq": self.seq}, (msg["ip"], msg["target_port"]))
+
+            elif msg["type"] == "ack":
+                if self.probe and msg["seq"] == self.probe["seq"]:
+                    self.probe["acked"] = True
+                elif msg["seq"] in self.relays:
+                    origin, origin_seq = self.relays.pop(msg["seq"])
+                    self._send({"type": "ack", "seq": origin_seq}, origin)
+        self._fire(events)
+
+    # --- Protokollperiode ---
+
+    def tick(self):
+        # Eine Protokollperiode: letzten Probe auswerten, nächsten Peer pingen
+        events = []
+        with self.lock:
+            self._finish_probe(events)
+            self._start_probe()
+
+            now = self.node.scheduler.time()
+            alone = not any(m["status"] != DEAD for m in self.members.values())
+            if self.last_join is None or now - self.last_join >= (self.protocol_period if alone else self.rejoin_interval):
+                self.last_join = now
+                self.send_announcement()
+        self._fire(events)
+
+    def send_announcement(self):
+        # Nur Broadcast (Beitritt im LAN) und seeds (über Subnetze hinweg)
+        # - kein Unicast mehr an jeden bekannten Peer
+        data = encode({"type": "announcement", "node_id": self.node_id,
+                       "port": self.listen_port, "incarnation": self.incarnation})
+        try:
+            self.broadcast_socket.sendto(data, (self.broadcast_ip, self.broadcast_port))
+        except OSError:
+            pass
+        for seed in self.seeds:
+            self._send({"type": "ping", "seq": 0}, seed)
+
+    def _start_probe(self):
+        if not self.probe_order:
+            self.probe_order = [peer_id for peer_id, m in self.members.items() if m["status"] != DEAD]
+            self.rng.shuffle(self.probe_order)
+
+        while self.probe_order:
+            target = self.probe_order.pop()
+            member = self.members.get(target)
+            if member and member["status"] != DEAD:
+                break
+        else:
+            self.probe = None
+            return
+
+        self.seq += 1
+        self.probe = {"target": target, "seq": self.seq, "acked": False}
+        self._send({"type": "ping", "seq": self.seq}, (member["ip"], member["port"]))
+        self.node.scheduler.call_later(self.ping_timeout, self._probe_indirect, self.seq)
+
+    def _probe_indirect(self, seq):
+        # Kein direktes ack innerhalb von ping_timeout - andere fragen lassen
+        with self.lock:
+            probe = self.probe
+            if not probe or probe["seq"] != seq or probe["acked"]:
+                return
+            target = self.members.get(probe["target"])
+            if not target:
+                return
+            self._send_ping_reqs(probe, target)
+
+    def _send_ping_reqs(self, probe, target):
+        helpers = [peer_id for peer_id, m in self.members.items()
+                   if m["status"] == ALIVE and peer_id != probe["target"]]
+        for peer_id in self.rng.sample(helpers, min(self.indirect_probes, len(helpers))):
+            helper = self.members[peer_id]
+            self._send({"type": "ping_req", "seq": probe["seq"], "target": probe["target"],
+                        "ip": target["ip"], "target_port": target["port"]},
+                       (helper["ip"], helper["port"]))
+
+    def _finish_probe(self, events):
+        probe = self.probe
+        self.probe = None
+        if not probe or probe["acked"]:
+            return
+
+        member = self.members.get(probe["target"])
+        if member and member["status"] == ALIVE:
+            self._merge(probe["target"], None, None, SUSPECT, member["incarnation"], events)
+
+    def _schedule_confirm(self, peer_id, incarnation):
+        timeout = self.protocol_period * self.suspect_periods * max(1.0, math.log10(len(self.peers) + 1))
+        self.node.scheduler.call_later(timeout, self._confirm, peer_id, incarnation)
+
+    def _schedule_forget(self, peer_id, incarnation):
+        self.node.scheduler.call_later(2 * self.rejoin_interval, self._forget, peer_id, incarnation)
+
+    def _confirm(self, peer_id, incarnation):
+        # Verdacht nicht widerlegt (sonst wäre die Inkarnation gestiegen)
+        events = []
+        with self.lock:
+            member = self.members.get(peer_id)
+            if member and member["status"] == SUSPECT and member["incarnation"] == incarnation:
+                self._merge(peer_id, None, None, DEAD, incarnation, events)
+        self._fire(events)
+
+    def _forget(self, peer_id, incarnation):
+        with self.lock:
+            member = self.members.get(peer_id)
+            if member and member["status"] == DEAD and member["incarnation"] == incarnation:
+                del self.members[peer_id]
+
+    def _drop_relay(self, seq):
+        with self.lock:
+            self.relays.pop(seq, None)
@@ -0,0 +1,65 @@
+def coalesce(ops):
+    # Pro Item zählt nur die letzte Operation im Fenster - add+remove
+    # (oder remove+add) desselben Items heben sich so auf. Reihenfolge
+    # nach dem letzten Vorkommen, wie beim einzelnen Anwenden
+    net = {}
+    for action, item in ops:
+        net.pop(item, None)
+        net[item] = action
+    return [(action, item) for item, action in net.items()]
+
+
+class GroupCommit:
+    # Group-Commit auf dem Leader
+    #
+    # Statt jeden Request sofort als eigenes "upd" an alle Peers zu senden,
+    # sammelt der Leader Requests höchstens `window` Sekunden bzw. bis
+    # `max_batch` Operationen. Danach werden sie zusammengefasst (coalesce),
+    # unter einer Version angewendet und als ein "bupd" pro Peer verschickt.
+    # Die Zahl der Datagramme hängt so an der Zahl der Fenster, nicht der Items.
+
+    def __init__(self, node, window=0.005, max_batch=256):
+        self.node = node
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = []
+        self.timer = None
+        # Statistik: Fenster, angenommene und weggefallene Operationen
+        self.batches = 0
+        self.submitted = 0
+        self.cancelled = 0
+
+    def submit(self, ops):
+        # Im Apply-Loop aufrufen (Node._apply_as_leader / _apply_batch_as_leader)
+        self.pending.extend(ops)
+        self.submitted += len(ops)
+
+        if len(self.pending) >= self.max_batch:
+            self.flush()
+        elif not self.timer:
+            self.timer = self.node.scheduler.call_later(self.window, self.node.apply, self.flush)
+
+    def flush(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+
+        ops = coalesce(self.pending)
+        self.cancelled += len(self.pending) - len(ops)
+        self.pending = []
+
+        if not self.node.is_leader:
+            # Leader-Rolle im Fenster verloren - Follower wiederholen ihre
+            # Requests beim neuen Leader nicht, also wenigstens melden
+            print(f"[GROUP] Kein Leader mehr - {len(ops)} Operationen verworfen")
+            return
+
+        self.batches += 1
+        self.node._commit_batch(ops)
+
+    def stop(self):
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
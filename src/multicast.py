@@ -0,0 +1,40 @@
+class MulticastGroup:
+    # IP-Multicast-Gruppe für Fan-out (Leader-Updates, Announcements)
+    #
+    # Ein Datagramm an die Gruppe erreicht alle Mitglieder - der Sender
+    # zahlt einen sendto() statt einen pro Peer. Mitglieder melden das in
+    # ihren Announcements ("multicast"), an alle anderen wird weiter per
+    # Unicast gesendet. interface="127.0.0.1" hält den Verkehr auf dem
+    # Loopback (mehrere Nodes auf einem Rechner, Tests). Gesendet wird über
+    # einen vorhandenen Socket (enable), damit Antworten wie gewohnt an dessen
+    # Adresse gehen. Sockets kommen aus dem Transport des Nodes, auf einem
+    # simulation.SimulatedNetwork also aus dem simulierten Netz.
+
+    def __init__(self, transport, group="239.255.77.1", port=5999, interface="0.0.0.0", ttl=1):
+        self.transport = transport
+        self.group = group
+        self.port = port
+        self.interface = interface
+        self.ttl = ttl
+
+        self.recv_socket = transport.datagram(port, shared=True)
+        self.joined = self.join(self.recv_socket)
+
+    def join(self, sock):
+        # Socket tritt der Gruppe bei - False wenn das Netz es nicht erlaubt
+        try:
+            self.transport.join_group(sock, self.group, self.interface)
+            return True
+        except OSError as e:
+            print(f"[MULTICAST] Beitritt zu {self.group} fehlgeschlagen: {e} - nur Unicast")
+            return False
+
+    def enable(self, sock):
+        # Socket zum Senden an die Gruppe vorbereiten
+        self.transport.enable_multicast(sock, self.interface, self.ttl)
+
+    def send(self, sock, data, port=None):
+        sock.sendto(data, (self.group, port or self.port))
+
+    def close(self):
+        self.recv_socket.close()
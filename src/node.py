@@ -1,130 +1,910 @@
+import random
 import uuid
-import socket
-import json
 import threading
-from shopping_list import ShoppingList
+from codec import encode, decode, encode_split, MAX_DATAGRAM
+from shopping_list import ShoppingList, ORSetShoppingList
+from digest import diff_buckets, SUB_BUCKETS
+from persistence import ListStore
+from sharding import ConsistentHash
+from reliable import ReliableBroadcaster
+from scheduler import Scheduler
+from failover import SuccessorFailover
+from apply_loop import ApplyLoop
+from reads import ReadTracker
+from group_commit import GroupCommit
+from multicast import MulticastGroup
+from transport import UdpTransport
 
 class Node:
     # Ein Node im Shopping-List-Netzwerk
     
-    def __init__(self):
-        self.id = str(uuid.uuid4())
+    def __init__(self, crdt=False, data_dir=None, reliable=False, failover=False, group_commit=False,
+                 multicast=None, transport=None, node_id=None):
+        self.id = node_id or str(uuid.uuid4())
         self.port = None
-        self.shopping_list = ShoppingList()
+        # Sockets für Discovery, Election und Coordinator (transport.py) -
+        # simulation.SimHost ersetzt sie durch ein simuliertes Netz
+        self.transport = transport or UdpTransport()
+        # crdt=True: jeder Node schreibt lokal (OR-Set), kein Leader-Roundtrip
+        self.crdt = crdt
+        if crdt:
+            self.shopping_list = ORSetShoppingList(self.id)
+        else:
+            self.shopping_list = ShoppingList()
+        
+        # data_dir: Liste lokal aus Snapshot + WAL wiederherstellen, danach
+        # holt request_sync nur noch die verpassten Änderungen. Das WAL kennt
+        # nur Leader-Versionen - den OR-Set-Zustand (Tags) kann es nicht
+        # sichern, also lieber ablehnen als still nichts speichern
+        if data_dir and crdt:
+            raise ValueError("data_dir wird im CRDT-Modus nicht unterstützt - nichts würde gespeichert")
+        self.store = None
+        if data_dir:
+            self.store = ListStore(data_dir)
+            version, items = self.store.load()
+            self.shopping_list.load_snapshot(version, items)
+            self.shopping_list.attach_store(self.store)
+        
+        # Alle Änderungen an der Liste laufen über einen Thread (apply_loop.py),
+        # Leser nehmen den zuletzt veröffentlichten Snapshot
+        self.apply_loop = ApplyLoop(self.shopping_list)
+        # Wie aktuell ist das lokale Replikat? (reads.py)
+        self.reads = ReadTracker(self)
+        
         self.is_leader = False
         self.current_leader_id = None
-        self.sequence_number = 0
+        self.sequence_number = self.shopping_list.version
+        # Follower: Updates die vor ihren Vorgängern ankommen, nach seq
+        self.reorder_buffer = {}
+        self.reorder_limit = 1024
+        self._last_gap_request = (None, 0)
+        self._gap_timer = None
+        # Teile eines Snapshots in Arbeit: (Version, {Position: Items})
+        self._snapshot_parts = None
         self.election = None
         self.coord_socket = None
         self.coord_running = False
+        # Gesetzt wenn der Node über runtime.AsyncRuntime läuft
+        self.runtime = None
+        # Alle Timer des Nodes (Discovery, Ring, Election, Coordinator) -
+        # AsyncRuntime ersetzt ihn durch den Event-Loop
+        self.scheduler = Scheduler()
+        self._retransmit_timer = None
+        # Zufall (Anti-Entropy-Partner, Ring-Jitter, Gossip-Probes) -
+        # simulation.py setzt einen mit Seed
+        self.rng = random.Random()
+        # crdt: Zustand alle anti_entropy_interval Sekunden mit einem
+        # zufälligen Peer abgleichen - Deltas gehen nur einmal raus
+        self.anti_entropy_interval = 1.0
+        self._anti_entropy_timer = None
+        
+        # reliable=True: Leader-Updates werden bestätigt und bei Verlust
+        # erneut gesendet (reliable.py)
+        self.reliable = ReliableBroadcaster(self._sendto, clock=lambda: self.scheduler.time()) if reliable else None
+        
+        # failover=True: Leader bestimmt einen Nachfolger, der bei Ausfall
+        # per Lease/Epoche sofort übernimmt (failover.py)
+        self.failover = SuccessorFailover(self) if failover and not crdt else None
+        
+        # group_commit=True: Leader sammelt Requests kurz und verschickt sie
+        # als ein Batch-Update pro Peer (group_commit.py)
+        self.group_commit = GroupCommit(self) if group_commit and not crdt else None
+        
+        # multicast=<Interface-IP>: Updates einmal an eine Multicast-Gruppe
+        # statt an jeden Peer ("127.0.0.1" für mehrere Nodes auf einem Rechner)
+        self.multicast = MulticastGroup(self.transport, interface=multicast) if multicast else None
+        
+        # Benannte Listen (mehrere Haushalte) - per Consistent Hashing auf
+        # Coordinator + Replikate verteilt, unabhängig vom Leader
+        self.lists = {}
+        self.list_replicas = 3
+        self._placement = ConsistentHash([self.id])
+        self._placement_ids = None
         
         print(f"[NODE] Erstellt: {self.id[:8]}")
     
     def set_coordinator(self, election):
         self.election = election
         
-        self.coord_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.coord_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        self.coord_socket.bind(("", self.port + 2000))
+        self.coord_socket = self.transport.datagram(self.port + 2000)
+        if self.multicast:
+            self.multicast.enable(self.coord_socket)
         
         print(f"[COORD] Node {self.id[:8]} bereit")
     
     def start_coordinator(self):
         self.coord_running = True
-        threading.Thread(target=self._coord_listen, daemon=True).start()
+        threading.Thread(target=self._coord_listen, args=(self.coord_socket,), daemon=True).start()
+        if self.multicast:
+            threading.Thread(target=self._coord_listen, args=(self.multicast.recv_socket,), daemon=True).start()
+        self.start_timers()
+        
+        # Verpassten Stand nachholen, falls der Leader schon bekannt ist
+        if self.current_leader_id:
+            self.request_sync()
+    
+    def start_timers(self):
+        if self.reliable:
+            self._retransmit_timer = self.scheduler.call_every(0.05, self.reliable.tick)
+        if self.failover:
+            self.failover.start()
+        if self.crdt:
+            self._anti_entropy_timer = self.scheduler.call_every(
+                self.anti_entropy_interval, self.apply, self._anti_entropy)
     
     def stop_coordinator(self):
         self.coord_running = False
+        if self._retransmit_timer:
+            self._retransmit_timer.cancel()
+        if self._anti_entropy_timer:
+            self._anti_entropy_timer.cancel()
+        if self._gap_timer:
+            self._gap_timer.cancel()
+        if self.failover:
+            self.failover.stop()
+        if self.group_commit:
+            self.group_commit.stop()
         if self.coord_socket:
             self.coord_socket.close()
+        if self.multicast:
+            self.multicast.close()
+        if self.store:
+            self.store.close()
+    
+    def apply(self, command, *args):
+        # Befehl an den einzigen Schreiber der Liste übergeben
+        self.apply_loop.submit(command, *args)
+    
+    def snapshot(self):
+        # Konsistenter, unveränderlicher Stand (version, items) ohne Lock
+        return self.apply_loop.snapshot
+    
+    def read(self, max_staleness=None, timeout=None):
+        # Items + Version + Lag zum Leader. max_staleness (Sekunden): lokal
+        # lesen wenn frisch genug, sonst Version beim Leader bestätigen lassen.
+        # None wenn der Leader nicht erreichbar ist
+        return self.reads.read(max_staleness, timeout)
     
     def send_to_leader(self, action, item):
+        if self.crdt:
+            self.apply(self._apply_local, action, item)
+            return
+        
         if self.is_leader:
-            if action == "add":
-                self.shopping_list.add_item(item)
-            elif action == "remove":
-                self.shopping_list.remove_item(item)
-            self._broadcast_update(action, item)
+            self.apply(self._apply_as_leader, action, item)
+            return
+        
+        leader_addr = self._leader_addr()
+        if not leader_addr:
+            return
+        
+        msg = encode({"type": "req", "action": action, "item": item})
+        try:
+            self.coord_socket.sendto(msg, leader_addr)
+        except Exception as e:
+            print(f"[COORD] Fehler: {e}")
+    
+    def send_batch(self, ops):
+        # Viele adds/removes in einer Nachricht, atomar unter einer Sequenznummer
+        # ops: Liste von (action, item)
+        ops = [(action, item) for action, item in ops if action in ("add", "remove")]
+        if not ops:
             return
         
+        if self.crdt:
+            self.apply(self._apply_local_batch, ops)
+            return
+        
+        if self.is_leader:
+            self.apply(self._apply_batch_as_leader, ops)
+            return
+        
+        leader_addr = self._leader_addr()
+        if not leader_addr:
+            return
+        
+        msg = encode({"type": "breq", "ops": ops})
+        try:
+            self.coord_socket.sendto(msg, leader_addr)
+        except Exception as e:
+            print(f"[COORD] Fehler: {e}")
+    
+    def _leader_addr(self):
         if not self.current_leader_id:
             print(f"[COORD] Kein Leader bekannt!")
-            return
+            return None
         
         peers = self.election.ring.discovery.get_peers()
         peer_info = peers.get(self.current_leader_id)
         
         if not peer_info:
             print(f"[COORD] Leader nicht gefunden!")
+            return None
+        
+        return (peer_info.get("ip", "127.0.0.1"), peer_info["port"] + 2000)
+    
+    def _apply_as_leader(self, action, item):
+        if self.group_commit:
+            self.group_commit.submit([(action, item)])
             return
         
-        leader_port = peer_info["port"]
-        leader_ip = peer_info.get("ip", "127.0.0.1")
+        if self.failover and not self.failover.can_write():
+            # Noch keine gültige Lease vom Nachfolger
+            self.failover.defer(lambda: self._apply_as_leader(action, item))
+            return
         
-        msg = json.dumps({"type": "req", "action": action, "item": item})
-        try:
-            self.coord_socket.sendto(msg.encode(), (leader_ip, leader_port + 2000))
-        except Exception as e:
-            print(f"[COORD] Fehler: {e}")
+        if action == "add":
+            changed = self.shopping_list.add_item(item)
+        elif action == "remove":
+            changed = self.shopping_list.remove_item(item)
+        else:
+            return
+        
+        # Wirkungslose Requests (doppeltes add etc.) erzeugen keine Version
+        if changed:
+            self._broadcast_update(action, item)
+    
+    def _apply_batch_as_leader(self, ops):
+        if self.group_commit:
+            self.group_commit.submit(ops)
+            return
+        
+        self._commit_batch(ops)
+    
+    def _commit_batch(self, ops):
+        if self.failover and not self.failover.can_write():
+            self.failover.defer(lambda: self._commit_batch(ops))
+            return
+        
+        effective = self.shopping_list.apply_batch(ops)
+        if effective:
+            self.sequence_number = self.shopping_list.version
+            self._send_to_all(self._with_epoch({"type": "bupd", "ops": effective, "seq": self.sequence_number}))
     
     def _broadcast_update(self, action, item):
-        self.sequence_number += 1
+        self.sequence_number = self.shopping_list.version
         
-        msg = json.dumps({
+        self._send_to_all(self._with_epoch({
             "type": "upd",
             "action": action,
             "item": item,
             "seq": self.sequence_number
-        })
-        
+        }))
+    
+    def _with_epoch(self, msg):
+        # Follower verwerfen Updates eines abgesetzten Leaders (failover.py)
+        if self.failover:
+            msg["epoch"] = self.failover.epoch
+            msg["min_version"] = self.failover.base_version
+        return msg
+    
+    def _sendto(self, data, addr):
+        self.coord_socket.sendto(data, addr)
+    
+    def _send_ack(self, addr):
+        msg = encode({"type": "ack", "node_id": self.id, "seq": self.shopping_list.version})
+        try:
+            self.coord_socket.sendto(msg, addr)
+        except Exception as e:
+            print(f"[COORD] Ack-Fehler: {e}")
+    
+    def _send_to_all(self, msg):
         peers = self.election.ring.discovery.get_peers()
         
+        if self.reliable and msg["type"] in ("upd", "bupd"):
+            msg["ack"] = True
+            data = encode(msg)
+            for peer_id, peer_info in peers.items():
+                peer_addr = (peer_info.get("ip", "127.0.0.1"), peer_info["port"] + 2000)
+                self.reliable.submit(peer_id, peer_addr, msg["seq"], data)
+            return
+        
+        if self.multicast and self.multicast.joined:
+            # Einmal an die Gruppe - Unicast nur noch an Peers, die laut
+            # Announcement nicht Mitglied sind
+            msg["node_id"] = self.id
+            msg = encode(msg)
+            try:
+                self.multicast.send(self.coord_socket, msg)
+            except OSError as e:
+                print(f"[MULTICAST] Fehler: {e}")
+            peers = {peer_id: peer_info for peer_id, peer_info in peers.items() if not peer_info.get("multicast")}
+        else:
+            msg = encode(msg)
+        
         for peer_id, peer_info in peers.items():
             try:
                 peer_ip = peer_info.get("ip", "127.0.0.1")
-                self.coord_socket.sendto(msg.encode(), (peer_ip, peer_info["port"] + 2000))
+                self.coord_socket.sendto(msg, (peer_ip, peer_info["port"] + 2000))
             except:
                 pass
     
-    def _coord_listen(self):
+    def _apply_local(self, action, item):
+        # CRDT-Modus: sofort lokal anwenden, Delta an alle Peers
+        if action == "add":
+            self.shopping_list.add_item(item)
+        elif action == "remove":
+            self.shopping_list.remove_item(item)
+        self._broadcast_delta()
+    
+    def _apply_local_batch(self, ops):
+        for action, item in ops:
+            if action == "add":
+                self.shopping_list.add_item(item)
+            else:
+                self.shopping_list.remove_item(item)
+        self._broadcast_delta()
+    
+    def _broadcast_delta(self):
+        delta = self.shopping_list.pop_delta()
+        if not delta["adds"] and not delta["removed"]:
+            return
+        
+        self._send_to_all({"type": "crdt", "state": delta})
+    
+    def _sync_source_addr(self):
+        if not self.crdt:
+            return self._leader_addr()
+        
+        # CRDT: jeder Peer kann liefern - Leader falls bekannt, sonst rechter Nachbar
+        peer_info = None
+        if self.current_leader_id and self.current_leader_id != self.id:
+            peer_info = self.election.ring.discovery.get_peers().get(self.current_leader_id)
+        if not peer_info:
+            peer_info = self.election.ring.get_right_neighbor()
+        if not peer_info:
+            return None
+        return (peer_info.get("ip", "127.0.0.1"), peer_info["port"] + 2000)
+    
+    def _anti_entropy(self):
+        # CRDT: Digest an einen zufälligen Peer - weicht sein Zustand ab,
+        # tauschen beide ihren Zustand aus (_handle_crdt_digest). Holt
+        # verlorene Deltas und Writes aus einer Partition nach
+        if not self.election or not self.coord_socket:
+            return
+        peers = self.election.ring.discovery.get_peers()
+        if not peers:
+            return
+        peer_info = peers[self.rng.choice(sorted(peers))]
+        self._send_crdt_digest((peer_info.get("ip", "127.0.0.1"), peer_info["port"] + 2000), request=True)
+    
+    def _send_crdt_digest(self, addr, request=False):
+        msg = {"type": "sync_req", "digest": self.shopping_list.digest()}
+        if request:
+            msg["request"] = True
+        try:
+            self.coord_socket.sendto(encode(msg), addr)
+        except Exception as e:
+            print(f"[SYNC] Fehler: {e}")
+    
+    def _handle_crdt_digest(self, msg, addr):
+        if msg["digest"] == self.shopping_list.digest():
+            return
+        self.send_state(addr)
+        if msg.get("request"):
+            # Der Gegenseite fehlt etwas von uns oder uns etwas von ihr -
+            # mit unserem Digest fragt sie umgekehrt an
+            self._send_crdt_digest(addr)
+    
+    def request_sync(self):
+        # Follower fragt beim Leader nach allem seit der eigenen Version
+        if (self.is_leader and not self.crdt) or not self.coord_socket:
+            return
+        
+        leader_addr = self._sync_source_addr()
+        if not leader_addr:
+            return
+        
+        if self.crdt:
+            # Nur der Digest - Zustände fließen erst, wenn sie abweichen
+            self._send_crdt_digest(leader_addr, request=True)
+            return
+        
+        msg = encode({"type": "sync_req", "since": self.shopping_list.version})
+        try:
+            self.coord_socket.sendto(msg, leader_addr)
+        except Exception as e:
+            print(f"[SYNC] Fehler: {e}")
+    
+    def _state_messages(self, since):
+        # State-Transfer als Folge von Datagrammen, jedes passt in ein UDP-Paket
+        if self.crdt:
+            # Teilzustände sind selbst mergebar - keine Reihenfolge nötig
+            state = self.shopping_list.state()
+            entries = list(state["adds"].items()) + [(None, tag) for tag in state["removed"]]
+            return encode_split(lambda offset, part: {"type": "sync_state", "state": {
+                "adds": {item: tags for item, tags in part if item is not None},
+                "removed": [tag for item, tag in part if item is None]
+            }}, entries)
+        
+        # Delta wenn das Log reicht, sonst kompletter Snapshot
+        changes = self.shopping_list.changes_since(since)
+        if changes is not None:
+            messages = encode_split(lambda offset, ops: self._sync_state(ops=ops), changes)
+            # Ein einzelner Batch größer als ein Datagramm - dann Snapshot
+            if all(len(data) <= MAX_DATAGRAM for data in messages):
+                return messages
+        
+        # Snapshot in Teilen: "from" = Position der Teilliste, "count" = Items
+        # insgesamt - der Empfänger übernimmt erst den vollständigen Stand
+        items = self.shopping_list.get_items()
+        return encode_split(lambda offset, part: self._sync_state(
+            items=part, count=len(items), **{"from": offset}), items)
+    
+    def _sync_state(self, **fields):
+        msg = {"type": "sync_state", "version": self.shopping_list.version}
+        if self.reliable:
+            msg["ack"] = True
+        msg.update(fields)
+        return msg
+    
+    def send_state(self, addr, since=-1):
+        # State-Transfer nur an den anfragenden Node
+        try:
+            for data in self._state_messages(since):
+                self.coord_socket.sendto(data, addr)
+        except Exception as e:
+            print(f"[SYNC] Fehler: {e}")
+    
+    def offer_digests(self):
+        # Leader schickt seinen Root-Digest an alle Peers - nur abweichende
+        # Nodes schicken ihre Bucket-Digests und bekommen die Differenz
+        self._send_to_all({
+            "type": "recon_offer",
+            "digest": self.shopping_list.digest(),
+            "version": self.shopping_list.version
+        })
+    
+    def reconcile_with(self, peer_id):
+        # Holt nur die abweichenden Buckets von einem anderen Node
+        peer_info = self.election.ring.discovery.get_peers().get(peer_id)
+        if not peer_info:
+            print(f"[RECON] Peer {peer_id[:8]} nicht gefunden!")
+            return
+        self._send_recon_req((peer_info.get("ip", "127.0.0.1"), peer_info["port"] + 2000))
+    
+    def _send_recon_req(self, addr):
+        msg = encode({"type": "recon_req", "buckets": self.shopping_list.bucket_digests()})
+        try:
+            self.coord_socket.sendto(msg, addr)
+        except Exception as e:
+            print(f"[RECON] Fehler: {e}")
+    
+    def _send_parts(self, addr, messages):
+        try:
+            for data in messages:
+                self.coord_socket.sendto(data, addr)
+        except Exception as e:
+            print(f"[RECON] Fehler: {e}")
+    
+    def _handle_recon(self, msg, addr):
+        # offer (Root) -> req (64 Bucket-Digests) -> sub (Blatt-Digests der
+        # abweichenden Buckets) -> fetch (abweichende Blätter) -> items
+        if msg["type"] == "recon_offer":
+            if msg["digest"] == self.shopping_list.digest():
+                self.shopping_list.adopt_version(msg["version"])
+            else:
+                self._send_recon_req(addr)
+        
+        elif msg["type"] == "recon_req":
+            differing = diff_buckets(self.shopping_list.bucket_digests(), msg["buckets"])
+            leaves = list(self.shopping_list.leaf_digests(differing).items())
+            self._send_parts(addr, encode_split(
+                lambda offset, part: {"type": "recon_sub", "buckets": dict(part)}, leaves))
+        
+        elif msg["type"] == "recon_sub":
+            theirs = {int(i): digests for i, digests in msg["buckets"].items()}
+            mine = self.shopping_list.leaf_digests(theirs)
+            leaves = [i * SUB_BUCKETS + j for i in theirs for j in diff_buckets(mine[i], theirs[i])]
+            self._send_parts(addr, [encode({"type": "recon_fetch", "buckets": leaves})])
+        
+        elif msg["type"] == "recon_fetch":
+            leaf_items = list(self.shopping_list.items_in_leaves(msg["buckets"]).items())
+            version = self.shopping_list.version
+            self._send_parts(addr, encode_split(lambda offset, part: {
+                "type": "recon_items", "buckets": dict(part), "version": version}, leaf_items))
+        
+        elif msg["type"] == "recon_items":
+            self.shopping_list.replace_leaves(msg["buckets"])
+            print(f"[RECON] {len(msg['buckets'])} Blätter abgeglichen: {len(self.shopping_list)} Items")
+            
+            if self.is_leader:
+                # Leader hat die längste Liste geholt - jetzt an alle verteilen
+                self.sequence_number = self.shopping_list.version
+                self.offer_digests()
+            else:
+                self.shopping_list.adopt_version(msg["version"])
+                # Zurückgehaltene Updates bis zu dieser Version sind erledigt
+                self._drain_reorder_buffer()
+    
+    def _apply_state(self, msg):
+        if "state" in msg:
+            if self.shopping_list.merge(msg["state"]):
+                print(f"[SYNC] CRDT-State gemerged: {len(self.shopping_list)} Items")
+            return
+        
+        version = msg["version"]
+        
+        if "items" in msg:
+            items = self._collect_snapshot(msg)
+            if items is None:
+                return
+            self.shopping_list.load_snapshot(version, items)
+            self._drain_reorder_buffer()
+            print(f"[SYNC] Snapshot übernommen: v{version}, {len(items)} Items")
+        else:
+            for op_version, action, item in msg["ops"]:
+                self._apply_leader_update(op_version, action, item)
+            if msg["ops"]:
+                print(f"[SYNC] Delta übernommen: {len(msg['ops'])} Änderungen bis v{version}")
+        
+        self.sequence_number = self.shopping_list.version
+    
+    def resync(self):
+        # Eigener Stand ist nicht Teil der Historie des Leaders (failover.py) -
+        # verwerfen und komplett neu holen
+        self.reorder_buffer.clear()
+        self._snapshot_parts = None
+        self.shopping_list.load_snapshot(0, [])
+        self.sequence_number = 0
+        self.request_sync()
+    
+    def _collect_snapshot(self, msg):
+        # Teile eines Snapshots sammeln (Node._state_messages) - liefert die
+        # Items erst, wenn alle da sind. Ohne "count": Snapshot am Stück
+        if "count" not in msg:
+            return msg["items"]
+        
+        version = msg["version"]
+        if not self._snapshot_parts or self._snapshot_parts[0] != version:
+            # Neuer Stand beim Leader - ältere Teile sind wertlos
+            self._snapshot_parts = (version, {})
+        parts = self._snapshot_parts[1]
+        parts[msg["from"]] = msg["items"]
+        
+        if sum(len(part) for part in parts.values()) < msg["count"]:
+            # Geht ein Teil verloren, holt _gap_check den Stand erneut
+            self._schedule_gap_check(0.5)
+            return None
+        
+        self._snapshot_parts = None
+        return [item for start in sorted(parts) for item in parts[start]]
+    
+    def _apply_leader_update(self, seq, action, item):
+        if seq <= self.shopping_list.version:
+            return
+        
+        if seq > self.shopping_list.version + 1:
+            # Lücke: Update zurückhalten und nur den fehlenden Bereich anfordern
+            self._buffer_update(seq, action, item)
+            return
+        
+        self.shopping_list.apply_update(seq, action, item)
+        self._drain_reorder_buffer()
+    
+    def _buffer_update(self, seq, action, item):
+        if len(self.reorder_buffer) >= self.reorder_limit:
+            # Zu weit hinten - kompletter Abgleich statt Einzelreparatur
+            self.reorder_buffer.clear()
+            self.request_sync()
+            return
+        
+        self.reorder_buffer[seq] = (action, item)
+        self._request_gap(self.shopping_list.version + 1, min(self.reorder_buffer) - 1)
+        self._schedule_gap_check()
+    
+    def _schedule_gap_check(self, delay=0.1):
+        # Falls Anfrage oder Antwort verloren gehen: nach kurzer Zeit erneut
+        if self._gap_timer or not self.coord_running:
+            return
+        self._gap_timer = self.scheduler.call_later(delay, self.apply, self._gap_check)
+    
+    def _gap_check(self):
+        self._gap_timer = None
+        if self._snapshot_parts and (self.is_leader or self._snapshot_parts[0] <= self.shopping_list.version):
+            # Stand inzwischen auf anderem Weg erreicht
+            self._snapshot_parts = None
+        if self._snapshot_parts:
+            # Snapshot unvollständig - neu anfordern
+            self.request_sync()
+            self._schedule_gap_check(0.5)
+            return
+        if not self.reorder_buffer:
+            return
+        
+        self._last_gap_request = (None, 0)
+        self._request_gap(self.shopping_list.version + 1, min(self.reorder_buffer) - 1)
+        self._schedule_gap_check()
+    
+    def _drain_reorder_buffer(self):
+        version = self.shopping_list.version
+        for seq in [seq for seq in self.reorder_buffer if seq <= version]:
+            del self.reorder_buffer[seq]
+        
+        while version + 1 in self.reorder_buffer:
+            action, item = self.reorder_buffer.pop(version + 1)
+            self.shopping_list.apply_update(version + 1, action, item)
+            version = self.shopping_list.version
+        
+        self.sequence_number = version
+    
+    def _request_gap(self, first, last):
+        # Gleiche Lücke nicht bei jedem weiteren Update erneut anfordern
+        now = self.scheduler.time()
+        if self._last_gap_request[0] == first and now - self._last_gap_request[1] < 0.05:
+            return
+        self._last_gap_request = (first, now)
+        
+        leader_addr = self._leader_addr()
+        if not leader_addr:
+            return
+        
+        msg = encode({"type": "gap_req", "from": first, "to": last})
+        try:
+            self.coord_socket.sendto(msg, leader_addr)
+        except Exception as e:
+            print(f"[SYNC] Fehler: {e}")
+    
+    def _serve_gap(self, msg, addr):
+        # Leader: fehlenden Bereich aus dem Änderungs-Log (begrenzter
+        # Ringpuffer in ShoppingList) - nur wenn zu alt, Snapshot
+        changes = self.shopping_list.changes_between(msg["from"], msg["to"])
+        if changes is None:
+            self.send_state(addr, msg["from"] - 1)
+            return
+        
+        messages = encode_split(lambda offset, ops: self._sync_state(ops=ops), changes)
+        if any(len(data) > MAX_DATAGRAM for data in messages):
+            self.send_state(addr, -1)
+            return
+        try:
+            for data in messages:
+                self.coord_socket.sendto(data, addr)
+        except Exception as e:
+            print(f"[SYNC] Fehler: {e}")
+    
+    def _coord_listen(self, sock):
         while self.coord_running:
             try:
-                data, _ = self.coord_socket.recvfrom(1024)
-                msg = json.loads(data.decode())
-                
-                if msg["type"] == "req" and self.is_leader:
-                    action, item = msg["action"], msg["item"]
-                    
-                    if action == "add":
-                        self.shopping_list.add_item(item)
-                    elif action == "remove":
-                        self.shopping_list.remove_item(item)
-                    
-                    self._broadcast_update(action, item)
-                
-                elif msg["type"] == "upd":
-                    action, item = msg["action"], msg["item"]
-                    seq = msg.get("seq", 0)
-                    
-                    if action == "sync":
-                        if item not in self.shopping_list.items:
-                            self.shopping_list.items.append(item)
-                    else:
-                        print(f"[COORD] Update #{seq}: {action} {item}")
-                        
-                        if action == "add" and item not in self.shopping_list.items:
-                            self.shopping_list.items.append(item)
-                        elif action == "remove" and item in self.shopping_list.items:
-                            self.shopping_list.items.remove(item)
-            
+                data, addr = sock.recvfrom(65535)
+                self.receive_coord(data, addr)
             except:
                 pass
     
+    def receive_coord(self, data, addr):
+        # Empfang (Thread oder AsyncRuntime) - verarbeitet wird im Apply-Loop
+        self.apply(self.handle_coord, data, addr)
+    
+    def handle_coord(self, data, addr):
+        # Eine Coordinator-Nachricht verarbeiten (Thread oder AsyncRuntime)
+        msg = decode(data)
+        
+        if msg.get("node_id") == self.id:
+            # Eigenes Multicast-Datagramm (IP_MULTICAST_LOOP)
+            return
+        
+        if msg["type"] == "req" and self.is_leader:
+            self._apply_as_leader(msg["action"], msg["item"])
+        
+        elif msg["type"] in ("upd", "bupd") and self.failover and not self.failover.accepts(msg):
+            print(f"[FAILOVER] Update aus alter Epoche {msg['epoch']} verworfen")
+        
+        elif msg["type"] in ("upd", "bupd") and self.failover and msg.get("epoch", 0) > self.failover.epoch:
+            # Erstes Update eines neuen Leaders - erst den eigenen Stand
+            # prüfen (failover.py), dann anwenden
+            self.failover.observe_epoch(msg["epoch"], msg.get("min_version"))
+            self.apply(self.handle_coord, data, addr)
+        
+        elif msg["type"] == "upd":
+            action, item = msg["action"], msg["item"]
+            seq = msg.get("seq", 0)
+            
+            if action == "sync":
+                # Altes Format (per-Item-Sync) weiterhin verstehen
+                self.shopping_list.add_item(item)
+            else:
+                print(f"[COORD] Update #{seq}: {action} {item}")
+                
+                self._apply_leader_update(seq, action, item)
+                self.reads.observe(seq)
+            
+            if msg.get("ack"):
+                self._send_ack(addr)
+        
+        elif msg["type"] == "breq" and self.is_leader:
+            self._apply_batch_as_leader(msg["ops"])
+        
+        elif msg["type"] == "bupd":
+            print(f"[COORD] Batch-Update #{msg['seq']}: {len(msg['ops'])} Operationen")
+            self._apply_leader_update(msg["seq"], "batch", msg["ops"])
+            self.reads.observe(msg["seq"])
+            if msg.get("ack"):
+                self._send_ack(addr)
+        
+        elif msg["type"] == "lease" and self.failover:
+            self.failover.handle_lease(msg, addr)
+        
+        elif msg["type"] == "lease_ack" and self.failover:
+            self.failover.handle_lease_ack(msg)
+        
+        elif msg["type"] == "read_index" and self.is_leader:
+            self.reads.serve(msg, addr)
+        
+        elif msg["type"] == "read_index_reply":
+            self.reads.handle_reply(msg)
+        
+        elif msg["type"] == "ack" and self.reliable:
+            self.reliable.ack(msg["node_id"], msg["seq"])
+        
+        elif msg["type"] == "crdt" and self.crdt:
+            self.shopping_list.merge(msg["state"])
+        
+        elif msg["type"] == "sync_req" and self.crdt and "digest" in msg:
+            self._handle_crdt_digest(msg, addr)
+        
+        elif msg["type"] == "sync_req" and (self.is_leader or self.crdt):
+            # Follower mit höherer Version als der Leader (z.B. direkt
+            # nach einer Election) nicht per Snapshot überschreiben -
+            # das klärt der List-Check ("längste Liste gewinnt")
+            since = msg.get("since", -1)
+            if self.crdt or since <= self.shopping_list.version:
+                self.send_state(addr, since)
+        
+        elif msg["type"] == "gap_req" and self.is_leader:
+            self._serve_gap(msg, addr)
+        
+        elif msg["type"] == "sync_state":
+            self._apply_state(msg)
+            if "version" in msg and not self.is_leader:
+                self.reads.observe(msg["version"])
+            if msg.get("ack"):
+                self._send_ack(addr)
+        
+        elif msg["type"] in ("recon_offer", "recon_req", "recon_sub", "recon_fetch", "recon_items"):
+            self._handle_recon(msg, addr)
+        
+        elif msg["type"] in ("lreq", "lupd", "lsync"):
+            self._handle_list_msg(msg)
+    
+    def _peer_addr(self, peer_id):
+        peer_info = self.election.ring.discovery.get_peers().get(peer_id)
+        if not peer_info:
+            return None
+        return (peer_info.get("ip", "127.0.0.1"), peer_info["port"] + 2000)
+    
+    def _send_to_peer(self, peer_id, msg):
+        addr = self._peer_addr(peer_id)
+        if not addr:
+            return
+        try:
+            self.coord_socket.sendto(encode(msg), addr)
+        except Exception as e:
+            print(f"[SHARD] Fehler: {e}")
+    
+    def get_list(self, name):
+        if name not in self.lists:
+            self.lists[name] = ShoppingList()
+        return self.lists[name]
+    
+    @property
+    def placement(self):
+        # Erst bei Bedarf aufbauen - rebalance_lists merkt sich ohne
+        # benannte Listen nur die Member-IDs
+        if self._placement_ids is not None:
+            self._placement = ConsistentHash(self._placement_ids)
+            self._placement_ids = None
+        return self._placement
+    
+    def list_owners(self, name):
+        return self.placement.owners(name, self.list_replicas)
+    
+    def send_to_list(self, name, action, item):
+        # Schreibt in eine benannte Liste über deren Coordinator
+        owners = self.list_owners(name)
+        if not owners:
+            return
+        
+        if owners[0] == self.id:
+            self.apply(self._apply_list_op, name, action, item, owners)
+        else:
+            self._send_to_peer(owners[0], {"type": "lreq", "list": name, "action": action, "item": item})
+    
+    def _apply_list_op(self, name, action, item, owners):
+        shopping_list = self.get_list(name)
+        if action == "add":
+            changed = shopping_list.add_item(item)
+        elif action == "remove":
+            changed = shopping_list.remove_item(item)
+        else:
+            return
+        
+        if not changed:
+            return
+        
+        msg = {"type": "lupd", "list": name, "action": action, "item": item, "seq": shopping_list.version}
+        for owner_id in owners[1:]:
+            self._send_to_peer(owner_id, msg)
+    
+    def _list_snapshot(self, name):
+        shopping_list = self.get_list(name)
+        return {"type": "lsync", "list": name, "version": shopping_list.version, "items": shopping_list.get_items()}
+    
+    def _handle_list_msg(self, msg):
+        name = msg["list"]
+        
+        if msg["type"] == "lreq":
+            owners = self.list_owners(name)
+            if owners and owners[0] == self.id:
+                self._apply_list_op(name, msg["action"], msg["item"], owners)
+            elif owners:
+                # Placement hat sich geändert - an aktuellen Coordinator weiter
+                self._send_to_peer(owners[0], msg)
+        
+        elif msg["type"] == "lupd":
+            shopping_list = self.get_list(name)
+            if msg["seq"] > shopping_list.version + 1:
+                # Lücke - Stand vom Coordinator holen lassen
+                owners = self.list_owners(name)
+                if owners and owners[0] != self.id:
+                    self._send_to_peer(owners[0], {"type": "lsync", "list": name, "request": True})
+            else:
+                shopping_list.apply_update(msg["seq"], msg["action"], msg["item"])
+        
+        elif msg["type"] == "lsync":
+            if msg.get("request"):
+                for owner_id in self.list_owners(name)[1:]:
+                    self._send_to_peer(owner_id, self._list_snapshot(name))
+            elif msg["version"] > self.get_list(name).version:
+                self.get_list(name).load_snapshot(msg["version"], msg["items"])
+    
+    def rebalance_lists(self, member_ids):
+        # Wird von Ring.update_ring aufgerufen - Listen an neue Owner übergeben
+        if not self.lists:
+            # 64 virtuelle Knoten pro Member - bei großen Clustern zu teuer
+            # für jede Ring-Änderung, solange es nichts zu verteilen gibt
+            self._placement_ids = list(member_ids)
+            return
+        
+        old_placement = self.placement
+        self._placement = ConsistentHash(member_ids)
+        
+        if not self.coord_socket:
+            return
+        
+        for name in list(self.lists):
+            old_owners = old_placement.owners(name, self.list_replicas)
+            new_owners = self.list_owners(name)
+            if old_owners == new_owners:
+                continue
+            
+            # Der alte Coordinator übergibt - ist er ausgefallen, übernimmt
+            # der neue Coordinator (war Replikat und hat den Stand)
+            was_coordinator = old_owners and old_owners[0] == self.id
+            coordinator_gone = old_owners and old_owners[0] not in self.placement.node_ids
+            is_coordinator = new_owners and new_owners[0] == self.id
+            
+            if was_coordinator or (is_coordinator and coordinator_gone):
+                snapshot = self._list_snapshot(name)
+                for owner_id in new_owners:
+                    if owner_id != self.id and owner_id not in old_owners:
+                        self._send_to_peer(owner_id, snapshot)
+                print(f"[SHARD] Liste '{name}' neu verteilt: Coordinator {new_owners[0][:8]}")
+            
+            if self.id not in new_owners:
+                del self.lists[name]
+    
     def show_list(self):
-        print(f"\n[Node {self.id[:8]}]")
-        print(self.shopping_list)
+        result = self.read()
+        lag = f", {result.lag} Versionen hinter dem Leader" if result.lag else ""
+        print(f"\n[Node {self.id[:8]}] v{result.version}{lag}")
+        if not result.items:
+            print("Shopping-Liste ist leer")
+            return
+        print("Shopping-Liste:")
+        for i, item in enumerate(result.items, 1):
+            print(f"   {i}. {item}")
     
     def get_info(self):
         leader = "Ja" if self.is_leader else "Nein"
-        items = len(self.shopping_list.get_items())
+        items = len(self.snapshot())
         return f"Node {self.id[:8]} | Port: {self.port} | Leader: {leader} | Items: {items}"
\ No newline at end of file
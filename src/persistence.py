@@ -0,0 +1,102 @@
+import json
+import mmap
+import os
+
+
+class ListStore:
+    # Persistenz für die Shopping-Liste: Append-only Operation-Log (WAL)
+    # plus periodische Snapshots. Beim Neustart wird der Snapshot geladen
+    # und das WAL darüber abgespielt - danach fehlt nur noch das Delta ab
+    # der gespeicherten Version (Node.request_sync)
+
+    def __init__(self, data_dir, snapshot_every=1000, use_mmap=True, fsync=False):
+        self.data_dir = data_dir
+        self.snapshot_every = snapshot_every
+        self.use_mmap = use_mmap
+        self.fsync = fsync
+
+        os.makedirs(data_dir, exist_ok=True)
+        self.snapshot_path = os.path.join(data_dir, "snapshot.dat")
+        self.wal_path = os.path.join(data_dir, "wal.log")
+        self.wal = None
+        self.ops_since_snapshot = 0
+
+    def load(self):
+        # Gibt (version, items) zurück - (0, []) bei leerem Verzeichnis
+        version, index = self._load_snapshot()
+
+        for op_version, action, item in self._read_wal():
+            if op_version <= version:
+                continue
+            ops = item if action == "batch" else [(action, item)]
+            for op_action, op_item in ops:
+                if op_action == "add":
+                    index[op_item] = None
+                elif op_action == "remove":
+                    index.pop(op_item, None)
+            version = op_version
+
+        # Sofort kompaktieren - ein evtl. abgebrochenes WAL-Ende ist damit weg
+        items = list(index)
+        self.write_snapshot(version, items)
+        print(f"[STORE] Geladen: v{version}, {len(items)} Items")
+        return version, items
+
+    def _load_snapshot(self):
+        # Format: erste Zeile Header {"version": v}, danach ein Item pro Zeile
+        if not os.path.exists(self.snapshot_path) or os.path.getsize(self.snapshot_path) == 0:
+            return 0, {}
+
+        with open(self.snapshot_path, "rb") as f:
+            if self.use_mmap:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return self._parse_snapshot(iter(mm.readline, b""))
+            return self._parse_snapshot(f)
+
+    def _parse_snapshot(self, lines):
+        header = json.loads(next(lines))
+        index = {}
+        for line in lines:
+            index[json.loads(line)] = None
+        return header["version"], index
+
+    def _read_wal(self):
+        if not os.path.exists(self.wal_path):
+            return
+        with open(self.wal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Abgebrochener letzter Eintrag (Crash beim Schreiben)
+                    break
+
+    def append(self, version, action, item):
+        # Gibt True zurück wenn ein Snapshot fällig ist
+        self.wal.write(json.dumps([version, action, item]) + "\n")
+        self.wal.flush()
+        if self.fsync:
+            os.fsync(self.wal.fileno())
+        self.ops_since_snapshot += 1
+        return self.ops_since_snapshot >= self.snapshot_every
+
+    def write_snapshot(self, version, items):
+        # Atomar über Temp-Datei, danach wird das WAL geleert
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": version}) + "\n")
+            for item in items:
+                f.write(json.dumps(item) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        if self.wal:
+            self.wal.close()
+        self.wal = open(self.wal_path, "w", encoding="utf-8")
+        self.ops_since_snapshot = 0
+
+    def close(self):
+        if self.wal:
+            self.wal.close()
+            self.wal = None
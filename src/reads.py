@@ -0,0 +1,151 @@
+import itertools
+import threading
+from codec import encode
+
+
+class ReadResult:
+    # Ergebnis von Node.read: Items plus wie aktuell sie sind
+    # lag: Versionen hinter der neuesten bekannten Leader-Version,
+    # staleness: Sekunden seit das Replikat nachweislich aktuell war
+    # (None im CRDT-Modus - dort gibt es keine Leader-Version)
+
+    __slots__ = ("items", "version", "lag", "staleness", "source")
+
+    def __init__(self, items, version, lag, staleness, source):
+        self.items = items
+        self.version = version
+        self.lag = lag
+        self.staleness = staleness
+        self.source = source
+
+
+class ReadTracker:
+    # Bounded-Staleness-Reads auf Followern
+    #
+    # Jeder Follower merkt sich die neueste Leader-Version, die er gesehen
+    # hat (upd/bupd, sync_state, Lease-Heartbeats) und wann er zuletzt
+    # nachweislich auf diesem Stand war. Ist das höchstens max_staleness
+    # Sekunden her, wird lokal gelesen - sonst fragt er den Leader nur nach
+    # dessen aktueller Version ("read_index", keine Items), wartet bis er sie
+    # angewendet hat und liest dann lokal. Die Leselast verteilt sich so auf
+    # alle Follower, der Leader beantwortet höchstens eine kleine Nachricht.
+
+    def __init__(self, node, timeout=1.0):
+        self.node = node
+        self.timeout = timeout
+        self.leader_version = 0
+        # Monotone Zeit, zu der das Replikat zuletzt aktuell war
+        self.fresh_at = None
+        self.counter = itertools.count(1)
+        # rid -> Wartender Read (Sendezeit, benötigte Version, Event)
+        self.pending = {}
+
+    def staleness(self):
+        now = self.node.scheduler.time()
+        fresh_at = self.fresh_at
+        failover = self.node.failover
+        if self.node.is_leader and failover and failover.lease_until:
+            # Leader ohne gültige Lease: bis zu ihrem Ablauf konnte kein
+            # anderer schreiben, der eigene Stand war so lange maßgeblich
+            fresh_at = max(fresh_at or 0, min(failover.lease_until, now))
+        if fresh_at is None:
+            return None
+        return max(0.0, now - fresh_at)
+
+    def lag(self, version):
+        return max(0, self.leader_version - version)
+
+    def read(self, max_staleness=None, timeout=None):
+        # Aus dem User-Thread aufrufen, nicht aus dem Apply-Loop (blockiert)
+        node = self.node
+        snapshot = node.snapshot()
+
+        if node.crdt:
+            return ReadResult(snapshot.items, snapshot.version, None, None, "local")
+        if node.is_leader and (not node.failover or node.failover.can_write()):
+            return ReadResult(snapshot.items, snapshot.version, 0, 0.0, "leader")
+
+        staleness = self.staleness()
+        if max_staleness is None or (staleness is not None and staleness <= max_staleness):
+            return ReadResult(snapshot.items, snapshot.version, self.lag(snapshot.version), staleness, "local")
+
+        return self._read_index(timeout if timeout is not None else self.timeout)
+
+    def _read_index(self, timeout):
+        if self.node.is_leader:
+            # Abgesetzt oder Lease abgelaufen - sich selbst fragen hilft nicht
+            print(f"[READ] Keine gültige Lease - Stand nicht bestätigt")
+            return None
+        leader_addr = self.node._leader_addr()
+        if not leader_addr:
+            return None
+
+        rid = next(self.counter)
+        waiter = {"sent": self.node.scheduler.time(), "version": None, "event": threading.Event()}
+        self.pending[rid] = waiter
+        try:
+            self.node.coord_socket.sendto(encode({"type": "read_index", "seq": rid}), leader_addr)
+        except Exception as e:
+            print(f"[READ] Fehler: {e}")
+
+        if not waiter["event"].wait(timeout):
+            self.pending.pop(rid, None)
+            print(f"[READ] Leader hat den Stand nicht rechtzeitig bestätigt")
+            return None
+
+        snapshot = self.node.snapshot()
+        return ReadResult(snapshot.items, snapshot.version, self.lag(snapshot.version),
+                          self.staleness(), "read_index")
+
+    # --- im Apply-Loop ---
+
+    def serve(self, msg, addr):
+        # Leader: nur die eigene Version zurück - mit Failover nur solange
+        # die Lease gilt, sonst könnte schon ein anderer Leader schreiben
+        if self.node.failover and not self.node.failover.can_write():
+            return
+        reply = encode({"type": "read_index_reply", "seq": msg["seq"], "version": self.node.shopping_list.version})
+        try:
+            self.node.coord_socket.sendto(reply, addr)
+        except Exception as e:
+            print(f"[READ] Fehler: {e}")
+
+    def handle_reply(self, msg):
+        waiter = self.pending.get(msg["seq"])
+        if not waiter:
+            return
+        waiter["version"] = msg["version"]
+        # Antwort des Leaders ist maßgeblich, auch nach einem Leaderwechsel
+        self.leader_version = msg["version"]
+        self.advance()
+
+        if msg["seq"] in self.pending:
+            # Noch nicht so weit - fehlende Updates gezielt nachholen
+            version = self.node.shopping_list.version
+            self.node._request_gap(version + 1, waiter["version"])
+
+    def observe(self, leader_version):
+        # Nach upd/bupd/sync_state/Lease: der Leader war auf leader_version
+        # (beim Senden - die Laufzeit der Nachricht wird vernachlässigt)
+        self.leader_version = max(self.leader_version, leader_version)
+        self.advance(self.node.scheduler.time())
+
+    def advance(self, now=None):
+        version = self.node.shopping_list.version
+        if now is not None and version >= self.leader_version:
+            self.fresh_at = now
+
+        # pending wird auch vom lesenden Thread geändert - über eine Kopie
+        ready = [rid for rid, waiter in list(self.pending.items())
+                 if waiter["version"] is not None and version >= waiter["version"]]
+        if not ready:
+            return
+
+        # Geweckte Leser warten in snapshot() das Ende des Batches ab und
+        # sehen dann mindestens diese Version
+        for rid in ready:
+            waiter = self.pending.pop(rid, None)
+            if not waiter:
+                continue
+            self.fresh_at = max(self.fresh_at or 0, waiter["sent"])
+            waiter["event"].set()
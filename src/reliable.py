@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import deque
+
+
+class ReliableBroadcaster:
+    # Bestätigte Zustellung der Leader-Updates (upd/bupd)
+    #
+    # Pro Peer liegen höchstens `window` unbestätigte Updates im Flug, der Rest
+    # wartet im Backlog. Follower bestätigen kumulativ ihre angewendete
+    # Version ("ack"), damit fallen alle Updates bis dahin aus dem Fenster.
+    # Nicht bestätigte Updates werden mit exponentiellem Backoff erneut
+    # gesendet. Nach max_attempts wird der Peer aufgegeben - er holt sich
+    # den Stand dann selbst per sync_req.
+
+    def __init__(self, send, window=64, initial_timeout=0.2, max_timeout=2.0,
+                 max_attempts=8, backlog_size=1024, clock=time.time):
+        self.send = send
+        self.clock = clock
+        self.window = window
+        self.initial_timeout = initial_timeout
+        self.max_timeout = max_timeout
+        self.max_attempts = max_attempts
+        self.backlog_size = backlog_size
+
+        self.in_flight = {}
+        self.backlog = {}
+        self.lock = threading.Lock()
+        self.retransmissions = 0
+
+    def submit(self, peer_id, addr, seq, data):
+        with self.lock:
+            window = self.in_flight.setdefault(peer_id, {})
+            if len(window) < self.window:
+                self._transmit(window, addr, seq, data, self.initial_timeout, 0)
+                return
+
+            backlog = self.backlog.setdefault(peer_id, deque())
+            if len(backlog) >= self.backlog_size:
+                # Peer hängt zu weit hinterher - er bemerkt die Lücke und
+                # holt sich ein Delta, statt dass der Leader alles puffert
+                backlog.popleft()
+            backlog.append((addr, seq, data))
+
+    def _transmit(self, window, addr, seq, data, timeout, attempts):
+        window[seq] = (addr, data, self.clock() + timeout, timeout, attempts + 1)
+        try:
+            self.send(data, addr)
+        except OSError:
+            pass
+
+    def ack(self, peer_id, version):
+        # Kumulativ: alles bis einschließlich `version` ist angekommen
+        with self.lock:
+            window = self.in_flight.get(peer_id)
+            if not window:
+                return
+            for seq in [seq for seq in window if seq <= version]:
+                del window[seq]
+
+            backlog = self.backlog.get(peer_id)
+            while backlog and len(window) < self.window:
+                addr, seq, data = backlog.popleft()
+                if seq > version:
+                    self._transmit(window, addr, seq, data, self.initial_timeout, 0)
+
+    def tick(self):
+        # Regelmäßig aufrufen - sendet abgelaufene Updates erneut
+        now = self.clock()
+        with self.lock:
+            for peer_id, window in list(self.in_flight.items()):
+                for seq, (addr, data, deadline, timeout, attempts) in list(window.items()):
+                    if deadline > now:
+                        continue
+                    if attempts >= self.max_attempts:
+                        print(f"[RELIABLE] Peer {peer_id[:8]} antwortet nicht - aufgegeben")
+                        self._forget(peer_id)
+                        break
+                    self.retransmissions += 1
+                    self._transmit(window, addr, seq, data, min(timeout * 2, self.max_timeout), attempts)
+
+    def _forget(self, peer_id):
+        self.in_flight.pop(peer_id, None)
+        self.backlog.pop(peer_id, None)
+
+    def forget(self, peer_id):
+        with self.lock:
+            self._forget(peer_id)
+
+    def pending(self):
+        with self.lock:
+            return sum(len(window) for window in self.in_flight.values())
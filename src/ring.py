@@ -1,12 +1,24 @@
+from bisect import bisect_left, insort
+
 class Ring:
     # Ring Topology - Nodes im Ring organisieren
+    # members bleibt sortiert und wird bei Join/Leave nur per bisect
+    # angepasst, die Nachbarn ergeben sich aus der eigenen Position.
+    # Die Suche ist O(log N), Einfügen/Löschen verschiebt den Rest der
+    # Liste (O(N) memmove) - statt wie vorher O(N log N) für jedes Sortieren
     
-    def __init__(self, node, discovery):
+    def __init__(self, node, discovery, rng=None):
         self.node = node
         self.discovery = discovery
+        # Jitter der Re-Election - Standard: der Zufall des Nodes
+        self.rng = rng or node.rng
         self.left_neighbor = None
         self.right_neighbor = None
         self.election = None
+        self.members = [node.id]
+        # Kurze Pause vor der Re-Election, damit die anderen Nodes den
+        # Ausfall auch schon bemerkt haben (Discovery erkennt adaptiv)
+        self.election_delay = 0.5
         
         self.discovery.on_peer_removed = self.handle_peer_removal
         self.discovery.on_peer_added = self.handle_peer_addition
@@ -16,7 +28,28 @@ class Ring:
     
     def handle_peer_removal(self, removed_peers):
         print(f"[RING] Peer-Verlust erkannt - Ring-Update")
-        self.update_ring()
+        for peer_id in removed_peers:
+            index = bisect_left(self.members, peer_id)
+            if index < len(self.members) and self.members[index] == peer_id:
+                del self.members[index]
+        self._refresh()
+        
+        if self.node.reliable:
+            for peer_id in removed_peers:
+                self.node.reliable.forget(peer_id)
+        
+        if self.node.failover and self.node.failover.take_over(removed_peers):
+            print(f"[RING] Leader ausgefallen - Nachfolger übernimmt")
+            failed_leader = self.node.current_leader_id
+            
+            def fallback():
+                # Nachfolger hat sich nicht gemeldet - doch eine Election
+                if self.node.current_leader_id == failed_leader:
+                    self.node.failover.successor_id = None
+                    self.handle_peer_removal([failed_leader])
+            
+            self.node.scheduler.call_later(self.node.failover.lease_duration * 3, fallback)
+            return
         
         if self.node.current_leader_id in removed_peers:
             print(f"[RING] Leader ausgefallen - starte Re-Election")
@@ -24,11 +57,7 @@ class Ring:
             self.node.current_leader_id = None
             
             if self.election:
-                import threading
                 def delayed_election():
-                    import time
-                    time.sleep(2)
-                    
                     peers = self.discovery.get_peers()
                     if not peers:
                         self.node.is_leader = True
@@ -36,65 +65,100 @@ class Ring:
                         print(f"[ELECTION] Node {self.node.id[:8]} ist alleine - wird Leader")
                         return
                     
+                    # Inzwischen hat eine andere Election schon entschieden
+                    if self.node.current_leader_id:
+                        return
+                    
                     if not self.election.election_in_progress:
                         self.election.start_election()
                 
-                threading.Thread(target=delayed_election, daemon=True).start()
+                # Nur der Node mit der größten ID startet sofort - er gewinnt
+                # ohnehin. Die anderen warten länger und sind bis dahin meist
+                # schon Teilnehmer seiner Election (keine parallelen Initiatoren)
+                delay = self.election_delay
+                if self.members and self.members[-1] != self.node.id:
+                    delay = self.election_delay * 4 + self.rng.uniform(0, self.election_delay)
+                self.node.scheduler.call_later(delay, delayed_election)
     
-    def handle_peer_addition(self):
-        print(f"[RING] Neuer Peer joint - Ring-Update + State-Sync")
-        self.update_ring()
+    def handle_peer_addition(self, added_peers=None):
+        print(f"[RING] Neuer Peer joint - Ring-Update")
+        if added_peers is None:
+            self.update_ring()
+            return
         
-        if self.node.is_leader and hasattr(self.node, 'shopping_list') and hasattr(self.node, 'coord_socket'):
-            items = self.node.shopping_list.get_items()
-            if items:
-                import threading
-                import time
-                
-                def delayed_sync():
-                    time.sleep(5)
-                    print(f"[RING] Leader sendet State-Sync ({len(items)} Items)")
-                    for item in items:
-                        try:
-                            self.node._broadcast_update("sync", item)
-                        except Exception as e:
-                            print(f"[RING] Sync-Fehler: {e}")
-                
-                threading.Thread(target=delayed_sync, daemon=True).start()
+        for peer_id in added_peers:
+            index = bisect_left(self.members, peer_id)
+            if index == len(self.members) or self.members[index] != peer_id:
+                insort(self.members, peer_id)
+        self._refresh()
+        # Kein Push vom Leader mehr: der neue Node holt sich den Stand
+        # selbst per sync_req, sobald er den Leader kennt (Node.request_sync)
     
     def update_ring(self):
+        # Kompletter Neuaufbau aus der Discovery (Start), danach inkrementell
         peers = self.discovery.get_peers()
+        self.members = sorted([self.node.id] + list(peers.keys()))
+        self._refresh()
+    
+    def _refresh(self):
+        all_ids = self.members
+        
+        # Benannte Listen auf die neue Mitgliedschaft verteilen - als Kopie,
+        # members ändert sich weiter, bevor der Apply-Loop dran ist
+        self.node.apply(self.node.rebalance_lists, list(all_ids))
         
-        if not peers:
+        if len(all_ids) < 2:
             self.left_neighbor = None
             self.right_neighbor = None
+            self._update_connections()
             print(f"[RING] Kein Ring - Node alleine")
             return
         
-        all_ids = sorted([self.node.id] + list(peers.keys()))
-        my_index = all_ids.index(self.node.id)
+        my_index = bisect_left(all_ids, self.node.id)
         
         left_id = all_ids[(my_index - 1) % len(all_ids)]
         right_id = all_ids[(my_index + 1) % len(all_ids)]
         
-        if left_id == self.node.id:
-            self.left_neighbor = None
-            self.right_neighbor = None
-            print(f"[RING] Nur ein Node")
-            return
+        self.left_neighbor = self._neighbor(left_id)
+        self.right_neighbor = self._neighbor(right_id)
         
-        self.left_neighbor = {
-            "id": left_id,
-            "port": peers.get(left_id, {}).get("port", self.node.port),
-            "ip": peers.get(left_id, {}).get("ip", "127.0.0.1")
-        }
-        self.right_neighbor = {
-            "id": right_id,
-            "port": peers.get(right_id, {}).get("port", self.node.port),
-            "ip": peers.get(right_id, {}).get("ip", "127.0.0.1")
-        }
+        self._update_connections()
         
         print(f"[RING] Links: {left_id[:8]} | Ich: {self.node.id[:8]} | Rechts: {right_id[:8]}")
     
+    def _neighbor(self, peer_id):
+        # Direkt nachschlagen statt get_peers() zu kopieren
+        peer = self.discovery.peers.get(peer_id, {})
+        return {
+            "id": peer_id,
+            "port": peer.get("port", self.node.port),
+            "ip": peer.get("ip", "127.0.0.1")
+        }
+    
+    def repair(self, failed_id, direction="right"):
+        # Nachbar nicht erreichbar: sofort aus dem Ring nehmen statt auf die
+        # Discovery zu warten, und dem Node auf der anderen Seite der Lücke
+        # Bescheid geben. Liefert den neuen Nachbarn in `direction` ("right"
+        # oder "left", je nachdem wo der ausgefallene lag - None wenn alleine).
+        if failed_id == self.node.id or failed_id not in self.members:
+            return self._side(direction)
+        
+        print(f"[RING] Nachbar {failed_id[:8]} nicht erreichbar - Ring wird repariert")
+        self.discovery.drop_peer(failed_id)
+        self.handle_peer_removal([failed_id])
+        
+        neighbor = self._side(direction)
+        if neighbor and self.election:
+            self.election.notify_repair(neighbor, failed_id, direction)
+        return neighbor
+    
+    def _side(self, direction):
+        return self.right_neighbor if direction == "right" else self.left_neighbor
+    
+    def _update_connections(self):
+        # Persistente Nachbar-Verbindungen bei Wechsel austauschen
+        if self.election:
+            self.election.connections.update(self.left_neighbor, self.right_neighbor)
+    
     def get_right_neighbor(self):
         return self.right_neighbor
\ No newline at end of file
@@ -0,0 +1,196 @@
+import asyncio
+import threading
+from codec import decode
+from framing import MessageTooLarge, read_message_async, send_message_async
+
+
+class _DatagramHandler(asyncio.DatagramProtocol):
+    # Leitet empfangene Datagramme an einen bestehenden Handler weiter
+
+    def __init__(self, handler, tag):
+        self.handler = handler
+        self.tag = tag
+
+    def datagram_received(self, data, addr):
+        try:
+            self.handler(data, addr)
+        except Exception as e:
+            print(f"[{self.tag}] Fehler: {e}")
+
+
+class _LoopTimer:
+    # Abbrechbarer Timer im Event-Loop (Gegenstück zu scheduler.Timer)
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.handle = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        handle = self.handle
+        if handle:
+            self.loop.call_soon_threadsafe(handle.cancel)
+
+
+class AsyncRuntime:
+    # Ein Event-Loop (ein Thread) statt eigener Threads pro Socket
+    #
+    # Discovery, Election und Coordinator behalten ihre Klassen und Handler
+    # (handle_announcement, _handle_message, receive_coord) - der Runtime
+    # hängt nur ihre bereits gebundenen Sockets an den Loop und ersetzt
+    # node.scheduler, damit alle Timer im selben Loop laufen; auch der
+    # Apply-Loop des Nodes läuft dort. So können viele Nodes in einem
+    # Prozess laufen.
+
+    def __init__(self, announce_interval=None):
+        self.loop = asyncio.new_event_loop()
+        self.thread = None
+        self.announce_interval = announce_interval
+        self.transports = []
+        self.servers = []
+
+    def start(self):
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        print(f"[RUNTIME] Event-Loop gestartet")
+
+    def stop(self):
+        if not self.thread:
+            return
+
+        def close_all():
+            for transport in self.transports:
+                transport.close()
+            for server in self.servers:
+                server.close()
+            self.loop.stop()
+
+        self.loop.call_soon_threadsafe(close_all)
+        self.thread.join(timeout=2)
+        self.thread = None
+        print(f"[RUNTIME] Event-Loop gestoppt")
+
+    def _in_loop(self):
+        return threading.current_thread() is self.thread
+
+    def _run(self, coro):
+        # Koroutine im Loop ausführen und auf das Ergebnis warten
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def time(self):
+        return self.loop.time()
+
+    def call_soon(self, callback, *args):
+        self.loop.call_soon_threadsafe(callback, *args)
+
+    def call_later(self, delay, callback, *args):
+        # Thread-sicher - darf auch aus dem User-Thread aufgerufen werden,
+        # liefert ein Handle mit cancel() wie scheduler.Scheduler
+        return self._schedule(_LoopTimer(self.loop), delay, None, callback, args)
+
+    def call_every(self, interval, callback, *args):
+        return self._schedule(_LoopTimer(self.loop), interval, interval, callback, args)
+
+    def _schedule(self, timer, delay, interval, callback, args):
+        def fire():
+            if timer.cancelled:
+                return
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"[RUNTIME] Timer-Fehler: {e}")
+            if interval and not timer.cancelled:
+                timer.handle = self.loop.call_later(interval, fire)
+
+        def arm():
+            if not timer.cancelled:
+                timer.handle = self.loop.call_later(delay, fire)
+
+        if self._in_loop():
+            arm()
+        else:
+            self.loop.call_soon_threadsafe(arm)
+        return timer
+
+    async def _datagram(self, sock, handler, tag):
+        transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: _DatagramHandler(handler, tag), sock=sock)
+        self.transports.append(transport)
+
+    def add_discovery(self, discovery):
+        # Ersetzt Discovery.start()
+        discovery.running = True
+        discovery.node.scheduler = self
+        for sock, handler in discovery.receivers():
+            self._run(self._datagram(sock, handler, "DISCOVERY"))
+
+        if self.announce_interval:
+            discovery.tick_interval = self.announce_interval
+        discovery.start_timers()
+        print(f"[DISCOVERY] Service gestartet (async)")
+
+    def add_election(self, election):
+        # Ersetzt Election.start()
+        election.running = True
+        election.node.runtime = self
+        election.node.scheduler = self
+
+        async def serve(reader, writer):
+            try:
+                while election.running:
+                    try:
+                        data = await read_message_async(reader)
+                    except MessageTooLarge as e:
+                        print(f"[ELECTION] Empfangsfehler: {e}")
+                        continue
+                    if data is None:
+                        break
+                    election._handle_message(decode(data))
+            except Exception as e:
+                if election.running:
+                    print(f"[ELECTION] Empfangsfehler: {e}")
+            finally:
+                writer.close()
+
+        async def start_server():
+            server = await asyncio.start_server(serve, sock=election.election_socket)
+            self.servers.append(server)
+
+        self._run(start_server())
+
+    def add_coordinator(self, node):
+        # Ersetzt Node.start_coordinator()
+        node.runtime = self
+        node.scheduler = self
+        node.coord_running = True
+        node.apply_loop.call_soon = self.call_soon
+        self._run(self._datagram(node.coord_socket, node.receive_coord, "COORD"))
+        if node.multicast:
+            self._run(self._datagram(node.multicast.recv_socket, node.receive_coord, "COORD"))
+        node.start_timers()
+
+        if node.current_leader_id:
+            self.call_soon(node.request_sync)
+
+    def add_node(self, node, discovery, election):
+        self.add_discovery(discovery)
+        self.add_election(election)
+        if node.coord_socket:
+            self.add_coordinator(node)
+
+    def send_stream(self, addr, data, timeout=2, on_error=None):
+        # Nicht-blockierendes Senden einer gerahmten Nachricht über TCP
+        # on_error wird im Loop aufgerufen, wenn die Gegenseite nicht erreichbar ist
+        async def send():
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(*addr), timeout)
+                await send_message_async(writer, data)
+                writer.close()
+                await writer.wait_closed()
+            except Exception as e:
+                print(f"[RUNTIME] Senden an {addr[0]}:{addr[1]} fehlgeschlagen: {e}")
+                if on_error:
+                    on_error()
+
+        asyncio.run_coroutine_threadsafe(send(), self.loop)
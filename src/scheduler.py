@@ -0,0 +1,101 @@
+import heapq
+import itertools
+import threading
+import time
+
+
+class Timer:
+    # Handle für einen geplanten Aufruf
+    # cancel() ist O(1): der Eintrag bleibt im Heap und wird bei Fälligkeit
+    # übersprungen - Deadlines sind kurz, der Heap räumt sich also selbst auf
+
+    __slots__ = ("deadline", "callback", "args", "interval", "cancelled")
+
+    def __init__(self, deadline, callback, args, interval=None):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+        self.interval = interval
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class Scheduler:
+    # Ein Thread pro Node für alle Timer (Heap nach Deadline)
+    #
+    # Peer-Ablauf, Heartbeats, verzögerte Election und Retransmits laufen
+    # hierüber statt über je einen schlafenden Thread. Fällig werden nur
+    # die Timer an der Heap-Spitze - Kosten O(log n) pro Timer, nicht
+    # O(Peers) pro Sekunde. AsyncRuntime bietet dieselbe Schnittstelle
+    # (call_later / call_every) auf dem Event-Loop an.
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.thread = None
+        self.running = False
+
+    def time(self):
+        # Uhr der Timer - AsyncRuntime und simulation.SimHost liefern ihre eigene
+        return time.monotonic()
+
+    def call_later(self, delay, callback, *args):
+        return self._push(Timer(time.monotonic() + delay, callback, args))
+
+    def call_every(self, interval, callback, *args):
+        # Erster Aufruf nach `interval`, Abbruch über das zurückgegebene Handle
+        return self._push(Timer(time.monotonic() + interval, callback, args, interval))
+
+    def _push(self, timer):
+        with self.cond:
+            heapq.heappush(self.heap, (timer.deadline, next(self.counter), timer))
+            if not self.running:
+                self.running = True
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            elif self.heap[0][2] is timer:
+                # Neue früheste Deadline - wartenden Thread wecken
+                self.cond.notify()
+        return timer
+
+    def stop(self):
+        with self.cond:
+            self.running = False
+            self.heap.clear()
+            self.cond.notify()
+
+    def _due(self):
+        # Fällige Timer unter dem Lock einsammeln, ausgeführt wird außerhalb
+        with self.cond:
+            while self.running:
+                now = time.monotonic()
+                due = []
+                while self.heap and (self.heap[0][2].cancelled or self.heap[0][0] <= now):
+                    _, _, timer = heapq.heappop(self.heap)
+                    if timer.cancelled:
+                        continue
+                    due.append(timer)
+                    if timer.interval:
+                        # Nicht nachholen, falls der Callback zu lange lief
+                        timer.deadline = max(timer.deadline + timer.interval, now)
+                        heapq.heappush(self.heap, (timer.deadline, next(self.counter), timer))
+                if due:
+                    return due
+                self.cond.wait(self.heap[0][0] - now if self.heap else None)
+            return None
+
+    def _run(self):
+        while True:
+            due = self._due()
+            if due is None:
+                return
+            for timer in due:
+                if timer.cancelled:
+                    continue
+                try:
+                    timer.callback(*timer.args)
+                except Exception as e:
+                    print(f"[SCHEDULER] Timer-Fehler: {e}")
@@ -0,0 +1,46 @@
+import bisect
+import hashlib
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class ConsistentHash:
+    # Consistent Hashing über die Node-IDs - verteilt benannte Listen auf
+    # Coordinator + Replikate. Virtuelle Knoten glätten die Verteilung,
+    # beim Join/Leave wandert nur ein kleiner Teil der Listen
+
+    def __init__(self, node_ids=(), vnodes=64):
+        self.vnodes = vnodes
+        self.node_ids = set()
+        self._points = []
+        self._owners = []
+        self.set_nodes(node_ids)
+
+    def set_nodes(self, node_ids):
+        self.node_ids = set(node_ids)
+        points = sorted(
+            (_hash(f"{node_id}#{v}"), node_id)
+            for node_id in self.node_ids
+            for v in range(self.vnodes)
+        )
+        self._points = [p for p, _ in points]
+        self._owners = [node_id for _, node_id in points]
+
+    def owners(self, key, count):
+        # Die ersten `count` verschiedenen Nodes im Uhrzeigersinn ab hash(key)
+        # owners[0] ist der Coordinator, der Rest sind Replikate
+        if not self._points:
+            return []
+
+        count = min(count, len(self.node_ids))
+        start = bisect.bisect(self._points, _hash(key))
+        result = []
+        for i in range(len(self._points)):
+            node_id = self._owners[(start + i) % len(self._points)]
+            if node_id not in result:
+                result.append(node_id)
+                if len(result) == count:
+                    break
+        return result
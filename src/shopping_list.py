@@ -1,33 +1,325 @@
+import hashlib
+from collections import deque
+
+from digest import BUCKETS, SUB_BUCKETS, item_hash, bucket_of, leaf_of, root_digest
+
+
 class ShoppingList:
     # Eine einfache Shopping-Liste die Items verwaltet
-    
-    def __init__(self):
-        self.items = []
-    
+    # Intern ein dict als Index: Einfügereihenfolge bleibt erhalten,
+    # add/remove/contains sind O(1)
+    # Jede wirksame Änderung erhöht die Version und landet im Änderungs-Log,
+    # damit nachzügelnde Nodes nur ein Delta statt der ganzen Liste brauchen
+    # Zusätzlich werden die Bucket-Digests (digest.py) inkrementell gepflegt
+
+    def __init__(self, log_size=1000):
+        self._index = {}
+        self._buckets = [0] * BUCKETS
+        self._leaves = [0] * (BUCKETS * SUB_BUCKETS)
+        self.version = 0
+        self._log = deque(maxlen=log_size)
+        self.store = None
+
+    def attach_store(self, store):
+        # Persistenz (persistence.ListStore) - jede Änderung geht ins WAL
+        self.store = store
+
+    def _persist_snapshot(self):
+        if self.store:
+            self.store.write_snapshot(self.version, list(self._index))
+
+    @property
+    def items(self):
+        # Nur lesend - Änderungen laufen über add/remove/set_items
+        return list(self._index)
+
+    def _insert(self, item):
+        if item in self._index:
+            return False
+        item_h = item_hash(item)
+        self._index[item] = item_h
+        self._buckets[bucket_of(item_h)] ^= item_h
+        self._leaves[leaf_of(item_h)] ^= item_h
+        return True
+
+    def _delete(self, item):
+        item_h = self._index.pop(item, None)
+        if item_h is None:
+            return False
+        self._buckets[bucket_of(item_h)] ^= item_h
+        self._leaves[leaf_of(item_h)] ^= item_h
+        return True
+
+    def _reset(self, items):
+        self._index = {}
+        self._buckets = [0] * BUCKETS
+        self._leaves = [0] * (BUCKETS * SUB_BUCKETS)
+        for item in items:
+            self._insert(item)
+
+    def _record(self, action, item, version=None):
+        self.version = version if version is not None else self.version + 1
+        self._log.append((self.version, action, item))
+        if self.store and self.store.append(self.version, action, item):
+            self._persist_snapshot()
+
     def add_item(self, item):
         # Fügt ein Item zur Liste hinzu
-        if item in self.items:
+        if not self._insert(item):
             return False
-        self.items.append(item)
+        self._record("add", item)
         return True
-    
+
     def remove_item(self, item):
         # Entfernt ein Item aus der Liste
-        if item not in self.items:
+        if not self._delete(item):
             return False
-        self.items.remove(item)
+        self._record("remove", item)
         return True
-    
+
+    def add_items(self, items):
+        # Fügt mehrere Items hinzu, gibt die tatsächlich neuen zurück
+        return [item for item in items if self.add_item(item)]
+
+    def remove_items(self, items):
+        # Entfernt mehrere Items, gibt die tatsächlich entfernten zurück
+        return [item for item in items if self.remove_item(item)]
+
+    def _apply_ops(self, ops):
+        effective = []
+        for action, item in ops:
+            if action == "add" and self._insert(item):
+                effective.append((action, item))
+            elif action == "remove" and self._delete(item):
+                effective.append((action, item))
+        return effective
+
+    def apply_batch(self, ops):
+        # Mehrere adds/removes atomar unter einer einzigen Version
+        # Gibt nur die wirksamen Operationen zurück
+        effective = self._apply_ops(ops)
+        if effective:
+            self._record("batch", effective)
+        return effective
+
+    def set_items(self, items):
+        # Ersetzt den kompletten Inhalt (z.B. nach List-Check)
+        # Ein Replace lässt sich nicht als Delta ausdrücken - Log leeren
+        self._reset(items)
+        self.version += 1
+        self._log.clear()
+        self._persist_snapshot()
+
+    def apply_update(self, version, action, item):
+        # Übernimmt ein Update vom Leader mit dessen Versionsnummer
+        if version <= self.version:
+            return False
+        if action == "add":
+            self._insert(item)
+        elif action == "remove":
+            self._delete(item)
+        elif action == "batch":
+            # item ist hier die Liste der (action, item)-Paare
+            self._apply_ops(item)
+        self._record(action, item, version)
+        return True
+
+    def load_snapshot(self, version, items):
+        # Übernimmt einen kompletten Stand vom Leader
+        self._reset(items)
+        self.adopt_version(version)
+
+    def adopt_version(self, version):
+        # Inhalt ist schon identisch zum Leader - nur dessen Version übernehmen
+        self.version = version
+        self._log.clear()
+        self._persist_snapshot()
+
+    def changes_since(self, version):
+        # Alle Änderungen nach `version` oder None wenn das Log nicht
+        # weit genug zurückreicht (dann ist ein Snapshot nötig)
+        if version > self.version:
+            return None
+        if version == self.version:
+            return []
+        if not self._log or self._log[0][0] > version + 1:
+            return None
+        return [entry for entry in self._log if entry[0] > version]
+
+    def changes_between(self, first, last):
+        # Änderungen mit first <= Version <= last oder None wenn nicht mehr im Log
+        changes = self.changes_since(first - 1)
+        if changes is None:
+            return None
+        return [entry for entry in changes if entry[0] <= last]
+
+    def bucket_digests(self):
+        return list(self._buckets)
+
+    def digest(self):
+        return root_digest(self._buckets)
+
+    def leaf_digests(self, buckets):
+        # Blatt-Digests der angegebenen Buckets: {bucket: [SUB_BUCKETS Digests]}
+        return {i: self._leaves[i * SUB_BUCKETS:(i + 1) * SUB_BUCKETS] for i in buckets}
+
+    def items_in_leaves(self, leaves):
+        result = {i: [] for i in leaves}
+        for item, item_h in self._index.items():
+            i = leaf_of(item_h)
+            if i in result:
+                result[i].append(item)
+        return result
+
+    def replace_leaves(self, leaf_items):
+        # Ersetzt nur die Items der angegebenen Blätter (Reconciliation)
+        leaf_items = {int(i): items for i, items in leaf_items.items()}
+        for items in self.items_in_leaves(leaf_items).values():
+            for item in items:
+                self._delete(item)
+        for items in leaf_items.values():
+            for item in items:
+                self._insert(item)
+        self.version += 1
+        self._log.clear()
+        self._persist_snapshot()
+
     def get_items(self):
         # Gibt alle Items zurück
-        return self.items.copy()
-    
+        return list(self._index)
+
+    def __contains__(self, item):
+        return item in self._index
+
+    def __len__(self):
+        return len(self._index)
+
     def __str__(self):
         # String-Repräsentation
-        if not self.items:
+        if not self._index:
+            return "Shopping-Liste ist leer"
+
+        result = "Shopping-Liste:\n"
+        for i, item in enumerate(self._index, 1):
+            result += f"   {i}. {item}\n"
+        return result
+
+
+class ORSetShoppingList:
+    # Observed-Remove-Set (CRDT) mit derselben API wie ShoppingList
+    # Jeder Node darf lokal schreiben, Replikate werden per merge() vereinigt
+    # Jedes add bekommt ein eindeutiges Tag (lamport, replica_id), remove
+    # entfernt nur die Tags die der Node gesehen hat - gleichzeitige adds
+    # überleben also ein remove (add-wins)
+
+    def __init__(self, replica_id):
+        self.replica_id = replica_id
+        self.version = 0
+        self._adds = {}
+        self._removed = set()
+        self._delta_adds = {}
+        self._delta_removed = set()
+
+    @property
+    def items(self):
+        return self.get_items()
+
+    def _live_tags(self, item):
+        return self._adds.get(item, set()) - self._removed
+
+    def add_item(self, item):
+        # Fügt ein Item mit neuem Tag hinzu
+        if item in self:
+            return False
+        self.version += 1
+        tag = (self.version, self.replica_id)
+        self._adds.setdefault(item, set()).add(tag)
+        self._delta_adds.setdefault(item, set()).add(tag)
+        return True
+
+    def remove_item(self, item):
+        # Entfernt alle aktuell beobachteten Tags des Items
+        tags = self._live_tags(item)
+        if not tags:
+            return False
+        self.version += 1
+        self._removed |= tags
+        self._delta_removed |= tags
+        return True
+
+    def add_items(self, items):
+        return [item for item in items if self.add_item(item)]
+
+    def remove_items(self, items):
+        return [item for item in items if self.remove_item(item)]
+
+    def set_items(self, items):
+        # Replace als Folge von removes/adds - bleibt mergebar
+        wanted = set(items)
+        self.remove_items([item for item in self.get_items() if item not in wanted])
+        self.add_items([item for item in items if item not in self])
+
+    def merge(self, state):
+        # Kommutativ, assoziativ und idempotent - Reihenfolge egal
+        changed = False
+        for item, tags in state.get("adds", {}).items():
+            tags = {tuple(tag) for tag in tags}
+            known = self._adds.setdefault(item, set())
+            if not tags <= known:
+                known |= tags
+                changed = True
+                self.version = max(self.version, max(tag[0] for tag in tags))
+        removed = {tuple(tag) for tag in state.get("removed", [])}
+        if not removed <= self._removed:
+            self._removed |= removed
+            changed = True
+        return changed
+
+    def _encode(self, adds, removed):
+        return {
+            "adds": {item: sorted(tags) for item, tags in adds.items()},
+            "removed": sorted(removed)
+        }
+
+    def state(self):
+        # Kompletter Zustand (für Anti-Entropy / Join)
+        return self._encode(self._adds, self._removed)
+
+    def digest(self):
+        # Hash über den kompletten Zustand (Tags inklusive) - gleich heißt
+        # "nichts auszutauschen" beim Anti-Entropy-Abgleich
+        data = repr((sorted((item, sorted(tags)) for item, tags in self._adds.items()),
+                     sorted(self._removed)))
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+    def pop_delta(self):
+        # Nur die lokalen Änderungen seit dem letzten Aufruf
+        delta = self._encode(self._delta_adds, self._delta_removed)
+        self._delta_adds = {}
+        self._delta_removed = set()
+        return delta
+
+    def get_items(self):
+        # Deterministische Reihenfolge auf allen Replikaten: ältestes Tag zuerst
+        live = []
+        for item in self._adds:
+            tags = self._live_tags(item)
+            if tags:
+                live.append((min(tags), item))
+        return [item for _, item in sorted(live)]
+
+    def __contains__(self, item):
+        return bool(self._live_tags(item))
+
+    def __len__(self):
+        return sum(1 for item in self._adds if self._live_tags(item))
+
+    def __str__(self):
+        items = self.get_items()
+        if not items:
             return "Shopping-Liste ist leer"
-        
+
         result = "Shopping-Liste:\n"
-        for i, item in enumerate(self.items, 1):
+        for i, item in enumerate(items, 1):
             result += f"   {i}. {item}\n"
-        return result
\ No newline at end of file
+        return result
@@ -0,0 +1,80 @@
+import contextlib
+import io
+from simulation import SimulatedNetwork
+from discovery import Discovery
+from gossip import GossipDiscovery
+
+# Gemeinsame Bausteine der Skripte auf dem simulierten Netz (test_*.py,
+# benchmark.py): Cluster aufbauen, Leader wählen, Node-Ausgaben sammeln
+
+# Die Nodes schreiben viel - ihre Ausgaben landen hier statt im Terminal
+log = io.StringIO()
+
+
+def quiet():
+    # with quiet(): ... - Ausgaben der Nodes nach `log` umleiten
+    return contextlib.redirect_stdout(log)
+
+
+def agreed(nodes):
+    # Alle lebenden Nodes kennen denselben Leader
+    alive = [n for n in nodes if n.transport.alive]
+    leaders = {n.current_leader_id for n in alive}
+    return len(leaders) == 1 and None not in leaders
+
+
+def cluster(size, seed=0, gossip=False, strategy="chang-roberts", net_options=None, **node_options):
+    # `size` Nodes, alle kennen alle (join_all) - noch ohne Leader
+    # Gibt (net, parts) zurück, parts wie SimulatedNetwork.spawn
+    net = SimulatedNetwork(seed=seed, broadcast=not gossip, **(net_options or {}))
+    discovery = GossipDiscovery if gossip else Discovery
+    parts = [net.spawn(discovery, strategy, **node_options) for _ in range(size)]
+    net.join_all([ring for _, _, ring, _ in parts])
+    return net, parts
+
+
+def nodes_of(parts):
+    return [node for node, _, _, _ in parts]
+
+
+def join(net, parts, **node_options):
+    # Weiteren Node nachträglich aufnehmen (gleiche Discovery wie die
+    # anderen) - kennt danach alle und den Leader
+    part = net.spawn(type(parts[0][1]), **node_options)
+    node = part[0]
+    parts.append(part)
+    net.join_all([ring for _, _, ring, _ in parts])
+    node.current_leader_id = next((n.id for n in nodes_of(parts) if n.is_leader), None)
+    return node
+
+
+def elect(net, parts, timeout=60):
+    # Election starten und warten, bis alle denselben Leader kennen
+    nodes = nodes_of(parts)
+    parts[0][3].start_election()
+    if not net.run_until(lambda: agreed(nodes), timeout):
+        return None
+    return next(n for n in nodes if n.is_leader)
+
+
+def callback_errors():
+    # Exceptions in Timern/Handlern (SimulatedNetwork.step, ApplyLoop)
+    return [line for line in log.getvalue().splitlines()
+            if line.startswith("[SIM]") or line.startswith("[APPLY] Fehler")]
+
+
+def header(title):
+    print("=" * 60)
+    print(f"TEST: {title}")
+    print("=" * 60)
+
+
+def footer():
+    errors = callback_errors()
+    print(f"\n[INFO] Fehler in Callbacks: {len(errors)}")
+    for line in errors[:5]:
+        print(f"  {line}")
+
+    print("\n" + "=" * 60)
+    print("TEST BEENDET")
+    print("=" * 60)
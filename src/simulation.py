@@ -0,0 +1,391 @@
+import errno
+import heapq
+import itertools
+import random
+import uuid
+from codec import decode, MAX_DATAGRAM
+from framing import FRAME_HEADER, FLAG_MORE
+from scheduler import Timer
+from node import Node
+from discovery import Discovery
+from gossip import GossipDiscovery, ALIVE
+from ring import Ring
+from election import Election
+
+BROADCAST_IPS = ("255.255.255.255", "<broadcast>")
+
+
+def _is_multicast(ip):
+    # 224.0.0.0 - 239.255.255.255
+    first = ip.split(".")[0]
+    return first.isdigit() and 224 <= int(first) <= 239
+
+
+class SimSocket:
+    # Endpunkt im simulierten Netz - sendto/close wie ein echter Socket,
+    # empfangen wird über den Handler, den SimulatedNetwork.add_node setzt
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.handler = None
+
+    def getsockname(self):
+        return (self.host.ip, self.port)
+
+    def sendto(self, data, addr):
+        # Größere Datagramme lehnt sendto ab wie im echten Netz
+        if len(data) > MAX_DATAGRAM:
+            raise OSError(errno.EMSGSIZE, "Message too long")
+        self.host.network._send_datagram(self.host, self.port, data, addr)
+
+    def setsockopt(self, *args):
+        pass
+
+    def close(self):
+        self.host.unbind(self)
+
+
+class SimStream:
+    # Ausgehende TCP-Verbindung (transport.connect) - sammelt die Chunks aus
+    # framing.send_message und stellt jede fertige Nachricht wie
+    # SimHost.send_stream zu. Die Gegenseite sendet nie zurück.
+
+    def __init__(self, host, addr, timeout):
+        self.host = host
+        self.addr = addr
+        self.timeout = timeout
+        self.buffer = bytearray()
+        self.message = bytearray()
+
+    def sendall(self, data):
+        self.buffer += data
+        while len(self.buffer) >= FRAME_HEADER.size:
+            length, flags = FRAME_HEADER.unpack_from(self.buffer)
+            end = FRAME_HEADER.size + length
+            if len(self.buffer) < end:
+                return
+            self.message += self.buffer[FRAME_HEADER.size:end]
+            del self.buffer[:end]
+            if not flags & FLAG_MORE:
+                self.host.network._send_stream(self.host, self.addr, bytes(self.message), self.timeout, None)
+                self.message = bytearray()
+
+    def recv(self, size, flags=0):
+        # Lauscht drüben niemand mehr, ist die Verbindung zu (EOF)
+        target = self.host.network.hosts.get(self.addr[0])
+        if not target or self.addr[1] not in target.sockets:
+            return b""
+        raise BlockingIOError()
+
+    def setsockopt(self, *args):
+        pass
+
+    def setblocking(self, flag):
+        pass
+
+    def settimeout(self, timeout):
+        pass
+
+    def close(self):
+        pass
+
+
+class SimHost:
+    # Ein Rechner im simulierten Netz (eigene IP)
+    #
+    # Transport wie transport.UdpTransport, Uhr und Timer wie
+    # scheduler.Scheduler, send_stream wie runtime.AsyncRuntime - ein Node
+    # bekommt ihn als transport, SimulatedNetwork.add_node setzt ihn zusätzlich
+    # als scheduler und runtime ein.
+
+    def __init__(self, network, ip):
+        self.network = network
+        self.ip = ip
+        self.sockets = {}
+        # Multicast-Gruppen, denen der Host beigetreten ist (MulticastGroup)
+        self.groups = set()
+        self.alive = True
+        self.ephemeral = itertools.count(40000)
+
+    # --- Transport ---
+
+    def bind(self, port):
+        if port in self.sockets:
+            raise OSError(f"Port {port} auf {self.ip} belegt")
+        sock = SimSocket(self, port)
+        self.sockets[port] = sock
+        return sock
+
+    def unbind(self, sock):
+        if self.sockets.get(sock.port) is sock:
+            del self.sockets[sock.port]
+
+    def datagram(self, port=None, broadcast=False, shared=False):
+        return self.bind(next(self.ephemeral) if port is None else port)
+
+    def listener(self, port, backlog=5):
+        return self.bind(port)
+
+    def connect(self, addr, timeout):
+        # Verbindungsaufbau sofort entschieden - blockierendes Warten gibt es
+        # auf der virtuellen Uhr nicht
+        target = self.network.hosts.get(addr[0])
+        if not target or not self.network._reachable(self, target):
+            raise TimeoutError(f"Keine Verbindung zu {addr[0]}:{addr[1]}")
+        if addr[1] not in target.sockets:
+            raise ConnectionRefusedError(f"{addr[0]}:{addr[1]} lauscht nicht")
+        return SimStream(self, addr, timeout)
+
+    def join_group(self, sock, group, interface):
+        # Mitgliedschaft gilt wie im echten Netz für den ganzen Host - jedes
+        # Datagramm an (group, port) geht an den Socket auf `port`
+        self.groups.add(group)
+
+    def enable_multicast(self, sock, interface, ttl):
+        pass
+
+    def free_port(self, start_port=5001, max_attempts=100):
+        for port in range(start_port, start_port + max_attempts):
+            if port not in self.sockets:
+                return port
+        raise Exception("Kein freier Port gefunden!")
+
+    # --- Scheduler / Runtime ---
+
+    def time(self):
+        return self.network.now
+
+    def call_soon(self, callback, *args):
+        return self.call_later(0, callback, *args)
+
+    def call_later(self, delay, callback, *args):
+        return self.network._schedule(self, Timer(self.network.now + delay, callback, args))
+
+    def call_every(self, interval, callback, *args):
+        return self.network._schedule(self, Timer(self.network.now + interval, callback, args, interval))
+
+    def send_stream(self, addr, data, timeout=2, on_error=None):
+        self.network._send_stream(self, addr, data, timeout, on_error)
+
+
+class SimulatedNetwork:
+    # Deterministisches Netz im Prozess für Experimente mit vielen Nodes
+    #
+    # Alle Nodes laufen auf einer virtuellen Uhr in einem Thread: Timer,
+    # Apply-Loops und Zustellungen sind Ereignisse in einem Heap, es wird
+    # nie wirklich gewartet. Datagramme bekommen Latenz (+ Jitter) und gehen
+    # mit Wahrscheinlichkeit `loss` verloren, Stream-Nachrichten (Election)
+    # kommen pro Verbindung in Reihenfolge an. partition() trennt Gruppen,
+    # crash() lässt einen Node stumm sterben. Node-IDs, Latenzen, Verluste
+    # und node.rng jedes Nodes (Ring-Jitter, Gossip, Anti-Entropy) hängen nur
+    # am seed - gleicher seed, gleicher Ablauf. Das globale Modul random
+    # bleibt unberührt.
+    #
+    # broadcast=False verhält sich wie ein geroutetes Netz ohne Broadcast:
+    # Nodes treten dann über GossipDiscovery-seeds bei. Multicast-Gruppen
+    # (Node(multicast=...)) funktionieren in beiden Fällen.
+
+    def __init__(self, seed=0, latency=0.001, jitter=0.001, loss=0.0, broadcast=True):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.broadcast = broadcast
+
+        self.now = 0.0
+        self.events = []
+        self.counter = itertools.count()
+        self.hosts = {}
+        self.host_numbers = itertools.count(1)
+        # ip -> Gruppe, nur gleiche Gruppen erreichen sich
+        self.partitions = {}
+        # (Quell-IP, Zieladresse) -> letzte Zustellung, hält TCP-Reihenfolge
+        self.streams = {}
+        self.stats = {"events": 0, "datagrams": 0, "streams": 0, "bytes": 0, "dropped": 0}
+
+    # --- Aufbau ---
+
+    def host(self):
+        number = next(self.host_numbers)
+        ip = f"10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}"
+        host = SimHost(self, ip)
+        self.hosts[ip] = host
+        return host
+
+    def node_id(self):
+        return str(uuid.UUID(int=self.rng.getrandbits(128), version=4))
+
+    def spawn(self, discovery=Discovery, strategy="chang-roberts", **node_options):
+        # Node mit Discovery, Ring und Election auf einem neuen Host
+        # discovery: Klasse oder Funktion node -> Discovery
+        node = Node(transport=self.host(), node_id=self.node_id(), **node_options)
+        # Vor Discovery und Ring - beide übernehmen node.rng
+        node.rng = random.Random(self.rng.getrandbits(64))
+        disc = discovery(node)
+        ring = Ring(node, disc)
+        ring.update_ring()
+        elec = Election(node, ring, strategy)
+        node.set_coordinator(elec)
+        self.add_node(node, disc, elec)
+        return node, disc, ring, elec
+
+    def add_node(self, node, discovery, election):
+        # Gegenstück zu AsyncRuntime.add_node - Handler an die Sockets,
+        # Timer und Apply-Loop auf die virtuelle Uhr
+        host = node.transport
+        node.scheduler = host
+        node.runtime = host
+
+        discovery.running = True
+        for sock, handler in discovery.receivers():
+            sock.handler = handler
+
+        election.running = True
+        election.election_socket.handler = lambda data, addr: election._handle_message(decode(data))
+
+        node.coord_running = True
+        node.apply_loop.call_soon = host.call_soon
+        node.coord_socket.handler = node.receive_coord
+        if node.multicast:
+            node.multicast.recv_socket.handler = node.receive_coord
+
+        discovery.start_timers()
+        node.start_timers()
+
+    def join_all(self, rings):
+        # Startzustand "alle kennen alle" ohne N² Beitrittsnachrichten -
+        # für große Cluster, in denen nur die Election interessiert
+        entries = [(ring.node.id, ring.node.transport.ip, ring.discovery.listen_port) for ring in rings]
+        for ring in rings:
+            disc = ring.discovery
+            for peer_id, ip, port in entries:
+                if peer_id == ring.node.id:
+                    continue
+                disc.peers[peer_id] = {"port": port, "ip": ip, "timestamp": self.now}
+                if isinstance(disc, GossipDiscovery):
+                    disc.members[peer_id] = {"ip": ip, "port": port, "status": ALIVE, "incarnation": 0}
+                else:
+                    disc.detector.heartbeat(peer_id, self.now)
+                    disc._schedule_expiry(peer_id)
+            ring.update_ring()
+
+    # --- Fehler ---
+
+    def crash(self, node):
+        # Stumm: keine Timer, keine Antworten, Verbindungen laufen ins Leere
+        node.transport.alive = False
+
+    def partition(self, *groups):
+        # Jede Gruppe (Liste von Nodes) erreicht nur sich selbst
+        self.partitions = {}
+        for number, group in enumerate(groups):
+            for node in group:
+                self.partitions[node.transport.ip] = number
+
+    def heal(self):
+        self.partitions = {}
+
+    def _reachable(self, source, target):
+        return target.alive and self.partitions.get(source.ip) == self.partitions.get(target.ip)
+
+    # --- Ereignisse ---
+
+    def _schedule(self, host, timer):
+        heapq.heappush(self.events, (timer.deadline, next(self.counter), host, timer))
+        return timer
+
+    def _delay(self):
+        return self.latency + self.rng.uniform(0, self.jitter)
+
+    def _send_datagram(self, host, port, data, addr):
+        if not host.alive:
+            return
+        ip, target_port = addr
+        if ip in BROADCAST_IPS:
+            targets = list(self.hosts.values()) if self.broadcast else []
+        elif _is_multicast(ip):
+            # Multicast - an alle Mitglieder der Gruppe, auch den Sender
+            targets = [target for target in self.hosts.values() if ip in target.groups]
+        else:
+            targets = [self.hosts[ip]] if ip in self.hosts else []
+
+        for target in targets:
+            self.stats["datagrams"] += 1
+            self.stats["bytes"] += len(data)
+            if not self._reachable(host, target) or (self.loss and self.rng.random() < self.loss):
+                self.stats["dropped"] += 1
+                continue
+            timer = Timer(self.now + self._delay(), self._deliver, (target, target_port, data, (host.ip, port)))
+            self._schedule(target, timer)
+
+    def _send_stream(self, host, addr, data, timeout, on_error):
+        if not host.alive:
+            return
+        self.stats["streams"] += 1
+        self.stats["bytes"] += len(data)
+        target = self.hosts.get(addr[0])
+
+        if target and target.alive and addr[1] not in target.sockets:
+            # Host lebt, aber niemand lauscht - Verbindung abgelehnt
+            self.stats["dropped"] += 1
+            if on_error:
+                self._schedule(host, Timer(self.now + 2 * self._delay(), on_error, ()))
+            return
+        if not target or not self._reachable(host, target):
+            # Keine Antwort - Verbindungsaufbau läuft in den Timeout
+            self.stats["dropped"] += 1
+            if on_error:
+                self._schedule(host, Timer(self.now + timeout, on_error, ()))
+            return
+
+        key = (host.ip, addr)
+        at = max(self.now + self._delay(), self.streams.get(key, 0))
+        self.streams[key] = at
+        self._schedule(target, Timer(at, self._deliver, (target, addr[1], data, (host.ip, 0))))
+
+    def _deliver(self, target, port, data, source):
+        sock = target.sockets.get(port)
+        if sock and sock.handler:
+            sock.handler(data, source)
+
+    def step(self):
+        deadline, _, host, timer = heapq.heappop(self.events)
+        self.now = max(self.now, deadline)
+        if timer.cancelled or not host.alive:
+            return
+        if timer.interval:
+            timer.deadline = deadline + timer.interval
+            self._schedule(host, timer)
+
+        self.stats["events"] += 1
+        try:
+            timer.callback(*timer.args)
+        except Exception as e:
+            print(f"[SIM] Fehler auf {host.ip}: {e!r}")
+
+    def run(self, duration):
+        # Alle Ereignisse der nächsten `duration` virtuellen Sekunden
+        end = self.now + duration
+        while self.events and self.events[0][0] <= end:
+            self.step()
+        self.now = end
+
+    def run_until(self, predicate, timeout, poll=0.01):
+        # Bis predicate() gilt (geprüft alle `poll` virtuellen Sekunden)
+        # Gibt True zurück oder False nach `timeout`. Geprüft wird vor dem
+        # Sprung zum nächsten Ereignis - now steht dann höchstens `poll` nach
+        # dem Ereignis, das predicate() wahr gemacht hat
+        end = self.now + timeout
+        next_check = self.now
+        while self.events and self.events[0][0] <= end:
+            if self.events[0][0] >= next_check:
+                if predicate():
+                    return True
+                next_check = self.events[0][0] + poll
+            self.step()
+        if predicate():
+            return True
+        self.now = max(self.now, end)
+        return False
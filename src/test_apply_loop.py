@@ -0,0 +1,119 @@
+from sim_helpers import quiet, header, footer
+from node import Node
+from apply_loop import ApplyLoop
+from shopping_list import ShoppingList
+import threading
+import time
+
+
+def update_cost(size, updates=2000):
+    # µs pro Update, wenn jeder Batch nur einen Befehl enthält (ständiger
+    # Strom einzelner Updates) - bestes von drei Durchläufen gegen Rauschen
+    best = None
+    for _ in range(3):
+        shopping_list = ShoppingList()
+        shopping_list.load_snapshot(size, [f"item-{i}" for i in range(size)])
+        loop = ApplyLoop(shopping_list)
+        loop.call_soon = lambda callback: callback()
+        start = time.perf_counter()
+        for i in range(updates):
+            loop.submit(shopping_list.apply_update, size + i + 1, "add", f"new-{i}")
+        cost = (time.perf_counter() - start) / updates * 1e6
+        best = cost if best is None else min(best, cost)
+    return best, loop
+
+
+header("Apply-Loop")
+
+# --- Ein Schreiber, viele Threads ---
+print("\n[INFO] 4 Threads reihen je 500 Writes ein...")
+with quiet():
+    node = Node()
+
+    def writer(number):
+        for i in range(500):
+            node.apply(node.shopping_list.add_item, f"t{number}-{i}")
+
+    threads = [threading.Thread(target=writer, args=(number,)) for number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    done = threading.Event()
+    node.apply(done.set)
+    done.wait(5)
+
+snapshot = node.snapshot()
+if snapshot.version == 2000 and len(snapshot) == 2000:
+    print(f"✅ Alle Writes angewendet: v{snapshot.version}, {node.apply_loop.batches} Batches")
+else:
+    print(f"❌ Stand v{snapshot.version} mit {len(snapshot)} Items statt 2000")
+
+# --- Leser während laufender Writes ---
+print("\n[INFO] 4 Leser-Threads, während 20000 Updates angewendet werden...")
+with quiet():
+    node = Node()
+    writes_done = threading.Event()
+    problems = []
+    held = []
+
+    def reader():
+        last_version = 0
+        first = None
+        while not writes_done.is_set():
+            snapshot = node.snapshot()
+            # Jedes Update fügt genau ein Item hinzu - ein Snapshot mitten
+            # aus einem Batch hätte weniger Items als seine Version
+            if len(snapshot) != snapshot.version:
+                problems.append(f"v{snapshot.version} mit {len(snapshot)} Items")
+            if snapshot.version < last_version:
+                problems.append(f"Version zurück: v{last_version} -> v{snapshot.version}")
+            last_version = snapshot.version
+            if first is None and snapshot.version:
+                first = (snapshot, list(snapshot.items))
+        held.append(first)
+
+    readers = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in readers:
+        thread.start()
+    for i in range(20000):
+        node.apply(node.shopping_list.apply_update, i + 1, "add", f"item-{i}")
+    done = threading.Event()
+    node.apply(done.set)
+    done.wait(10)
+    writes_done.set()
+    for thread in readers:
+        thread.join()
+
+final = node.snapshot()
+if final.version == 20000 and not problems:
+    print(f"✅ Jeder gelesene Snapshot vollständig, Versionen nur steigend ({node.apply_loop.batches} Batches)")
+else:
+    print(f"❌ Stand v{final.version}, {len(problems)} Probleme, z.B. {problems[:3]}")
+
+# Früh gelesene Snapshots ändern sich nicht, während die Liste weiterwächst
+changed = [snapshot.version for snapshot, items in filter(None, held)
+           if not isinstance(snapshot.items, tuple) or list(snapshot.items) != items]
+if held and not changed:
+    print("✅ Gehaltene Snapshots bleiben unverändert")
+else:
+    print(f"❌ Snapshots nachträglich verändert: {changed}")
+
+# --- Kosten pro Update ---
+print("\n[INFO] Einzelne Updates auf Listen mit 1000 / 10000 / 50000 Items...")
+costs = {}
+for size in (1000, 10000, 50000):
+    costs[size], loop = update_cost(size)
+    print(f"  {size:>6} Items: {costs[size]:.1f} µs pro Update")
+
+if costs[50000] < 3 * costs[1000]:
+    print("✅ Kosten pro Update wachsen nicht mit der Listengröße")
+else:
+    print("❌ Updates werden mit der Listengröße teurer")
+
+if loop.snapshot.version == 52000 and len(loop.snapshot) == 52000:
+    print("✅ Snapshot beim ersten Lesen auf dem neuesten Stand")
+else:
+    print(f"❌ Snapshot v{loop.snapshot.version} mit {len(loop.snapshot)} Items")
+
+footer()
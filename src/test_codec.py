@@ -0,0 +1,88 @@
+from sim_helpers import header, footer
+from shopping_list import ORSetShoppingList
+from codec import encode, decode, HEADER, MAGIC, T_DICT, T_TOKEN, T_INT, TOKENS
+import time
+import uuid
+
+
+def decode_cost(messages, mode, rounds=5000):
+    # µs für einmal decode aller Nachrichten - bestes von drei Durchläufen
+    encoded = [encode(msg, mode) for msg in messages]
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for data in encoded:
+                decode(data)
+        cost = (time.perf_counter() - start) / rounds * 1e6
+        best = cost if best is None else min(best, cost)
+    return best
+
+
+header("Codec")
+
+# --- Hin und zurück ---
+print("\n[INFO] Nachrichten in beiden Formaten hin und zurück...")
+crdt_list = ORSetShoppingList("a8098c1a-f86e-11da-bd1a-00112444be1e")
+crdt_list.add_items(["milk", "bread"])
+crdt_list.remove_item("milk")
+node_id = str(uuid.uuid4())
+messages = [
+    {"type": "announcement", "node_id": node_id, "port": 50123, "multicast": True},
+    {"type": "upd", "action": "add", "item": "Äpfel", "seq": 7, "epoch": 2, "min_version": 0, "ack": True},
+    {"type": "bupd", "seq": 8, "ops": [["add", "a"], ["remove", "Brötchen"], ["add", ""]]},
+    {"type": "ack", "seq": 3},
+    {"type": "lease_ack", "node_id": node_id, "epoch": 4, "seq": 9},
+    {"type": "sync_state", "version": 70000, "items": [f"item-{i}" for i in range(500)], "count": 500, "from": 0},
+    {"type": "gap_req", "from": -1, "to": 2 ** 40},
+    {"type": "crdt", "state": crdt_list.state()},
+    # Passen nicht ins feste Layout (None, float, fremder Key, Großbuchstaben) - gehen als JSON
+    {"type": "lease", "leader_id": crdt_list.replica_id, "candidate_id": None, "seq": 3, "version": 1.5},
+    {"type": "upd", "action": "add", "item": "x", "seq": 1, "extra": [1, 2]},
+    {"type": "ack", "seq": 2 ** 70},
+    {"type": "announcement", "node_id": node_id.upper(), "port": 1},
+]
+failed = []
+for mode in ("binary", "json"):
+    for msg in messages:
+        # JSON kennt keine Tupel - der Vergleich läuft auf der JSON-Form
+        expected = decode(encode(msg, "json"))
+        if decode(encode(msg, mode)) != expected:
+            failed.append((mode, msg["type"]))
+
+if not failed:
+    print(f"✅ {len(messages)} Nachrichten binär und als JSON unverändert")
+else:
+    print(f"❌ Abweichungen: {failed}")
+
+# --- Version 1 ---
+# ack mit seq=7, wie ihn ein Node mit dem alten getaggten Format schickt
+body = bytes([T_DICT, 2, 0, T_TOKEN, TOKENS.index("ack"), 18, T_INT, 14])
+old = HEADER.pack(MAGIC, 1, 0, len(body)) + body
+if decode(old) == {"type": "ack", "seq": 7}:
+    print("✅ Nachrichten im alten Format (Version 1) werden weiter gelesen")
+else:
+    print(f"❌ Version 1: {decode(old)}")
+
+# --- Größe und CPU ---
+hot = messages[:5] + [
+    {"type": "lease", "leader_id": node_id, "candidate_id": crdt_list.replica_id,
+     "epoch": 2, "min_version": 10, "seq": 99, "version": 4711},
+]
+binary = sum(len(encode(msg, "binary")) for msg in hot)
+text = sum(len(encode(msg, "json")) for msg in hot)
+print(f"\n[INFO] {len(hot)} häufige Nachrichten: {binary} Bytes binär, {text} Bytes JSON")
+if binary * 2 < text:
+    print("✅ Binär weniger als halb so groß")
+else:
+    print("❌ Binärformat spart zu wenig")
+
+costs = {mode: decode_cost(hot, mode) for mode in ("binary", "json")}
+print(f"  decode: {costs['binary']:.1f} µs binär, {costs['json']:.1f} µs JSON")
+# Nicht messbar langsamer als json.loads - das alte Format brauchte das 2-3fache
+if costs["binary"] < 1.5 * costs["json"]:
+    print("✅ Binär dekodieren kostet nicht mehr CPU als JSON")
+else:
+    print("❌ Binär dekodieren deutlich teurer als JSON")
+
+footer()
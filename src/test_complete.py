@@ -106,18 +106,18 @@ node3.send_to_leader("add", "Eier")
 time.sleep(0.3)
 
 print("\n[STATUS] Shopping-Listen nach Hinzufügen:")
-print(f"Node 1: {node1.shopping_list.get_items()}")
-print(f"Node 2: {node2.shopping_list.get_items()}")
-print(f"Node 3: {node3.shopping_list.get_items()}")
+print(f"Node 1: {list(node1.snapshot())}")
+print(f"Node 2: {list(node2.snapshot())}")
+print(f"Node 3: {list(node3.snapshot())}")
 
 print("\n[AKTION] Node 1 entfernt 'Brot'...")
 node1.send_to_leader("remove", "Brot")
 time.sleep(0.3)
 
 print("\n[STATUS] Shopping-Listen nach Entfernen:")
-print(f"Node 1: {node1.shopping_list.get_items()}")
-print(f"Node 2: {node2.shopping_list.get_items()}")
-print(f"Node 3: {node3.shopping_list.get_items()}")
+print(f"Node 1: {list(node1.snapshot())}")
+print(f"Node 2: {list(node2.snapshot())}")
+print(f"Node 3: {list(node3.snapshot())}")
 
 # Verifikation
 print("\n" + "=" * 60)
@@ -125,9 +125,9 @@ print("VERIFIKATION")
 print("=" * 60)
 
 lists_equal = (
-    node1.shopping_list.get_items() == 
-    node2.shopping_list.get_items() == 
-    node3.shopping_list.get_items()
+    list(node1.snapshot()) == 
+    list(node2.snapshot()) == 
+    list(node3.snapshot())
 )
 
 if lists_equal:
@@ -138,7 +138,7 @@ else:
 
 # Zeige finale Listen
 print("\nFinale Shopping-Liste:")
-for i, item in enumerate(node1.shopping_list.get_items(), 1):
+for i, item in enumerate(list(node1.snapshot()), 1):
     print(f"  {i}. {item}")
 
 # Aufräumen
@@ -0,0 +1,89 @@
+from sim_helpers import quiet, agreed, cluster, nodes_of, elect, header, footer
+
+header("Failover mit Nachfolger, Lease und Epoche")
+
+
+def items(node):
+    return sorted(node.shopping_list.get_items())
+
+
+# --- Lease läuft ab ---
+print("\n[INFO] Leader crasht, der Nachfolger übernimmt...")
+with quiet():
+    net, parts = cluster(5, seed=3, failover=True)
+    nodes = nodes_of(parts)
+    leader = elect(net, parts, 10)
+    leader.send_to_leader("add", "milk")
+    net.run(2)
+
+    successor_id = leader.failover.successor_id
+    epoch = leader.failover.epoch
+    net.crash(leader)
+    crashed_at = net.now
+    survivors = [n for n in nodes if n is not leader]
+    recovered = net.run_until(lambda: agreed(survivors) and survivors[0].current_leader_id != leader.id, 10)
+    failover_time = net.now - crashed_at
+
+    new_leader = next((n for n in survivors if n.is_leader), None)
+    if new_leader:
+        new_leader.send_to_leader("add", "bread")
+    net.run(1)
+
+print(f"  Übernahme nach {failover_time * 1000:.0f} ms virtuell")
+if recovered and new_leader.id == successor_id and new_leader.failover.epoch == epoch + 1:
+    print(f"✅ Vorbestimmter Nachfolger übernimmt mit Epoche {new_leader.failover.epoch}")
+else:
+    print(f"❌ Neuer Leader {new_leader and new_leader.id[:8]}, erwartet {successor_id and successor_id[:8]}")
+
+# Ohne Ring-Election: höchstens die Lease plus zwei Heartbeat-Intervalle
+# (letzter Heartbeat kurz vor dem Crash, Prüfung erst beim nächsten tick)
+if recovered and failover_time <= leader.failover.lease_duration + 2 * leader.failover.heartbeat_interval:
+    print("✅ Übernahme innerhalb von Lease + 2 Heartbeats")
+else:
+    print("❌ Übernahme dauert zu lange")
+
+if all(items(n) == ["bread", "milk"] for n in survivors):
+    print("✅ Writes nach der Übernahme erreichen alle Überlebenden")
+else:
+    print(f"❌ Replikate: {[items(n) for n in survivors]}")
+
+# --- Abgesetzter Leader ---
+print("\n[INFO] Leader abtrennen, auf beiden Seiten schreiben, wieder verbinden...")
+with quiet():
+    net, parts = cluster(3, seed=3, failover=True)
+    nodes = nodes_of(parts)
+    old_leader = elect(net, parts, 10)
+    old_leader.send_to_leader("add", "a")
+    net.run(1)
+
+    others = [n for n in nodes if n is not old_leader]
+    net.partition([old_leader], others)
+    # Die Lease ist noch frisch - der alte Leader nimmt den Write an,
+    # kann ihn aber niemandem mehr schicken
+    old_leader.send_to_leader("add", "old-leader-write")
+    net.run(0.1)
+    accepted = "old-leader-write" in old_leader.shopping_list
+
+    net.run(4)
+    new_leader = next((n for n in others if n.is_leader), None)
+    if new_leader:
+        new_leader.send_to_leader("add", "b")
+    net.run(1)
+
+    net.heal()
+    converged = net.run_until(
+        lambda: len({(n.shopping_list.version, tuple(items(n))) for n in nodes}) == 1, 10)
+
+print(f"  Alter Leader vor dem Heilen: {'Write angenommen' if accepted else 'Write nicht angenommen'}")
+if accepted and new_leader and not old_leader.is_leader:
+    print(f"✅ Neuer Leader {new_leader.id[:8]} (Epoche {new_leader.failover.epoch}), der alte tritt ab")
+else:
+    print(f"❌ Angenommen: {accepted}, neuer Leader: {new_leader and new_leader.id[:8]}, "
+          f"alter noch Leader: {old_leader.is_leader}")
+
+if converged and items(old_leader) == ["a", "b"]:
+    print("✅ Write des abgesetzten Leaders verworfen, alle Replikate gleich")
+else:
+    print(f"❌ Replikate: {[(n.shopping_list.version, items(n)) for n in nodes]}")
+
+footer()
@@ -0,0 +1,121 @@
+from sim_helpers import header, footer
+from framing import (FrameReader, FramingError, MessageTooLarge, read_message_async, send_message,
+                     FRAME_HEADER, MAX_MESSAGE)
+import asyncio
+import socket
+import threading
+
+
+class Recorder:
+    # Sammelt, was send_message schreibt - für die asyncio-Variante
+    def __init__(self):
+        self.data = bytearray()
+
+    def sendall(self, data):
+        self.data += data
+
+
+def framed(*messages):
+    recorder = Recorder()
+    for message in messages:
+        send_message(recorder, message)
+    return bytes(recorder.data)
+
+
+def read_all_async(data, max_message):
+    # Alle Nachrichten eines Streams über read_message_async
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        results = []
+        while True:
+            try:
+                message = await read_message_async(reader, max_message)
+            except MessageTooLarge:
+                results.append("zu groß")
+                continue
+            if message is None:
+                return results
+            results.append(bytes(message))
+
+    return asyncio.run(run())
+
+
+header("Framing")
+
+# --- Große Nachricht in Chunks ---
+print("\n[INFO] 1 MiB über ein Socket-Paar...")
+left, right = socket.socketpair()
+payload = bytes(range(256)) * 4096
+sender = threading.Thread(target=send_message, args=(left, payload))
+sender.start()
+received = FrameReader(right).read_message()
+sender.join()
+if received == payload:
+    print(f"✅ {len(payload)} Bytes in {len(payload) // (64 * 1024)} Chunks unverändert")
+else:
+    print(f"❌ {len(received or b'')} Bytes empfangen")
+
+# --- Sender lehnt ab ---
+print(f"\n[INFO] Nachricht über MAX_MESSAGE ({MAX_MESSAGE} Bytes) senden...")
+try:
+    send_message(left, bytes(MAX_MESSAGE + 1))
+    print("❌ Gesendet")
+except MessageTooLarge as e:
+    right.setblocking(False)
+    try:
+        right.recv(1)
+        print("❌ Abgelehnt, aber schon Bytes verschickt")
+    except BlockingIOError:
+        print(f"✅ Abgelehnt, bevor etwas gesendet wurde: {e}")
+    right.setblocking(True)
+
+# --- Empfänger verwirft und bleibt synchron ---
+print("\n[INFO] Empfänger mit 100000 Bytes Grenze bekommt 200000, danach eine kleine...")
+
+
+def send_both():
+    send_message(left, bytes(200000))
+    send_message(left, b"danach")
+    left.close()
+
+
+sender = threading.Thread(target=send_both)
+sender.start()
+reader = FrameReader(right, max_message=100000)
+results = []
+while True:
+    try:
+        message = reader.read_message()
+    except MessageTooLarge:
+        results.append("zu groß")
+        continue
+    if message is None:
+        break
+    results.append(bytes(message))
+sender.join()
+right.close()
+
+if results == ["zu groß", b"danach"]:
+    print("✅ Große Nachricht verworfen, die nächste kommt unversehrt an")
+else:
+    print(f"❌ Ergebnis: {[r if r == 'zu groß' else len(r) for r in results]}")
+
+results = read_all_async(framed(bytes(200000), b"danach"), 100000)
+if results == ["zu groß", b"danach"]:
+    print("✅ Genauso mit read_message_async")
+else:
+    print(f"❌ Async: {[r if r == 'zu groß' else len(r) for r in results]}")
+
+# --- Protokollfehler ---
+print("\n[INFO] Chunk-Header mit 1 GiB...")
+try:
+    read_all_async(FRAME_HEADER.pack(1 << 30, 0), MAX_MESSAGE)
+    print("❌ Angenommen")
+except MessageTooLarge:
+    print("❌ Als zu große Nachricht behandelt - die Verbindung wäre nicht mehr synchron")
+except FramingError as e:
+    print(f"✅ Abgewiesen, ohne Speicher zu reservieren: {e}")
+
+footer()
@@ -0,0 +1,93 @@
+from sim_helpers import quiet, cluster, nodes_of, elect, header, footer
+from group_commit import coalesce
+
+WRITES = 500
+
+
+def elected(seed, size, group_commit):
+    # Gewählter Cluster - liefert Netz, Nodes und Leader
+    net, parts = cluster(size, seed, group_commit=group_commit)
+    leader = elect(net, parts, 10)
+    net.run(1)
+    return net, nodes_of(parts), leader
+
+
+def count_broadcasts(leader):
+    # Zählt die Updates, die der Leader an alle Peers schickt
+    sent = []
+    send_to_all = leader._send_to_all
+
+    def counting(msg):
+        sent.append(msg["type"])
+        send_to_all(msg)
+
+    leader._send_to_all = counting
+    return sent
+
+
+def burst(group_commit, seed=6, size=5):
+    # Follower schicken WRITES Requests innerhalb von 50 ms
+    with quiet():
+        net, nodes, leader = elected(seed, size, group_commit)
+        sent = count_broadcasts(leader)
+        writers = [n for n in nodes if n is not leader]
+        for i in range(WRITES):
+            writer = writers[i % len(writers)]
+            writer.transport.call_later(i * 0.0001, writer.send_to_leader, "add", f"item-{i:03d}")
+        converged = net.run_until(lambda: all(len(n.shopping_list) == WRITES for n in nodes), 10)
+    return converged, len(sent), leader.shopping_list.version
+
+
+header("Group-Commit auf dem Leader")
+
+# --- coalesce ---
+print("\n[INFO] Operationen eines Fensters zusammenfassen...")
+ops = [("add", "a"), ("remove", "a"), ("add", "b"), ("remove", "c"), ("add", "c"), ("add", "b")]
+result = coalesce(ops)
+if result == [("remove", "a"), ("add", "c"), ("add", "b")]:
+    print(f"✅ {len(ops)} Operationen -> {result}")
+else:
+    print(f"❌ Ergebnis: {result}")
+
+# --- Aufheben im Cluster ---
+print("\n[INFO] add + remove desselben Items im selben Fenster...")
+with quiet():
+    net, nodes, leader = elected(seed=5, size=5, group_commit=True)
+    sent = count_broadcasts(leader)
+    version = leader.shopping_list.version
+    follower = next(n for n in nodes if n is not leader)
+    follower.send_to_leader("add", "tmp")
+    follower.transport.call_later(0.001, follower.send_to_leader, "remove", "tmp")
+    net.run(1)
+
+# coalesce lässt nur das remove übrig, und das ändert nichts an der Liste
+stats = leader.group_commit
+if stats.cancelled == 1 and not sent and leader.shopping_list.version == version:
+    print("✅ Operationen heben sich auf - keine neue Version, kein Update verschickt")
+else:
+    print(f"❌ {stats.cancelled} aufgehoben, {len(sent)} Updates, "
+          f"Version {version} -> {leader.shopping_list.version}")
+
+if not any("tmp" in node.shopping_list for node in nodes):
+    print("✅ Kein Replikat kennt das Item")
+else:
+    print("❌ Item taucht in einem Replikat auf")
+
+# --- Last ---
+print(f"\n[INFO] {WRITES} Writes in 50 ms, mit und ohne Group-Commit...")
+plain = burst(group_commit=False)
+grouped = burst(group_commit=True)
+print(f"  Ohne: {plain[1]} Updates an alle, Version {plain[2]}")
+print(f"  Mit:  {grouped[1]} Updates an alle, Version {grouped[2]}")
+
+if plain[0] and grouped[0]:
+    print("✅ Alle Replikate vollständig")
+else:
+    print("❌ Replikate unvollständig")
+
+if grouped[1] * 10 <= plain[1]:
+    print("✅ Group-Commit verschickt höchstens ein Zehntel der Updates")
+else:
+    print("❌ Group-Commit spart zu wenig")
+
+footer()
@@ -0,0 +1,77 @@
+from sim_helpers import quiet, cluster, nodes_of, elect, header, footer
+from simulation import SimulatedNetwork
+from codec import decode
+
+header("Multicast auf dem simulierten Netz")
+
+
+def count_updates(node):
+    # Zählt die Update-Datagramme des Coordinator-Sockets (ohne Antworten
+    # auf gap_req - bei Jitter kommen Updates auch mal vertauscht an)
+    sent = []
+    sendto = node.coord_socket.sendto
+
+    def counting(data, addr):
+        if decode(data)["type"] == "upd":
+            sent.append(addr)
+        sendto(data, addr)
+
+    node.coord_socket.sendto = counting
+    return sent
+
+
+# --- Alle in der Gruppe ---
+print("\n[INFO] 5 Nodes, alle Mitglied der Gruppe...")
+with quiet():
+    net, parts = cluster(5, seed=2, multicast="127.0.0.1")
+    nodes = nodes_of(parts)
+    leader = elect(net, parts, 10)
+    net.run(2)
+
+    sent = count_updates(leader)
+    for i in range(20):
+        leader.send_to_leader("add", f"item-{i:02d}")
+    converged = net.run_until(lambda: all(len(n.shopping_list) == 20 for n in nodes), 5)
+
+members = all(peer["multicast"] for n in nodes for peer in n.election.ring.discovery.get_peers().values())
+if members:
+    print("✅ Alle Peers per Announcement über die Gruppe als Mitglied bekannt")
+else:
+    print("❌ Peers nicht als Mitglied bekannt")
+
+if converged:
+    print("✅ Alle Replikate haben die 20 Updates")
+else:
+    print(f"❌ Replikate: {[len(n.shopping_list) for n in nodes]}")
+
+# Ein sendto pro Update, egal wie viele Peers
+if len(sent) == 20:
+    print(f"✅ Leader verschickt {len(sent)} Datagramme für 20 Updates an 4 Peers")
+else:
+    print(f"❌ Leader verschickt {len(sent)} Datagramme für 20 Updates")
+
+# --- Mitglieder und Nicht-Mitglieder ---
+print("\n[INFO] 3 Mitglieder, 2 Nodes ohne Multicast, ohne Vorwissen...")
+with quiet():
+    net = SimulatedNetwork(seed=3)
+    parts = [net.spawn(multicast="127.0.0.1") for _ in range(3)] + [net.spawn() for _ in range(2)]
+    nodes = nodes_of(parts)
+    # Nicht-Mitglieder hören die Gruppe nicht - Mitglieder erreichen sie
+    # nur über die Unicast-Kopie ihrer Announcements an den Discovery-Port
+    found = net.run_until(lambda: all(len(n.election.ring.discovery.get_peers()) == 4 for n in nodes), 5)
+    leader = elect(net, parts, 10)
+    for i in range(20):
+        nodes[i % len(nodes)].send_to_leader("add", f"item-{i:02d}")
+    converged = net.run_until(lambda: all(len(n.shopping_list) == 20 for n in nodes), 5)
+
+if found:
+    print("✅ Jeder Node kennt alle 4 anderen")
+else:
+    print(f"❌ Bekannte Peers: {[len(n.election.ring.discovery.get_peers()) for n in nodes]}")
+
+if leader and converged:
+    print("✅ Alle Replikate haben die 20 Updates")
+else:
+    print(f"❌ Leader {leader and leader.id[:8]}, Replikate: {[len(n.shopping_list) for n in nodes]}")
+
+footer()
@@ -0,0 +1,69 @@
+from sim_helpers import quiet, cluster, join, elect, header, footer
+from node import Node
+import shutil
+import tempfile
+
+header("Persistenz: Snapshot + WAL")
+
+# --- WAL ---
+print("\n[INFO] Follower mit data_dir, Neustart aus Snapshot + WAL...")
+data_dir = tempfile.mkdtemp()
+try:
+    with quiet():
+        net, parts = cluster(3, seed=2)
+        leader = elect(net, parts, 10)
+
+        # Follower mit WAL kommt nach der Election dazu
+        follower = join(net, parts, data_dir=data_dir)
+
+        for i in range(50):
+            leader.send_to_leader("add", f"item-{i:02d}")
+        leader.send_batch([("remove", f"item-{i:02d}") for i in range(0, 50, 5)])
+        net.run_until(lambda: follower.shopping_list.version == 51 and len(follower.shopping_list) == 40, 10)
+        expected = (follower.shopping_list.version, follower.shopping_list.get_items())
+        follower.store.close()
+
+        restarted = Node(data_dir=data_dir)
+    restored = (restarted.shopping_list.version, restarted.shopping_list.get_items())
+    restarted.store.close()
+finally:
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+# 51 Operationen - unter snapshot_every, der Stand kommt also aus dem WAL
+if restored == expected and len(restored[1]) == 40:
+    print(f"✅ Wiederhergestellt: v{restored[0]}, {len(restored[1])} Items")
+else:
+    print(f"❌ Wiederhergestellt v{restored[0]} ({len(restored[1])} Items), erwartet v{expected[0]}")
+
+# --- Abgebrochenes WAL-Ende ---
+print("\n[INFO] Crash mitten im Schreiben eines WAL-Eintrags...")
+data_dir = tempfile.mkdtemp()
+try:
+    with quiet():
+        node = Node(data_dir=data_dir)
+        for version in range(1, 4):
+            node.shopping_list.apply_update(version, "add", f"item-{version}")
+        node.store.wal.write('[4, "add", "ite')
+        node.store.close()
+
+        restarted = Node(data_dir=data_dir)
+    restored = (restarted.shopping_list.version, restarted.shopping_list.get_items())
+    restarted.store.close()
+finally:
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+if restored == (3, ["item-1", "item-2", "item-3"]):
+    print("✅ Unvollständiger letzter Eintrag ignoriert, Rest wiederhergestellt")
+else:
+    print(f"❌ Wiederhergestellt: {restored}")
+
+# --- CRDT ---
+print("\n[INFO] data_dir zusammen mit crdt...")
+try:
+    with quiet():
+        Node(crdt=True, data_dir=tempfile.gettempdir())
+    print("❌ Kombination angenommen - es würde nichts gespeichert")
+except ValueError:
+    print("✅ Kombination abgelehnt statt still nichts zu speichern")
+
+footer()
@@ -82,13 +82,13 @@ print(f"\n[ACTION] Stoppe {leader_name}...")
 leader_disc.stop()
 leader_elec.stop()
 
-print("\n[INFO] Warte 35 Sekunden auf Timeout-Detection und Re-Election...")
-print("(Timeout ist 30 Sek + 5 Sek für Election)")
+print("\n[INFO] Warte 10 Sekunden auf Timeout-Detection und Re-Election...")
+print("(Adaptiver Timeout wenige Sekunden + Election)")
 
 # Countdown
-for i in range(35, 0, -5):
+for i in range(10, 0, -2):
     print(f"  ... noch {i} Sekunden")
-    time.sleep(5)
+    time.sleep(2)
 
 print("\n[INFO] Prüfe Leader-Status...")
 
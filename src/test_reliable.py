@@ -0,0 +1,64 @@
+from sim_helpers import quiet, cluster, nodes_of, elect, header, footer
+
+WRITES = 200
+
+
+def replicate(reliable, seed=4, loss=0.3, size=5):
+    # Leader schreibt WRITES Items, 30% der Datagramme gehen verloren -
+    # alle Replikate müssen trotzdem vollständig werden
+    with quiet():
+        net, parts = cluster(size, seed, net_options={"loss": loss}, reliable=reliable)
+        nodes = nodes_of(parts)
+        leader = elect(net, parts, 10)
+
+        start = net.now
+        for i in range(WRITES):
+            leader.transport.call_later(i * 0.005, leader.send_to_leader, "add", f"item-{i:03d}")
+        converged = net.run_until(lambda: all(len(n.shopping_list) == WRITES for n in nodes), 30)
+        seconds = net.now - start
+        # Nachzügler (acks, Retransmits) abwarten
+        net.run(1)
+
+    return {
+        "converged": converged,
+        "seconds": round(seconds, 3),
+        # Reihenfolge kann nach einem Digest-Abgleich abweichen, Inhalt nicht
+        "identical": all(sorted(n.shopping_list.get_items()) == sorted(leader.shopping_list.get_items())
+                         for n in nodes),
+        "pending": leader.reliable.pending() if leader.reliable else None,
+        "buffered": sum(len(n.reorder_buffer) for n in nodes),
+        "dropped": net.stats["dropped"],
+    }
+
+
+header("Zustellung bei Paketverlust")
+
+# --- Bestätigte Zustellung ---
+print(f"\n[INFO] reliable=True, 30% Verlust, {WRITES} Writes...")
+result = replicate(reliable=True)
+print(f"  Konvergiert nach {result['seconds']}s virtuell, {result['dropped']} Datagramme verloren")
+if result["converged"] and result["identical"]:
+    print("✅ Alle Replikate vollständig und gleich")
+else:
+    print("❌ Replikate unvollständig")
+
+if result["pending"] == 0:
+    print("✅ Keine unbestätigten Updates mehr beim Leader")
+else:
+    print(f"❌ Noch {result['pending']} unbestätigte Updates")
+
+# --- Nur Lückenreparatur ---
+print(f"\n[INFO] reliable=False, 30% Verlust - nur gap_req repariert...")
+result = replicate(reliable=False)
+print(f"  Konvergiert nach {result['seconds']}s virtuell, {result['dropped']} Datagramme verloren")
+if result["converged"] and result["identical"]:
+    print("✅ Lücken vom Leader nachgeholt")
+else:
+    print("❌ Lücken bleiben offen")
+
+if result["buffered"] == 0:
+    print("✅ Reorder-Buffer leer")
+else:
+    print(f"❌ {result['buffered']} Updates hängen im Reorder-Buffer")
+
+footer()
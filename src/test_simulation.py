@@ -0,0 +1,135 @@
+from sim_helpers import quiet, agreed, cluster, nodes_of, elect, header, footer
+import random
+import time
+
+
+def elect_and_crash(seed, size):
+    # Election, Leader crasht, Re-Election - liefert den Ablauf zum Vergleich
+    with quiet():
+        net, parts = cluster(size, seed, gossip=True)
+        nodes = nodes_of(parts)
+        parts[0][3].start_election()
+        elected = net.run_until(lambda: agreed(nodes), 60)
+        elected_at = net.now
+
+        leader = next(n for n in nodes if n.is_leader)
+        net.crash(leader)
+        crashed_at = net.now
+        reelected = net.run_until(
+            lambda: agreed(nodes) and all(n.current_leader_id != leader.id for n in nodes if n.transport.alive), 120)
+
+    new_leader = next(n for n in nodes if n.is_leader and n.transport.alive)
+    return {
+        "elected": elected,
+        "reelected": reelected,
+        "election": round(elected_at, 3),
+        "failover": round(net.now - crashed_at, 3),
+        "leaders": (leader.id, new_leader.id),
+        "stats": dict(net.stats),
+    }
+
+
+header("Simuliertes Netz")
+
+# --- Großer Cluster ---
+print("\n[INFO] 1000 Nodes, Gossip, Election und Leader-Crash...")
+start = time.time()
+result = elect_and_crash(seed=1, size=1000)
+print(f"  Election:    {result['election']}s virtuell")
+print(f"  Re-Election: {result['failover']}s virtuell")
+print(f"  Laufzeit:    {time.time() - start:.1f}s echt")
+print(f"  Ereignisse:  {result['stats']['events']}")
+
+if result["elected"] and result["reelected"]:
+    print("✅ Leader gewählt und nach dem Crash neu gewählt")
+else:
+    print("❌ Keine Einigung auf einen Leader")
+
+# --- Determinismus ---
+print("\n[INFO] Gleicher Seed zweimal, anderer Seed einmal (100 Nodes)...")
+# Das globale Modul random darf den Ablauf nicht beeinflussen und wird
+# vom Netz auch nicht verstellt
+random.seed(1)
+first = elect_and_crash(seed=7, size=100)
+random.seed(2)
+global_state = random.getstate()
+second = elect_and_crash(seed=7, size=100)
+untouched = random.getstate() == global_state
+other = elect_and_crash(seed=8, size=100)
+
+if first == second:
+    print("✅ Gleicher Seed - identischer Ablauf")
+else:
+    print("❌ Gleicher Seed - unterschiedlicher Ablauf")
+    print(f"  {first}\n  {second}")
+
+if first != other:
+    print("✅ Anderer Seed - anderer Ablauf")
+else:
+    print("❌ Anderer Seed - identischer Ablauf")
+
+if untouched:
+    print("✅ Globales random unberührt")
+else:
+    print("❌ Globales random vom Netz verändert")
+
+# --- Partition ---
+print("\n[INFO] Partition: Leader mit einer Minderheit abtrennen...")
+with quiet():
+    net, parts = cluster(20, seed=3, gossip=True)
+    nodes = nodes_of(parts)
+    parts[0][3].start_election()
+    net.run_until(lambda: agreed(nodes), 60)
+
+    leader = next(n for n in nodes if n.is_leader)
+    minority = [leader] + [n for n in nodes if n is not leader][:4]
+    majority = [n for n in nodes if n not in minority]
+    net.partition(minority, majority)
+    split = net.run_until(
+        lambda: agreed(majority) and all(n.current_leader_id != leader.id for n in majority), 120)
+
+    net.heal()
+    net.run(10)
+
+print(f"  Mehrheit ohne alten Leader: {'neu gewählt' if split else 'kein Leader'}")
+if split:
+    print("✅ Mehrheit wählt in der Partition einen eigenen Leader")
+else:
+    print("❌ Mehrheit bleibt ohne Leader")
+
+# --- Ausfall links ---
+print("\n[INFO] Hirschberg-Sinclair, linker Nachbar des Starters ist ausgefallen...")
+with quiet():
+    net, parts = cluster(8, seed=4, strategy="hirschberg-sinclair")
+    nodes = nodes_of(parts)
+    by_id = {node.id: node for node in nodes}
+    net.run(0.5)
+
+    starter = parts[0]
+    failed = by_id[starter[2].left_neighbor["id"]]
+    # Der Node links vom ausgefallenen - nur ring_repair sagt es ihm, bevor
+    # seine Discovery den Ausfall bemerkt
+    far_left = by_id[failed.election.ring.left_neighbor["id"]]
+    repairs = []
+    handle = far_left.election._handle_message
+
+    def recording(msg):
+        if msg["type"] == "ring_repair":
+            repairs.append((msg["originator"], msg["failed"]))
+        handle(msg)
+
+    far_left.election._handle_message = recording
+    net.crash(failed)
+    leader = elect(net, [starter] + [part for part in parts if part is not starter and part[0] is not failed], 30)
+
+if leader and leader is not failed and starter[2].left_neighbor["id"] == far_left.id:
+    print(f"✅ Leader {leader.id[:8]} gewählt, Starter hat den neuen linken Nachbarn")
+else:
+    print(f"❌ Leader {leader and leader.id[:8]}, links vom Starter {starter[2].left_neighbor['id'][:8]}")
+
+if (starter[0].id, failed.id) in repairs:
+    print("✅ ring_repair ging an den Node auf der anderen Seite der Lücke")
+else:
+    print("❌ Node links vom Ausfall nicht benachrichtigt")
+
+footer()
@@ -0,0 +1,43 @@
+from sim_helpers import quiet, cluster, nodes_of, join, elect, header, footer
+
+header("State-Transfer per sync_req")
+
+# --- Neuer Node ---
+print("\n[INFO] Node kommt zu einer Liste mit 300 Items dazu...")
+with quiet():
+    net, parts = cluster(3, seed=2)
+    leader = elect(net, parts, 10)
+    for start in range(0, 300, 100):
+        leader.send_batch([("add", f"item-{i:03d}") for i in range(start, start + 100)])
+    net.run(1)
+
+    joiner = join(net, parts)
+    joiner.request_sync()
+    synced = net.run_until(lambda: joiner.shopping_list.version == leader.shopping_list.version, 5)
+
+if synced and sorted(joiner.shopping_list.get_items()) == sorted(leader.shopping_list.get_items()):
+    print(f"✅ Stand v{joiner.shopping_list.version} mit {len(joiner.shopping_list)} Items übernommen")
+else:
+    print(f"❌ Neuer Node bei v{joiner.shopping_list.version}, Leader bei v{leader.shopping_list.version}")
+
+# --- Follower vor dem Leader ---
+print("\n[INFO] Follower mit höherer Version als der Leader fragt nach...")
+with quiet():
+    net, parts = cluster(3, seed=2)
+    leader = elect(net, parts, 10)
+    for i in range(5):
+        leader.send_to_leader("add", f"item-{i}")
+    net.run(1)
+
+    # Z.B. direkt nach einer Election, bevor der List-Check gelaufen ist
+    follower = next(n for n in nodes_of(parts) if n is not leader)
+    follower.shopping_list.load_snapshot(20, [f"item-{i}" for i in range(20)])
+    follower.request_sync()
+    net.run(1)
+
+if follower.shopping_list.version == 20 and len(follower.shopping_list) == 20:
+    print("✅ Längere Liste nicht mit dem Snapshot des Leaders überschrieben")
+else:
+    print(f"❌ Follower jetzt bei v{follower.shopping_list.version} mit {len(follower.shopping_list)} Items")
+
+footer()
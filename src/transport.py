@@ -0,0 +1,66 @@
+import socket
+import struct
+import time
+
+
+class UdpTransport:
+    # Echte Sockets - Standard-Transport von Discovery, Election und Node
+    #
+    # Die Komponenten öffnen ihre Sockets nur noch über node.transport.
+    # simulation.SimHost bietet dieselben Methoden für ein simuliertes Netz
+    # (virtuelle Zeit, Latenz, Verlust, Partitionen).
+
+    def datagram(self, port=None, broadcast=False, shared=False):
+        # UDP-Socket, gebunden an `port` (None: nur zum Senden)
+        # shared: mehrere Nodes auf einem Rechner teilen sich den Port
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        if broadcast:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        if port is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if shared:
+                try:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+                except AttributeError:
+                    pass
+            sock.bind(("", port))
+        return sock
+
+    def join_group(self, sock, group, interface):
+        # Socket tritt einer Multicast-Gruppe bei - OSError wenn das Netz
+        # es nicht erlaubt
+        mreq = struct.pack("4s4s", socket.inet_aton(group), socket.inet_aton(interface))
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+
+    def enable_multicast(self, sock, interface, ttl):
+        # Socket zum Senden an eine Gruppe vorbereiten
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+
+    def connect(self, addr, timeout):
+        # TCP-Verbindung zu einem Nachbarn (Election, connection.py)
+        sock = socket.create_connection(addr, timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def listener(self, port, backlog=5):
+        # TCP-Server-Socket für gerahmte Nachrichten (Election)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(("", port))
+        sock.listen(backlog)
+        return sock
+
+    def free_port(self, start_port=5001, max_attempts=100):
+        for port in range(start_port, start_port + max_attempts):
+            try:
+                test_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                test_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                test_socket.bind(('', port))
+                test_socket.close()
+                time.sleep(0.1)
+                return port
+            except OSError:
+                continue
+        raise Exception("Kein freier Port gefunden!")